@@ -1,6 +1,7 @@
 from typing import Dict, Any, Optional
 from app.repositories.user_repository import get_user
 from app.core.database import get_database
+from app.utils.request_loader import invalidate
 
 
 async def get_loyalty_points(user_id: str) -> Optional[Dict[str, Any]]:
@@ -73,6 +74,7 @@ async def redeem_points(user_id: str, points: int) -> Dict[str, Any]:
         {"user_id": user_id},
         {"$inc": {"loyalty.points": -points}}
     )
+    invalidate("user", user_id)
     
     return {
         "success": True,
@@ -2,6 +2,7 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 from app.repositories.order_repository import get_order
 from app.core.database import get_database
+from app.repositories.count_cache import invalidate_counts
 
 
 async def initiate_return(order_id: str, reason: str, items: list = None) -> Dict[str, Any]:
@@ -59,6 +60,7 @@ async def request_refund(order_id: str) -> Dict[str, Any]:
         {"order_id": order_id},
         {"$set": {"status": "cancelled"}}
     )
+    invalidate_counts("orders")
     if update_result.modified_count == 0:
         return {"success": False, "error": "Refund request failed", "verified": False}
     
@@ -0,0 +1,181 @@
+import asyncio
+import copy
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.config import get_settings
+from app.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Upper bounds (seconds) of the latency histogram buckets; slower calls land in "+Inf"
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+AgentResult = Tuple[Any, List[Dict[str, Any]]]
+AgentHandler = Callable[[str, str, str], Awaitable[AgentResult]]
+
+
+class LatencyHistogram:
+    """Cumulative latency buckets, Prometheus style."""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total_seconds = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.total_seconds += seconds
+        for index, bound in enumerate(self.bounds):
+            if seconds <= bound:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {}
+        running = 0
+        for bound, count in zip([str(bound) for bound in self.bounds] + ["+Inf"], self.counts):
+            running += count
+            buckets[bound] = running
+        return {"count": running, "sum_seconds": round(self.total_seconds, 4), "buckets": buckets}
+
+
+class AgentSpec:
+    """
+    How the router runs the agent for one intent.
+
+    handler(user_id, session_id, message) returns (result, actions).
+    timeout is in seconds (None uses AGENT_TIMEOUT_SECONDS, 0 disables)
+    and includes time spent waiting for a concurrency slot. When the
+    agent times out, fallback (if any) becomes its result and it reports
+    no actions. writes=True marks agents with side effects (cart, orders,
+    points): a timeout only stops waiting for them, and the handler keeps
+    running until its write is done. needs_llm=False marks agents whose
+    results can be answered with a template reply.
+    """
+
+    def __init__(
+        self,
+        intent: str,
+        handler: AgentHandler,
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        needs_llm: bool = True,
+        fallback: Any = None,
+        writes: bool = False,
+    ):
+        self.intent = intent
+        self.handler = handler
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.needs_llm = needs_llm
+        self.fallback = fallback
+        self.writes = writes
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self.latency = LatencyHistogram()
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.in_flight = 0
+
+    def effective_timeout(self) -> float:
+        override = settings.agent_timeouts.get(self.intent)
+        if override is not None:
+            return override
+        return self.timeout if self.timeout is not None else settings.agent_timeout_seconds
+
+    async def _call(self, user_id: str, session_id: str, message: str) -> AgentResult:
+        if self._semaphore is None:
+            return await self.handler(user_id, session_id, message)
+        async with self._semaphore:
+            return await self.handler(user_id, session_id, message)
+
+    async def run(self, user_id: str, session_id: str, message: str) -> AgentResult:
+        timeout = self.effective_timeout()
+        self.calls += 1
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            with span("agent", intent=self.intent):
+                if timeout <= 0:
+                    return await self._call(user_id, session_id, message)
+                if not self.writes:
+                    return await asyncio.wait_for(self._call(user_id, session_id, message), timeout)
+                # Cancelling a write halfway (order cancelled, refund not recorded) is worse than a late reply
+                call = asyncio.ensure_future(self._call(user_id, session_id, message))
+                try:
+                    return await asyncio.wait_for(asyncio.shield(call), timeout)
+                except asyncio.TimeoutError:
+                    _detached.add(call)
+                    call.add_done_callback(lambda done: self._finish_detached(done, session_id))
+                    raise
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(
+                "Agent timed out",
+                extra={"intent": self.intent, "session_id": session_id, "timeout": timeout}
+            )
+            return copy.deepcopy(self.fallback), []
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.latency.observe(time.perf_counter() - started)
+
+    def _finish_detached(self, call: asyncio.Future, session_id: str) -> None:
+        _detached.discard(call)
+        if call.cancelled():
+            return
+        exc = call.exception()
+        if exc is not None:
+            self.errors += 1
+            logger.error(
+                f"Agent failed after timing out: {exc}",
+                exc_info=exc,
+                extra={"intent": self.intent, "session_id": session_id}
+            )
+        else:
+            logger.info("Agent finished after timing out", extra={"intent": self.intent, "session_id": session_id})
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "intent": self.intent,
+            "timeout_seconds": self.effective_timeout(),
+            "max_concurrency": self.max_concurrency,
+            "needs_llm": self.needs_llm,
+            "writes": self.writes,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "latency": self.latency.snapshot(),
+        }
+
+
+_agents: Dict[str, AgentSpec] = {}
+# Write agents still running after their timeout; referenced so they are not garbage collected
+_detached: Set[asyncio.Future] = set()
+
+
+def register_agent(spec: AgentSpec) -> AgentSpec:
+    """Add an agent to the dispatch table, replacing any agent registered for the same intent."""
+    _agents[spec.intent] = spec
+    return spec
+
+
+def get_agent(intent: str) -> Optional[AgentSpec]:
+    return _agents.get(intent)
+
+
+async def run_agent(intent: str, user_id: str, session_id: str, message: str) -> AgentResult:
+    """Run the agent registered for an intent; intents without one (such as general) return (None, [])."""
+    spec = _agents.get(intent)
+    if spec is None:
+        return None, []
+    return await spec.run(user_id, session_id, message)
+
+
+def agent_stats() -> List[Dict[str, Any]]:
+    return [spec.snapshot() for spec in _agents.values()]
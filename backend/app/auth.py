@@ -6,6 +6,8 @@ import jwt
 from datetime import datetime, timedelta
 from typing import Optional, Dict
 from app.core.database import get_database
+from app.repositories.count_cache import invalidate_counts
+from app.utils.request_loader import invalidate
 from app.config import get_settings
 
 settings = get_settings()
@@ -73,6 +75,7 @@ async def create_user(email: str, password: str, name: str, role: str = "custome
     
     await db.users.create_index("email", unique=True)
     await db.users.insert_one(user)
+    invalidate_counts("users")
     
     # Don't return password hash
     user.pop("password_hash")
@@ -105,6 +108,7 @@ async def change_password(user_id: str, old_password: str, new_password: str) ->
         {"user_id": user_id},
         {"$set": {"password_hash": new_hash, "updated_at": datetime.utcnow()}}
     )
+    invalidate("user", user_id)
     
     return True
 
@@ -145,6 +149,7 @@ async def reset_password_with_token(token: str, new_password: str) -> bool:
             {"user_id": user_id},
             {"$set": {"password_hash": new_hash, "updated_at": datetime.utcnow()}}
         )
+        invalidate("user", user_id)
         
         return result.modified_count > 0
         
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -29,6 +30,84 @@ class Settings(BaseSettings):
     ollama_api_url: str = "http://localhost:11434"
     ollama_url: str = ""  # Optional alias for OLLAMA_URL env var
     
+    # LLM HTTP clients (shared per provider, created in lifespan)
+    openrouter_timeout: float = 60.0
+    ollama_timeout: float = 180.0  # Local models can be slow
+    llm_connect_timeout: float = 5.0
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_expiry: float = 30.0
+    llm_http2: bool = False  # Requires the optional 'h2' package
+    
+    # LLM hedging: start the next provider if the current one has not answered
+    # within the delay (0 disables); the deadline bounds the whole call (0 = none)
+    llm_hedge_delay_seconds: float = 0.0
+    llm_deadline_seconds: float = 0.0
+    
+    # LLM circuit breakers (per provider, sliding window)
+    llm_breaker_window_seconds: float = 60.0
+    llm_breaker_min_calls: int = 5
+    llm_breaker_failure_rate: float = 0.5
+    llm_breaker_open_seconds: float = 30.0
+    llm_breaker_half_open_probes: int = 1
+    llm_breaker_slow_call_seconds: float = 0.0  # Calls slower than this count as failures (0 disables)
+    llm_breaker_degraded_score: float = 0.8
+    
+    # Coalesce identical in-flight prompts into one upstream call
+    llm_singleflight_enabled: bool = True
+    
+    # Prompt token budgets: default, per-model overrides and per-section caps
+    prompt_token_budget: int = 3000
+    prompt_token_budgets: Dict[str, int] = {}
+    prompt_section_budgets: Dict[str, int] = {
+        "summary": 300,
+        "preferences": 150,
+        "cart": 300,
+        "recent": 800,
+        "agent_result": 1500,
+    }
+    
+    # LLM response cache (TTL in seconds per intent; intents not listed are never cached)
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 512
+    llm_cache_ttls: Dict[str, float] = {"general": 300.0, "recommendation": 120.0, "inventory": 60.0}
+    
+    # Agents: compound messages fan out to up to multi_intent_max agents (1 disables); 0 timeout disables
+    multi_intent_max: int = 3
+    agent_timeout_seconds: float = 10.0
+    agent_timeouts: Dict[str, float] = {}
+    
+    # Background session summarization
+    summary_enabled: bool = True
+    summary_min_new_messages: int = 6
+    summary_use_llm: bool = False
+    
+    # Chat message write-behind: queue messages and write them in batches after the response
+    message_write_behind: bool = False
+    message_flush_interval_seconds: float = 0.05
+    message_flush_batch_size: int = 100
+    
+    # Per-stage request tracing: spans are logged per request, optionally appended to a JSON-lines file
+    tracing_enabled: bool = True
+    tracing_server_timing: bool = False
+    tracing_span_file: str = ""
+    
+    # Process-local product catalog: loaded at startup, refreshed by polling updated_at, fully reloaded periodically
+    catalog_cache_enabled: bool = True
+    catalog_refresh_seconds: float = 5.0
+    catalog_full_reload_seconds: float = 600.0
+    
+    # Listing totals: filtered counts are cached briefly and dropped on writes; unfiltered totals use collection metadata
+    count_cache_ttl_seconds: float = 10.0
+    count_cache_max_entries: int = 512
+    
+    # Intent classifier (falls back to keyword rules without an artifact or below the confidence threshold)
+    intent_model_path: str = "models/intent_classifier.npz"
+    intent_min_confidence: float = 0.7
+    
+    # Template replies: intents answered without the LLM, per channel ("default" for unlisted channels, "*" for all)
+    template_replies: Dict[str, List[str]] = {"voice": ["*"]}
+    
     # POS System
     pos_api_url: str = ""
     pos_api_key: str = ""
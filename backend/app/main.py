@@ -1,8 +1,10 @@
 from fastapi import FastAPI, Request, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from datetime import datetime
+import json
 import logging
 import re
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -10,6 +12,12 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from app.config import get_settings
 from app.core.database import connect_db, close_db, get_database
+from app.services.http_clients import start_clients, close_clients
+from app.orchestrator.classifier import load_intent_classifier
+from app.services.summarizer import start_summarizer, stop_summarizer, schedule_summary
+from app.services.message_writer import start_message_writer, stop_message_writer, write_message
+from app.repositories.catalog_cache import start_catalog_cache, stop_catalog_cache, reload_product
+from app.repositories.count_cache import count_documents, count_cache_stats, invalidate_counts
 from app.core.gateway import MessageGateway, ChannelType
 from app.adapters.web import WebAdapter
 from app.adapters.whatsapp import WhatsAppAdapter
@@ -18,9 +26,13 @@ from app.models.schemas import ChatRequest, ChatResponse, ApiResponse
 from app.models.webhooks import WhatsAppWebhookPayload, SuperUWebhookPayload, ChatRequestValidated
 from app.middleware.auth import SecurityHeadersMiddleware, security, verify_api_key, verify_webhook_signature
 from app.middleware.request_id import RequestIdMiddleware
+from app.middleware.request_scope import RequestScopeMiddleware
+from app.middleware.tracing import TracingMiddleware
 from app.utils.serializers import serialize_doc, serialize_list
 from app.utils.response import api_success, api_error
 from app.utils.logging_context import RequestIdFilter
+from app.utils.request_loader import invalidate
+from app.utils.pagination import InvalidCursor, fetch_page
 from typing import Optional
 from pydantic import BaseModel, EmailStr, Field
 
@@ -54,9 +66,14 @@ async def lifespan(app: FastAPI):
     await db.sessions.create_index([("session_id", 1), ("user_id", 1)])
     await db.sessions.create_index([("user_id", 1), ("updated_at", -1)])
     await db.products.create_index([("name", "text"), ("category", 1)])
+    await db.products.create_index("product_id")
     await db.products.create_index("stock")
+    await db.products.create_index("updated_at")
+    await db.products.create_index([("name", 1), ("_id", 1)])
     await db.orders.create_index([("user_id", 1), ("created_at", -1)])
     await db.orders.create_index("order_id", unique=True)
+    await db.orders.create_index([("created_at", -1), ("_id", -1)])
+    await db.orders.create_index([("status", 1), ("created_at", -1), ("_id", -1)])
     await db.offers.create_index([("active", 1), ("tier_required", 1)])
     await db.carts.create_index([("owner_type", 1), ("owner_id", 1)], unique=True)
     await db.reviews.create_index([("product_id", 1), ("created_at", -1)])
@@ -64,6 +81,7 @@ async def lifespan(app: FastAPI):
     await db.refunds.create_index([("order_id", 1), ("created_at", -1)])
     await db.tickets.create_index([("order_id", 1), ("created_at", -1)])
     await db.proactive_calls.create_index([("user_id", 1), ("created_at", -1)])
+    await db.users.create_index([("created_at", -1), ("_id", -1)])
     logger.info("Database indexes created successfully")
     
     # Register channel adapters
@@ -71,7 +89,17 @@ async def lifespan(app: FastAPI):
     message_gateway.register_adapter(ChannelType.WHATSAPP, WhatsAppAdapter())
     message_gateway.register_adapter(ChannelType.VOICE, VoiceAdapter())
     
+    await start_clients()
+    load_intent_classifier()
+    await start_summarizer()
+    await start_message_writer()
+    await start_catalog_cache()
+    
     yield
+    await stop_catalog_cache()
+    await stop_message_writer()
+    await stop_summarizer()
+    await close_clients()
     await close_db()
 
 
@@ -122,7 +150,10 @@ app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # Add security headers middleware
 app.add_middleware(SecurityHeadersMiddleware)
+# Inside RequestIdMiddleware so traces carry the request ID
+app.add_middleware(TracingMiddleware)
 app.add_middleware(RequestIdMiddleware)
+app.add_middleware(RequestScopeMiddleware)
 
 
 @app.exception_handler(HTTPException)
@@ -174,6 +205,7 @@ async def root():
         "health": "/health",
         "endpoints": {
             "chat": "/chat",
+            "chat_stream": "/chat/stream",
             "webhooks": {
                 "whatsapp": "/webhook/whatsapp",
                 "voice": "/webhook/superu"
@@ -200,6 +232,26 @@ async def health_check():
     })
 
 
+@app.get("/internal/status", tags=["system"], response_model=ApiResponse)
+async def internal_status(credentials = Depends(security)):
+    """Internal runtime status (requires API key): LLM provider breakers, latency percentiles, cache counters, skipped LLM calls, agent timings and listing count cache"""
+    from app.services.llm_service import provider_status, cache_stats
+    from app.orchestrator.router import llm_skip_stats
+    from app.agents.registry import agent_stats
+
+    await verify_api_key(credentials, settings)
+
+    return api_success({
+        "llm": {
+            "providers": provider_status(),
+            "cache": cache_stats(),
+            "skipped": llm_skip_stats()
+        },
+        "agents": agent_stats(),
+        "counts": count_cache_stats()
+    })
+
+
 @app.post("/chat", response_model=ChatResponse, tags=["chat"])
 @limiter.limit("20/minute")
 async def chat(
@@ -237,8 +289,110 @@ async def chat(
     ```
     """
     from app.orchestrator.router import route_request
-    from app.repositories.session_repository import save_message
     
+    await _authorize_chat_request(request, chat_request, credentials)
+    
+    await write_message(chat_request.session_id, chat_request.user_id, "user", chat_request.message)
+    
+    result = await route_request(
+        user_id=chat_request.user_id,
+        session_id=chat_request.session_id,
+        message=chat_request.message,
+        channel=chat_request.channel
+    )
+    
+    await write_message(
+        chat_request.session_id,
+        chat_request.user_id,
+        "assistant",
+        result["reply"],
+        agent=result.get("agent_used"),
+        actions=result.get("actions")
+    )
+    schedule_summary(chat_request.session_id, chat_request.user_id)
+    
+    return ChatResponse(
+        reply=result["reply"],
+        agent_used=result["agent_used"],
+        actions=result.get("actions")
+    )
+
+
+@app.post("/chat/stream", tags=["chat"])
+@limiter.limit("20/minute")
+async def chat_stream(
+    request: Request,
+    chat_request: ChatRequestValidated,
+    credentials = Depends(security)
+):
+    """
+    Chat with AI assistant and receive the reply as Server-Sent Events
+    
+    Accepts the same body and authentication as `/chat`. Events are sent in order:
+    - `actions` - `{"agent_used": ..., "actions": [...]}` once the agent has run
+    - `token` - `{"text": ...}` for each chunk of the reply as the LLM produces it
+    - `done` - `{"reply": ..., "agent_used": ...}` with the full reply
+    
+    The full assistant reply is saved to the session once the stream ends.
+    """
+    from app.orchestrator.router import prepare_request, resolve_fixed_reply
+    from app.services.llm_service import stream_response
+    
+    await _authorize_chat_request(request, chat_request, credentials)
+    
+    await write_message(chat_request.session_id, chat_request.user_id, "user", chat_request.message)
+    
+    prepared = await prepare_request(
+        user_id=chat_request.user_id,
+        session_id=chat_request.session_id,
+        message=chat_request.message,
+        channel=chat_request.channel
+    )
+    intent = prepared["intent"]
+    actions = prepared["actions"] or None
+    
+    async def event_stream():
+        yield _sse_event("actions", {"agent_used": intent, "actions": actions})
+        
+        reply_parts = []
+        # Streamed tokens cannot be retracted, so a reply that is fixed up front is sent as-is
+        fixed_reply = resolve_fixed_reply(prepared)
+        if fixed_reply is not None:
+            reply_parts.append(fixed_reply)
+            yield _sse_event("token", {"text": fixed_reply})
+        else:
+            async for chunk in stream_response(prepared["prompt"]):
+                reply_parts.append(chunk)
+                yield _sse_event("token", {"text": chunk})
+        
+        reply = "".join(reply_parts) or "I'm sorry, I couldn't process your request."
+        await write_message(
+            chat_request.session_id,
+            chat_request.user_id,
+            "assistant",
+            reply,
+            agent=intent,
+            actions=actions
+        )
+        schedule_summary(chat_request.session_id, chat_request.user_id)
+        logger.info(
+            "Chat stream completed",
+            extra={"user_id": chat_request.user_id, "session_id": chat_request.session_id, "agent_used": intent}
+        )
+        yield _sse_event("done", {"reply": reply, "agent_used": intent})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _authorize_chat_request(request: Request, chat_request: ChatRequestValidated, credentials) -> None:
     if chat_request.channel != "web":
         # Verify API key for non-web channels
         await verify_api_key(credentials, settings)
@@ -263,29 +417,6 @@ async def chat(
         "Chat request",
         extra={"user_id": chat_request.user_id, "session_id": chat_request.session_id}
     )
-    
-    await save_message(chat_request.session_id, chat_request.user_id, "user", chat_request.message)
-    
-    result = await route_request(
-        user_id=chat_request.user_id,
-        session_id=chat_request.session_id,
-        message=chat_request.message
-    )
-    
-    await save_message(
-        chat_request.session_id,
-        chat_request.user_id,
-        "assistant",
-        result["reply"],
-        agent=result.get("agent_used"),
-        actions=result.get("actions")
-    )
-    
-    return ChatResponse(
-        reply=result["reply"],
-        agent_used=result["agent_used"],
-        actions=result.get("actions")
-    )
 
 
 def _get_session_id(request: Request) -> Optional[str]:
@@ -541,7 +672,6 @@ async def clear_cart_endpoint(request: Request, session_id: Optional[str] = None
 async def whatsapp_webhook(request: Request):
     """WhatsApp Business API webhook - receives messages from WhatsApp Business"""
     from app.orchestrator.router import route_request
-    from app.repositories.session_repository import save_message
     
     try:
         if settings.environment != "development":
@@ -559,17 +689,18 @@ async def whatsapp_webhook(request: Request):
         incoming = await message_gateway.receive_message(ChannelType.WHATSAPP, body)
 
         # Save user message
-        await save_message(incoming.session_id, incoming.user_id, "user", incoming.message)
+        await write_message(incoming.session_id, incoming.user_id, "user", incoming.message)
 
         # Route to orchestrator
         result = await route_request(
             user_id=incoming.user_id,
             session_id=incoming.session_id,
-            message=incoming.message
+            message=incoming.message,
+            channel=incoming.channel.value
         )
 
         # Save assistant reply
-        await save_message(
+        await write_message(
             incoming.session_id,
             incoming.user_id,
             "assistant",
@@ -577,6 +708,7 @@ async def whatsapp_webhook(request: Request):
             agent=result.get("agent_used"),
             actions=result.get("actions")
         )
+        schedule_summary(incoming.session_id, incoming.user_id)
 
         # Send response via WhatsApp
         from app.core.gateway import OutgoingMessage
@@ -620,7 +752,6 @@ async def whatsapp_webhook_verify(request: Request):
 async def superu_webhook(request: Request):
     """SuperU voice webhook - receives voice call events from SuperU API"""
     from app.orchestrator.router import route_request
-    from app.repositories.session_repository import save_message
     
     try:
         if settings.environment != "development":
@@ -642,17 +773,18 @@ async def superu_webhook(request: Request):
         incoming = await message_gateway.receive_message(ChannelType.VOICE, body)
 
         # Save user message
-        await save_message(incoming.session_id, incoming.user_id, "user", incoming.message)
+        await write_message(incoming.session_id, incoming.user_id, "user", incoming.message)
 
         # Route to orchestrator
         result = await route_request(
             user_id=incoming.user_id,
             session_id=incoming.session_id,
-            message=incoming.message
+            message=incoming.message,
+            channel=incoming.channel.value
         )
 
         # Save assistant reply
-        await save_message(
+        await write_message(
             incoming.session_id,
             incoming.user_id,
             "assistant",
@@ -660,6 +792,7 @@ async def superu_webhook(request: Request):
             agent=result.get("agent_used"),
             actions=result.get("actions")
         )
+        schedule_summary(incoming.session_id, incoming.user_id)
 
         # Send voice response
         from app.core.gateway import OutgoingMessage
@@ -691,7 +824,8 @@ async def get_products(
     sort_order: str = "asc",
     stock_filter: str = None,
     limit: int = 20,
-    skip: int = 0
+    skip: int = 0,
+    cursor: str = None
 ):
     """
     Get products list with optional filtering and sorting
@@ -703,8 +837,9 @@ async def get_products(
     - **stock_filter**: Filter by stock status (in_stock, low_stock, out_of_stock)
     - **limit**: Max products to return (default 20)
     - **skip**: Number of products to skip for pagination
+    - **cursor**: `next_cursor` from the previous page; replaces skip and omits the total count and facets
     """
-    from app.repositories.product_repository import find_products
+    from app.repositories.product_repository import STOCK_BANDS, list_products_with_facets
     
     query_filter = {}
 
@@ -716,40 +851,48 @@ async def get_products(
     limit = max(1, min(limit, 100))
     skip = max(0, skip)
     
-    if category and category != "all":
+    if category == "all":
+        category = None
+    if category:
         query_filter["category"] = category
     
-    if search:
-        cleaned_search = search.strip()
-        if cleaned_search:
-            query_filter["$text"] = {"$search": cleaned_search}
+    cleaned_search = search.strip() if search else ""
+    if cleaned_search:
+        query_filter["$text"] = {"$search": cleaned_search}
     
     # Stock filtering
-    if stock_filter == "out_of_stock":
-        query_filter["stock"] = {"$lte": 0}
-    elif stock_filter == "low_stock":
-        query_filter["stock"] = {"$gt": 0, "$lte": 10}
-    elif stock_filter == "in_stock":
-        query_filter["stock"] = {"$gt": 10}
-    
-    # Get total count
-    db = get_database()
-    total = await db.products.count_documents(query_filter)
+    if stock_filter not in STOCK_BANDS:
+        stock_filter = None
+    if stock_filter:
+        query_filter["stock"] = STOCK_BANDS[stock_filter]
     
     # Sort direction
     sort_direction = 1 if sort_order == "asc" else -1
     
-    # Get products with sorting
-    cursor = db.products.find(query_filter).sort(sort_by, sort_direction).skip(skip).limit(limit)
-    products = await cursor.to_list(length=limit)
+    if cursor:
+        db = get_database()
+        try:
+            products, next_cursor = await fetch_page(
+                db.products, query_filter, sort_by, sort_direction, limit, cursor=cursor
+            )
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return api_success({"products": serialize_list(products), "next_cursor": next_cursor})
     
-    products = serialize_list(products)
+    # Page, total and facet counts in one aggregation
+    listing = await list_products_with_facets(
+        cleaned_search or None, category, stock_filter, sort_by, sort_direction, skip, limit
+    )
+    total = listing["total"]
     
     return api_success({
-        "products": products,
+        "products": serialize_list(listing["products"]),
         "total": total,
+        "total_exact": True,
         "page": skip // limit + 1,
-        "pages": (total + limit - 1) // limit
+        "pages": (total + limit - 1) // limit,
+        "facets": listing["facets"],
+        "next_cursor": listing["next_cursor"]
     })
 
 
@@ -1003,8 +1146,9 @@ async def create_order(
         for item in order_items:
             result = await db.products.update_one(
                 {"product_id": item["product_id"], "stock": {"$gte": item["quantity"]}},
-                {"$inc": {"stock": -item["quantity"]}}
+                {"$inc": {"stock": -item["quantity"]}, "$set": {"updated_at": datetime.utcnow()}}
             )
+            invalidate("product", item["product_id"])
             if result.modified_count == 0:
                 raise HTTPException(status_code=409, detail="Stock changed before order completion")
             updated_items.append(item)
@@ -1012,12 +1156,14 @@ async def create_order(
         for item in updated_items:
             await db.products.update_one(
                 {"product_id": item["product_id"]},
-                {"$inc": {"stock": item["quantity"]}}
+                {"$inc": {"stock": item["quantity"]}, "$set": {"updated_at": datetime.utcnow()}}
             )
+            invalidate("product", item["product_id"])
         await db.orders.update_one(
             {"order_id": order["order_id"]},
             {"$set": {"status": "cancelled", "payment_status": "failed"}}
         )
+        invalidate_counts("orders")
         raise
     
     return api_success(serialize_doc(order))
@@ -1125,9 +1271,10 @@ async def get_all_orders_admin(
     limit: int = 50,
     status: str = None,
     sort_by: str = "created_at",
-    sort_order: str = "desc"
+    sort_order: str = "desc",
+    cursor: str = None
 ):
-    """Get all orders (admin only) with filtering and sorting"""
+    """Get all orders (admin only) with filtering and sorting; pass next_cursor back as cursor to page without skip"""
     from app.repositories.order_repository import get_all_orders
     
     auth_header = request.headers.get("Authorization")
@@ -1152,9 +1299,7 @@ async def get_all_orders_admin(
     limit = max(1, min(limit, 200))
     skip = max(0, skip)
     
-    # Get total count
     db = get_database()
-    total = await db.orders.count_documents(query_filter)
     
     # Sort direction
     sort_direction = 1 if sort_order == "asc" else -1
@@ -1168,10 +1313,25 @@ async def get_all_orders_admin(
         "created_at": 1,
         "updated_at": 1
     }
-    cursor = db.orders.find(query_filter, order_projection).sort(sort_by, sort_direction).skip(skip).limit(limit)
-    orders = await cursor.to_list(length=limit)
+    try:
+        orders, next_cursor = await fetch_page(
+            db.orders, query_filter, sort_by, sort_direction, limit,
+            skip=skip, cursor=cursor, projection=order_projection
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor:
+        return api_success({"orders": serialize_list(orders), "next_cursor": next_cursor})
+    
+    # Get total count (cached briefly; see total_exact)
+    total, total_exact = await count_documents(db.orders, query_filter)
     
-    return api_success({"orders": serialize_list(orders), "total": total})
+    return api_success({
+        "orders": serialize_list(orders),
+        "total": total,
+        "total_exact": total_exact,
+        "next_cursor": next_cursor
+    })
 
 
 class CreateProductRequest(BaseModel):
@@ -1196,10 +1356,12 @@ async def create_product_admin(request: Request, product_req: CreateProductReque
     db = get_database()
     product = {
         "product_id": str(uuid4()),
-        **product_req.dict()
+        **product_req.dict(),
+        "updated_at": datetime.utcnow()
     }
     result = await db.products.insert_one(product)
     product["_id"] = result.inserted_id
+    await reload_product(product["product_id"])
 
     return api_success(serialize_doc(product))
 
@@ -1218,6 +1380,8 @@ async def delete_product_admin(request: Request, product_id: str):
     _validate_id_format(product_id, "product_id")
     db = get_database()
     result = await db.products.delete_one({"product_id": product_id})
+    invalidate("product", product_id)
+    await reload_product(product_id)
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -1249,8 +1413,10 @@ async def update_product_admin(request: Request, product_id: str, update_req: Up
     
     result = await db.products.update_one(
         {"product_id": product_id},
-        {"$set": update_data}
+        {"$set": {**update_data, "updated_at": datetime.utcnow()}}
     )
+    invalidate("product", product_id)
+    await reload_product(product_id)
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -1265,9 +1431,10 @@ async def get_all_users_admin(
     limit: int = 100,
     role: str = None,
     sort_by: str = "created_at",
-    sort_order: str = "desc"
+    sort_order: str = "desc",
+    cursor: str = None
 ):
-    """Get all users (admin only) with filtering and sorting"""
+    """Get all users (admin only) with filtering and sorting; pass next_cursor back as cursor to page without skip"""
     from app.auth import get_user_by_id, get_all_users
     
     auth_header = request.headers.get("Authorization")
@@ -1290,9 +1457,7 @@ async def get_all_users_admin(
     limit = max(1, min(limit, 200))
     skip = max(0, skip)
     
-    # Get total count
     db = get_database()
-    total = await db.users.count_documents(query_filter)
     
     # Sort direction
     sort_direction = 1 if sort_order == "asc" else -1
@@ -1301,10 +1466,25 @@ async def get_all_users_admin(
     user_projection = {
         "password_hash": 0
     }
-    cursor = db.users.find(query_filter, user_projection).sort(sort_by, sort_direction).skip(skip).limit(limit)
-    users = await cursor.to_list(length=limit)
+    try:
+        users, next_cursor = await fetch_page(
+            db.users, query_filter, sort_by, sort_direction, limit,
+            skip=skip, cursor=cursor, projection=user_projection
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor:
+        return api_success({"users": serialize_list(users), "next_cursor": next_cursor})
+    
+    # Get total count (cached briefly; see total_exact)
+    total, total_exact = await count_documents(db.users, query_filter)
     
-    return api_success({"users": serialize_list(users), "total": total})
+    return api_success({
+        "users": serialize_list(users),
+        "total": total,
+        "total_exact": total_exact,
+        "next_cursor": next_cursor
+    })
 
 
 @app.get("/admin/users/{user_id}", tags=["admin"], response_model=ApiResponse)
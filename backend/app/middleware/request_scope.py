@@ -0,0 +1,19 @@
+from app.utils.request_loader import start_request_scope, end_request_scope
+
+
+class RequestScopeMiddleware:
+    """Give each HTTP request its own repository read cache (see app.utils.request_loader)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = start_request_scope()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_request_scope(token)
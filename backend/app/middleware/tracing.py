@@ -0,0 +1,33 @@
+from starlette.datastructures import MutableHeaders
+from app.config import get_settings
+from app.utils.tracing import start_trace, end_trace, current_trace, export_trace
+
+settings = get_settings()
+
+
+class TracingMiddleware:
+    """Collect per-stage timing spans for each request (see app.utils.tracing)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.tracing_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        token = start_trace(scope.get("request_id", "-"))
+        trace = current_trace()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.tracing_server_timing and trace.spans:
+                # Streaming responses only report the spans finished before the first byte
+                headers = MutableHeaders(scope=message)
+                headers["Server-Timing"] = trace.server_timing()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_trace(token)
+            export_trace(trace, settings.tracing_span_file)
@@ -0,0 +1,163 @@
+import logging
+import os
+import re
+import zlib
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from app.config import get_settings
+from app.orchestrator.intent import detect_intent
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+DEFAULT_FEATURES = 2 ** 18
+
+_WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def _ngrams(text: str) -> List[str]:
+    """Word unigrams and bigrams plus character trigrams of each word."""
+    words = _WORD_PATTERN.findall(text.lower())
+    grams = [f"w:{word}" for word in words]
+    grams += [f"b:{first} {second}" for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return grams
+
+
+def hashed_indices(text: str, n_features: int = DEFAULT_FEATURES) -> np.ndarray:
+    """Feature indices of a text's n-grams (crc32 hashing, repeats kept as counts)."""
+    return np.fromiter(
+        (zlib.crc32(gram.encode("utf-8")) % n_features for gram in _ngrams(text or "")),
+        dtype=np.int64,
+    )
+
+
+class IntentClassifier:
+    """
+    Multinomial naive Bayes over hashed n-gram counts.
+
+    feature_log_prob is stored feature-major (n_features, n_labels), so
+    scoring a message sums the rows of its own n-grams and costs well under
+    a millisecond regardless of the hash space size.
+    """
+
+    def __init__(self, labels: Sequence[str], feature_log_prob: np.ndarray, class_log_prior: np.ndarray):
+        self.labels = list(labels)
+        self.feature_log_prob = np.asarray(feature_log_prob, dtype=np.float32)
+        self.class_log_prior = np.asarray(class_log_prior, dtype=np.float32)
+        self.n_features = self.feature_log_prob.shape[0]
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        intents: Sequence[str],
+        n_features: int = DEFAULT_FEATURES,
+        alpha: float = 0.1,
+    ) -> "IntentClassifier":
+        labels = sorted(set(intents))
+        targets = np.array([labels.index(intent) for intent in intents])
+
+        counts = np.zeros((n_features, len(labels)), dtype=np.float64)
+        for text, target in zip(texts, targets):
+            np.add.at(counts[:, target], hashed_indices(text, n_features), 1.0)
+        smoothed = counts + alpha
+        feature_log_prob = np.log(smoothed / smoothed.sum(axis=0, keepdims=True))
+        class_log_prior = np.log(np.bincount(targets, minlength=len(labels)) / len(targets))
+        return cls(labels, feature_log_prob, class_log_prior)
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        scores = np.tile(self.class_log_prior, (len(texts), 1))
+        for row, text in enumerate(texts):
+            indices = hashed_indices(text, self.n_features)
+            if indices.size:
+                scores[row] += self.feature_log_prob[indices].sum(axis=0)
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def predict(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        probabilities = self.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        return [(self.labels[index], float(probabilities[row, index])) for row, index in enumerate(best)]
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as handle:
+            np.savez_compressed(
+                handle,
+                labels=np.array(self.labels),
+                feature_log_prob=self.feature_log_prob,
+                class_log_prior=self.class_log_prior,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "IntentClassifier":
+        with np.load(path, allow_pickle=False) as artifact:
+            return cls(
+                [str(label) for label in artifact["labels"]],
+                artifact["feature_log_prob"],
+                artifact["class_log_prior"],
+            )
+
+
+_model: Optional[IntentClassifier] = None
+_model_loaded = False
+
+
+def load_intent_classifier(path: Optional[str] = None) -> Optional[IntentClassifier]:
+    """
+    Load the classifier artifact once; without one, intents come from the keyword rules.
+    """
+    global _model, _model_loaded
+    path = path or settings.intent_model_path
+    _model_loaded = True
+    _model = None
+    if not path or not os.path.exists(path):
+        logger.info("No intent classifier artifact; using keyword rules", extra={"path": path})
+        return None
+    try:
+        _model = IntentClassifier.load(path)
+    except Exception as exc:
+        logger.error(f"Failed to load intent classifier from {path}: {exc}", exc_info=True)
+        return None
+    logger.info("Intent classifier loaded", extra={"path": path, "labels": _model.labels})
+    return _model
+
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    if not _model_loaded:
+        load_intent_classifier()
+    return _model
+
+
+def classify_many(
+    messages: Iterable[str],
+    fallback: Callable[[str], str] = detect_intent,
+) -> List[Tuple[str, float]]:
+    """
+    Classify messages as (intent, confidence) pairs.
+
+    Predictions below INTENT_MIN_CONFIDENCE, and all messages when no model
+    is loaded, use the keyword rules and report confidence 0.0.
+    """
+    messages = list(messages)
+    model = get_intent_classifier()
+    if model is None or not messages:
+        return [(fallback(message), 0.0) for message in messages]
+
+    results = []
+    for message, (intent, confidence) in zip(messages, model.predict([m or "" for m in messages])):
+        if not message or confidence < settings.intent_min_confidence:
+            results.append((fallback(message), 0.0))
+        else:
+            results.append((intent, confidence))
+    return results
+
+
+def classify_intent(message: str, fallback: Callable[[str], str] = detect_intent) -> Tuple[str, float]:
+    return classify_many([message], fallback)[0]
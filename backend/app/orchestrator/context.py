@@ -1,63 +1,85 @@
-from app.repositories.session_repository import get_last_messages, get_session, update_summary
+import asyncio
+from app.repositories.session_repository import MAX_MESSAGES, get_session
 from app.repositories.cart_repository import get_cart
 from app.repositories.user_repository import get_user
+from app.orchestrator.prompt_builder import (
+    PromptBuilder,
+    PRIORITY_POLICY,
+    PRIORITY_CURRENT,
+    PRIORITY_CART,
+    PRIORITY_PREFERENCES,
+    PRIORITY_RECENT,
+    PRIORITY_SUMMARY,
+)
+from app.services.llm_service import prompt_token_budget
+from app.services.message_writer import pending_messages
+from app.config import get_settings
 
+settings = get_settings()
 
-async def compress_session_history(messages: list) -> str:
-    """Compress older messages into summary"""
-    if len(messages) < 5:
-        return ""
-    
-    # Simple compression - join older messages
-    older_msgs = messages[:-5]
-    summary = "Previous conversation summary: "
-    summary += " ".join([f"{m['role']}: {m['text'][:50]}" for m in older_msgs])
-    return summary
+# Session fields read by build_context; the summary is kept current by app.services.summarizer
+CONTEXT_SESSION_PROJECTION = {"_id": 0, "last_messages": 1, "summary": 1}
 
 
-async def build_context(user_id: str, session_id: str, new_message: str) -> str:
-    last_messages = await get_last_messages(session_id, user_id)
-    session = await get_session(session_id, user_id)
-    
-    # Get or create session summary
-    summary = session.get("summary", "") if session else ""
-    
-    # If we have accumulated messages, compress them
-    all_messages = session.get("all_messages", []) if session else []
-    if len(all_messages) > 10 and not summary:
-        summary = await compress_session_history(all_messages)
-        await update_summary(session_id, user_id, summary)
+def section_budget(name: str):
+    return settings.prompt_section_budgets.get(name)
+
 
+async def build_context(user_id: str, session_id: str, new_message: str) -> PromptBuilder:
+    """
+    Collect the prompt sections for a chat turn.
+
+    Returns a PromptBuilder so the router can add the agent result before
+    rendering; sections are trimmed by priority to the model's token budget.
+    """
     owner_type = "user" if user_id and not user_id.startswith("guest_") else "guest"
     owner_id = user_id if owner_type == "user" else session_id
-    cart_items = await get_cart(owner_type, owner_id)
-    user = await get_user(user_id)
+    
+    # Independent reads, issued together: one session read, the cart and the user profile
+    session, cart_items, user = await asyncio.gather(
+        get_session(session_id, user_id, projection=CONTEXT_SESSION_PROJECTION),
+        get_cart(owner_type, owner_id),
+        get_user(user_id),
+    )
+    last_messages = session.get("last_messages", []) if session else []
+    # With write-behind on, this turn's messages may still be queued
+    queued = pending_messages(session_id, user_id)
+    if queued:
+        last_messages = (last_messages + queued)[-MAX_MESSAGES:]
+    summary = session.get("summary", "") if session else ""
     preferences = user.get("preferences", {}) if user else {}
     
-    parts = [
-        "You are an AI sales assistant for OmniSales.",
+    prompt = PromptBuilder(budget=prompt_token_budget())
+    prompt.add(
+        "policy",
+        "You are an AI sales assistant for OmniSales."
         "\n\n=== ACTION POLICY ===\n"
         "- Never confirm an action unless the backend explicitly verified it.\n"
         "- Use only provided database results for product, cart, and order details.\n"
         "- If verification is missing, say the action is pending confirmation.\n"
-        "- Do not invent stock, pricing, cart totals, or order status.\n"
-    ]
+        "- Do not invent stock, pricing, cart totals, or order status.\n",
+        PRIORITY_POLICY,
+    )
     
     if summary:
-        parts.append(f"\n\n=== SUMMARY ===\n{summary}")
+        prompt.add("summary", summary, PRIORITY_SUMMARY, header="\n\n=== SUMMARY ===\n",
+                   max_tokens=section_budget("summary"), keep="tail")
     
     if preferences:
         prefs = "\n".join([f"- {k}: {v}" for k, v in preferences.items()])
-        parts.append(f"\n\n=== PREFERENCES ===\n{prefs}")
+        prompt.add("preferences", prefs, PRIORITY_PREFERENCES, header="\n\n=== PREFERENCES ===\n",
+                   max_tokens=section_budget("preferences"))
     
     if cart_items:
         cart = "\n".join([f"- {i.get('name', 'Unknown')} x{i.get('quantity', 1)}" for i in cart_items])
-        parts.append(f"\n\n=== CART ===\n{cart}")
+        prompt.add("cart", cart, PRIORITY_CART, header="\n\n=== CART ===\n",
+                   max_tokens=section_budget("cart"))
     
     if last_messages:
         msgs = "\n".join([f"{m['role'].upper()}: {m['text']}" for m in last_messages])
-        parts.append(f"\n\n=== RECENT ===\n{msgs}")
+        prompt.add("recent", msgs, PRIORITY_RECENT, header="\n\n=== RECENT ===\n",
+                   max_tokens=section_budget("recent"), keep="tail")
     
-    parts.append(f"\n\n=== CURRENT ===\nUSER: {new_message}")
+    prompt.add("current", f"USER: {new_message}", PRIORITY_CURRENT, header="\n\n=== CURRENT ===\n")
     
-    return "".join(parts)
+    return prompt
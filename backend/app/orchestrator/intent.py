@@ -1,4 +1,10 @@
-from typing import Dict, List
+import re
+from typing import Dict, FrozenSet, Iterator, List, Set, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 INTENT_KEYWORDS: Dict[str, List[str]] = {
     "recommendation": ["suggest", "recommend", "best", "top", "popular", "help me find", "looking for", "show me"],
@@ -13,39 +19,170 @@ INTENT_KEYWORDS: Dict[str, List[str]] = {
 }
 
 
+LOYALTY_OFFER_TERMS = ["offer", "coupon", "deal"]
+CART_FOLLOW_UP_TERMS = ["too", "also", "another", "as well"]
+CART_NOUNS = ["cart", "basket"]
+CART_VERBS = ["add", "put", "remove", "delete", "clear", "empty"]
+
+
+def _trie_pattern(terms: List[str]) -> str:
+    """Regex source matching the longest of terms, factored into a prefix trie."""
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Optional groups are greedy, so the longest term at a position wins
+        return "(?:" + body + ")?" if "" in node else body
+
+    return build(trie)
+
+
+def _compile_matcher(terms: List[str]):
+    """
+    Build a single-pass matcher for every term detect_intent looks for.
+
+    Uses an Aho-Corasick automaton when pyahocorasick is installed, otherwise
+    one regex whose lookahead finds the longest term starting at each
+    position. Each term also maps to the terms contained in it (e.g.
+    "add this" implies "add" and "add "), so either way the scan yields
+    exactly the set of terms that occur anywhere in the message.
+    """
+    unique = sorted(set(terms))
+    implied = {term: frozenset(other for other in unique if other in term) for term in unique}
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for term in unique:
+            automaton.add_word(term, term)
+        automaton.make_automaton()
+        return automaton, implied
+    return re.compile("(?=(" + _trie_pattern(unique) + "))"), implied
+
+
+_TERMS = (
+    [kw for keywords in INTENT_KEYWORDS.values() for kw in keywords]
+    + LOYALTY_OFFER_TERMS + CART_FOLLOW_UP_TERMS + CART_NOUNS + CART_VERBS + ["i want", "add "]
+)
+_MATCHER, _IMPLIED = _compile_matcher(_TERMS)
+_INTENT_SETS: Dict[str, FrozenSet[str]] = {intent: frozenset(kws) for intent, kws in INTENT_KEYWORDS.items()}
+_OFFER_TERMS = frozenset(LOYALTY_OFFER_TERMS)
+
+
+def _matched_terms(message_lower: str) -> Iterator[str]:
+    if isinstance(_MATCHER, re.Pattern):
+        for match in _MATCHER.finditer(message_lower):
+            yield match.group(1)
+    else:
+        for _, term in _MATCHER.iter(message_lower):
+            yield term
+
+
+def _keyword_hits(message_lower: str) -> Set[str]:
+    """
+    Collect the terms present in the message in one scan.
+
+    Stops early once the result is settled: an offer term always wins, and
+    after a cart keyword only an offer term can still change the outcome.
+    """
+    hits: Set[str] = set()
+    for term in _matched_terms(message_lower):
+        found = _IMPLIED[term]
+        hits |= found
+        if found & _OFFER_TERMS:
+            break
+        if found & _INTENT_SETS["cart"]:
+            hits.update(offer for offer in LOYALTY_OFFER_TERMS if offer in message_lower)
+            break
+    return hits
+
+
 def detect_intent(message: str) -> str:
     if not message:
         return "general"
     
-    message_lower = message.lower()
+    hits = _keyword_hits(message.lower())
     
     # Priority checks - more specific intents first
     
     # Loyalty offers (check before recommendation)
-    if "offer" in message_lower or "coupon" in message_lower or "deal" in message_lower:
+    if hits.intersection(LOYALTY_OFFER_TERMS):
         return "loyalty"
     
     # Cart operations (must check before general keywords)
-    cart_keywords = INTENT_KEYWORDS["cart"]
-    if any(kw in message_lower for kw in cart_keywords):
+    if hits & _INTENT_SETS["cart"]:
         return "cart"
 
-    if "i want" in message_lower and any(term in message_lower for term in ["too", "also", "another", "as well"]):
+    if "i want" in hits and hits.intersection(CART_FOLLOW_UP_TERMS):
         return "cart"
 
-    if "add " in message_lower and any(term in message_lower for term in ["too", "also", "another", "as well"]):
+    if "add " in hits and hits.intersection(CART_FOLLOW_UP_TERMS):
         return "cart"
     
-    if any(term in message_lower for term in ["cart", "basket"]) and any(
-        verb in message_lower for verb in ["add", "put", "remove", "delete", "clear", "empty"]
-    ):
+    if hits.intersection(CART_NOUNS) and hits.intersection(CART_VERBS):
         return "cart"
     
     # Check other intents
-    for intent, keywords in INTENT_KEYWORDS.items():
+    for intent, keywords in _INTENT_SETS.items():
         if intent in ["cart", "loyalty"]:  # Skip cart and loyalty, we already handled them
             continue
-        if any(kw in message_lower for kw in keywords):
+        if hits & keywords:
             return intent
     
     return "general"
+
+
+# Clause boundaries for compound messages ("add the shoes to my cart and where is order 123?")
+_CLAUSE_SPLIT = re.compile(
+    r"\s*(?:(?:[.;?!]+(?=\s|$)|,|\band then\b|\band also\b|\band\b|\bthen\b|\balso\b)\s*)+", re.IGNORECASE
+)
+
+
+def detect_intents(message: str, max_intents: int = 3) -> List[Tuple[str, str]]:
+    """
+    Split a compound message into (intent, text) segments in message order.
+
+    A segment ends at the first clause boundary where its own text already
+    detects its intent and the next clause detects a specific intent not
+    seen yet; that clause starts the next segment. A boundary inside the
+    wording a segment's intent came from ("remove the black and white
+    sneakers from my cart") is never split. Returns [] for messages
+    without a specific intent.
+    """
+    if not message:
+        return []
+    boundaries = [boundary for boundary in _CLAUSE_SPLIT.finditer(message) if boundary.end() < len(message)]
+
+    def clause_intent(start: int, index: int) -> str:
+        end = boundaries[index].start() if index < len(boundaries) else len(message)
+        intent = detect_intent(message[start:end])
+        # "add black and white shoes": the clause's intent may only show further on
+        return intent if intent != "general" else detect_intent(message[start:])
+
+    current = clause_intent(0, 0)
+    if current == "general":
+        return []
+    segments: List[Tuple[str, str]] = []
+    seen: Set[str] = {current}
+    start = 0
+    for index, boundary in enumerate(boundaries):
+        if len(segments) + 1 >= max_intents:
+            break
+        if boundary.start() <= start:
+            continue
+        candidate = clause_intent(boundary.end(), index + 1)
+        if candidate == "general" or candidate in seen:
+            continue
+        if detect_intent(message[start:boundary.start()]) != current:
+            continue
+        segments.append((current, message[start:boundary.start()]))
+        current, start = candidate, boundary.end()
+        seen.add(current)
+    segments.append((current, message[start:]))
+    return segments
@@ -0,0 +1,144 @@
+import re
+from typing import List, Optional
+
+# Lower number = higher priority; kept in this order when the budget is tight
+PRIORITY_POLICY = 0
+PRIORITY_CURRENT = 1
+PRIORITY_AGENT_RESULT = 2
+PRIORITY_CART = 3
+PRIORITY_PREFERENCES = 4
+PRIORITY_RECENT = 5
+PRIORITY_SUMMARY = 6
+
+# Sections smaller than this after truncation are dropped instead
+MIN_SECTION_TOKENS = 16
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate LLM token count without a model-specific tokenizer.
+
+    Counts words and punctuation, but never less than one token per four
+    characters so long identifiers and URLs are not undercounted.
+    """
+    if not text:
+        return 0
+    return max(len(_TOKEN_PATTERN.findall(text)), (len(text) + 3) // 4)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep: str = "head") -> str:
+    """Cut text to max_tokens on line boundaries, keeping the head or the tail."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    lines = text.split("\n")
+    if keep == "tail":
+        lines.reverse()
+
+    kept = []
+    used = 0
+    for line in lines:
+        cost = count_tokens(line) + 1
+        if used + cost > max_tokens:
+            if not kept:
+                words = line.split(" ")
+                if keep == "tail":
+                    words.reverse()
+                partial = []
+                for word in words:
+                    if count_tokens(" ".join(partial + [word])) > max_tokens:
+                        break
+                    partial.append(word)
+                if keep == "tail":
+                    partial.reverse()
+                kept.append(" ".join(partial))
+            break
+        kept.append(line)
+        used += cost
+
+    if keep == "tail":
+        kept.reverse()
+    return "\n".join(kept)
+
+
+class PromptSection:
+    def __init__(
+        self,
+        name: str,
+        body: str,
+        priority: int,
+        header: str = "",
+        max_tokens: Optional[int] = None,
+        keep: str = "head",
+    ):
+        self.name = name
+        self.body = body
+        self.priority = priority
+        self.header = header
+        self.max_tokens = max_tokens
+        self.keep = keep
+
+
+class PromptBuilder:
+    """
+    Assemble a prompt from prioritized sections under a token budget.
+
+    Sections are rendered in the order they were added. Each section is first
+    capped to its own max_tokens; if the total still exceeds the budget,
+    sections are admitted from highest to lowest priority and the first one
+    that does not fit is truncated (keeping its head or tail) or dropped.
+    """
+
+    def __init__(self, budget: Optional[int] = None):
+        self.budget = budget
+        self.sections: List[PromptSection] = []
+
+    def add(
+        self,
+        name: str,
+        body: str,
+        priority: int,
+        header: str = "",
+        max_tokens: Optional[int] = None,
+        keep: str = "head",
+    ) -> "PromptBuilder":
+        if body:
+            self.sections.append(PromptSection(name, body, priority, header, max_tokens, keep))
+        return self
+
+    def section_names(self) -> List[str]:
+        return [section.name for section in self.sections]
+
+    def render(self) -> str:
+        bodies = {}
+        for index, section in enumerate(self.sections):
+            body = section.body
+            if section.max_tokens is not None:
+                body = truncate_to_tokens(body, section.max_tokens, section.keep)
+            bodies[index] = body
+
+        if self.budget is not None:
+            remaining = self.budget
+            by_priority = sorted(range(len(self.sections)), key=lambda i: self.sections[i].priority)
+            for index in by_priority:
+                section = self.sections[index]
+                cost = count_tokens(section.header) + count_tokens(bodies[index])
+                if cost <= remaining:
+                    remaining -= cost
+                    continue
+                room = remaining - count_tokens(section.header)
+                if room >= MIN_SECTION_TOKENS:
+                    bodies[index] = truncate_to_tokens(bodies[index], room, section.keep)
+                    remaining -= count_tokens(section.header) + count_tokens(bodies[index])
+                else:
+                    bodies[index] = ""
+
+        return "".join(
+            section.header + bodies[index]
+            for index, section in enumerate(self.sections)
+            if bodies[index]
+        )
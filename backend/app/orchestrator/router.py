@@ -1,6 +1,11 @@
-from typing import Dict, Any
-from app.orchestrator.intent import detect_intent
-from app.orchestrator.context import build_context
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+from app.config import get_settings
+from app.orchestrator.intent import detect_intent, detect_intents
+from app.orchestrator.classifier import classify_intent
+from app.orchestrator.context import build_context, section_budget
+from app.orchestrator.prompt_builder import PRIORITY_AGENT_RESULT, PRIORITY_CURRENT
+from app.orchestrator.templates import render_template_reply
 from app.services.llm_service import generate_response
 from app.agents.recommendation import recommend_products
 from app.agents.inventory import check_stock
@@ -10,13 +15,16 @@ from app.agents.loyalty import get_loyalty_points, check_offers, redeem_points
 from app.agents.post_purchase import initiate_return, request_refund, report_issue
 from app.agents.proactive_call import schedule_follow_up_call
 from app.agents.pos_adapter import get_pos_inventory
+from app.agents.registry import AgentResult, AgentSpec, get_agent, register_agent, run_agent
 from app.repositories.cart_repository import get_cart, set_cart, add_item, remove_item
 import logging
 from app.repositories.product_repository import find_products
+from app.utils.tracing import span
 from app.utils.parsers import extract_product_name, extract_order_id
 import re
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 def extract_category(message: str) -> str:
@@ -29,311 +37,543 @@ def extract_category(message: str) -> str:
     return None
 
 
-async def route_request(user_id: str, session_id: str, message: str) -> Dict[str, Any]:
-    intent = detect_intent(message)
-    logger.info("Routing request", extra={"intent": intent, "user_id": user_id, "session_id": session_id})
+PENDING_CONFIRMATION_REPLY = (
+    "I have received your request. The action is pending backend confirmation, "
+    "and I will update you once it succeeds."
+)
+
+
+# LLM calls avoided because the reply was determined before generation
+_llm_calls_skipped: Dict[str, int] = {"template": 0, "pending_confirmation": 0}
+
+
+def llm_skip_stats() -> Dict[str, int]:
+    return {**_llm_calls_skipped, "total": sum(_llm_calls_skipped.values())}
+
+
+def _action_verified(result: Dict[str, Any]) -> bool:
+    if not isinstance(result, dict):
+        return False
+    if "verified" in result:
+        return bool(result.get("verified"))
+    if "success" in result:
+        return bool(result.get("success"))
+    return False
+
+
+def _has_unverified_action(action_list: list) -> bool:
+    return bool(action_list) and any(action.get("verified") is False for action in action_list)
+
+
+def _sanitize_reply(reply: str, action_list: list) -> str:
+    if not reply or not action_list:
+        return reply
+    if not _has_unverified_action(action_list):
+        return reply
+    return PENDING_CONFIRMATION_REPLY
+
+
+def format_agent_result(agent_result: Any) -> str:
+    """Format an agent result as a prompt section based on its shape."""
+    text = ""
+    if isinstance(agent_result, list):
+        # Format product list nicely
+        if agent_result and isinstance(agent_result[0], dict) and "name" in agent_result[0]:
+            products_text = "\n".join([
+                f"- {p.get('name', 'Unknown')} (${p.get('price', 0):.2f}) - Stock: {p.get('stock', 'N/A')}"
+                for p in agent_result
+            ])
+            text += f"\n\n=== AVAILABLE PRODUCTS ===\n{products_text}\n\nDescribe these products to the customer naturally."
+        else:
+            text += f"\n\n=== AGENT RESULT ===\n{str(agent_result)}"
+    elif isinstance(agent_result, dict):
+        # Format dict results based on content
+        if "order_id" in agent_result and "status" in agent_result:
+            # Order/tracking result
+            text += f"\n\n=== ORDER INFORMATION ===\n"
+            text += f"Order ID: {agent_result.get('order_id', 'N/A')}\n"
+            text += f"Status: {agent_result.get('status', 'unknown')}\n"
+            if agent_result.get('total_price'):
+                text += f"Total: ${agent_result.get('total_price', 0):.2f}\n"
+            if agent_result.get('eta'):
+                text += f"ETA: {agent_result.get('eta', 'N/A')}\n"
+            text += "\nExplain this order status to the customer in a friendly way."
+        
+        elif "points" in agent_result or "tier" in agent_result:
+            # Loyalty result
+            text += f"\n\n=== LOYALTY INFORMATION ===\n"
+            text += f"Points Balance: {agent_result.get('points', 0)}\n"
+            text += f"Tier: {agent_result.get('tier', 'bronze').title()}\n"
+            if agent_result.get('lifetime_value'):
+                text += f"Lifetime Value: ${agent_result.get('lifetime_value', 0):.2f}\n"
+            text += "\nShare this loyalty information with the customer positively."
+        
+        elif "success" in agent_result:
+            # Action result (payment, return, refund, etc.)
+            if agent_result.get('success') and _action_verified(agent_result):
+                text += f"\n\n=== ACTION COMPLETED ===\n"
+                for key, value in agent_result.items():
+                    if key not in ['success', 'verified']:
+                        text += f"{key.replace('_', ' ').title()}: {value}\n"
+                text += "\nConfirm this action to the customer positively."
+            elif agent_result.get('success') and not _action_verified(agent_result):
+                text += f"\n\n=== ACTION PENDING CONFIRMATION ===\n"
+                for key, value in agent_result.items():
+                    if key not in ['success', 'verified']:
+                        text += f"{key.replace('_', ' ').title()}: {value}\n"
+                text += "\nDo NOT confirm completion. Ask the user to verify in the app."
+            else:
+                text += f"\n\n=== ACTION FAILED ===\n"
+                text += f"Error: {agent_result.get('error', 'Unknown error')}\n"
+                text += "\nPolitely explain why this action failed and suggest alternatives."
+        
+        else:
+            # Generic dict result
+            text += f"\n\n=== AGENT RESULT ===\n{str(agent_result)}"
+    else:
+        text += f"\n\n=== AGENT RESULT ===\n{str(agent_result)}"
+    return text
+
+
+# Intents whose agents write data that build_context reads (the cart), so context is built afterwards
+CONTEXT_AFTER_AGENT_INTENTS = {"cart"}
+
+
+def _discard_task(task: Optional[asyncio.Task]) -> None:
+    if task is None:
+        return
+    if task.done():
+        if not task.cancelled():
+            task.exception()  # mark as retrieved
+        return
+    task.cancel()
+
+
+def resolve_fixed_reply(prepared: Dict[str, Any]) -> Optional[str]:
+    """
+    Return the reply for a prepared turn when it is already determined
+    without the LLM, otherwise None.
+    """
+    if prepared.get("reply") is not None:
+        return prepared["reply"]
+    if _has_unverified_action(prepared.get("actions")):
+        return PENDING_CONFIRMATION_REPLY
+    return None
+
+
+async def prepare_request(user_id: str, session_id: str, message: str, channel: str = "web") -> Dict[str, Any]:
+    """
+    Run intent detection, the selected agent and context building.
+
+    Returns the LLM prompt without calling the LLM so callers can either
+    generate the reply in one go or stream it. When the turn is answered
+    without the LLM (fixed or template reply), "reply" is set and "prompt"
+    is None.
+    """
+    with span("detect_intent"):
+        intent, confidence = classify_intent(message, fallback=detect_intent)
+    logger.info(
+        "Routing request",
+        extra={"intent": intent, "confidence": confidence, "user_id": user_id, "session_id": session_id}
+    )
     
-    agent_result = None
-    actions = []
     message_lower = message.lower() if message else ""
 
     if intent == "general" and any(term in message_lower for term in ["confirm", "revert", "adjustment", "approve"]):
         return {
+            "intent": "general",
+            "intents": ["general"],
+            "actions": [],
+            "prompt": None,
             "reply": (
                 "I cannot confirm or revert changes until the backend verifies the action. "
                 "Please specify the exact cart change you want me to perform."
             ),
-            "agent_used": "general",
-            "actions": None
         }
 
-    def _action_verified(result: Dict[str, Any]) -> bool:
-        if not isinstance(result, dict):
-            return False
-        if "verified" in result:
-            return bool(result.get("verified"))
-        if "success" in result:
-            return bool(result.get("success"))
-        return False
+    plan = _plan_agents(intent, message)
+    intents = [planned for planned, _ in plan]
 
-    def _sanitize_reply(reply: str, action_list: list) -> str:
-        if not reply or not action_list:
-            return reply
-        if all(action.get("verified") is not False for action in action_list):
-            return reply
-        return (
-            "I have received your request. The action is pending backend confirmation, "
-            "and I will update you once it succeeds."
+    # Context reads don't depend on the agents, so overlap them unless an agent changes what they read
+    context_task = None
+    if not CONTEXT_AFTER_AGENT_INTENTS.intersection(intents):
+        context_task = asyncio.create_task(_build_context_traced(user_id, session_id, message))
+    try:
+        outcomes = await asyncio.gather(*(
+            run_agent(planned, user_id, session_id, text) for planned, text in plan
+        ))
+    except BaseException:
+        _discard_task(context_task)
+        raise
+    
+    # Merge in plan order so the primary intent's actions come first
+    actions = [action for _, agent_actions in outcomes for action in agent_actions]
+    agent_results = [(planned, result) for planned, (result, _) in zip(intents, outcomes) if result]
+    
+    template_reply = None
+    spec = get_agent(intent)
+    if len(plan) == 1 and spec is not None and not spec.needs_llm:
+        template_reply = render_template_reply(intent, actions, channel)
+    if template_reply is not None:
+        _discard_task(context_task)
+        _llm_calls_skipped["template"] += 1
+        logger.info("Template reply", extra={"intent": intent, "channel": channel, "session_id": session_id})
+        return {"intent": intent, "intents": intents, "actions": actions, "prompt": None, "reply": template_reply}
+    
+    # _sanitize_reply would replace any LLM output with the pending text, so don't generate one
+    if _has_unverified_action(actions):
+        _discard_task(context_task)
+        _llm_calls_skipped["pending_confirmation"] += 1
+        return {"intent": intent, "intents": intents, "actions": actions, "prompt": None, "reply": PENDING_CONFIRMATION_REPLY}
+    
+    if context_task is not None:
+        context = await context_task
+    else:
+        context = await _build_context_traced(user_id, session_id, message)
+    
+    # Format agent results for AI context based on type
+    result_budget = section_budget("agent_result")
+    if result_budget and agent_results:
+        result_budget //= len(agent_results)
+    for planned, agent_result in agent_results:
+        context.add(
+            "agent_result" if len(agent_results) == 1 else f"agent_result:{planned}",
+            format_agent_result(agent_result),
+            PRIORITY_AGENT_RESULT,
+            max_tokens=result_budget,
         )
+    if len(plan) > 1:
+        context.add(
+            "requests",
+            f"The customer asked about several things ({', '.join(intents)}). Answer each of them in one reply.",
+            PRIORITY_CURRENT,
+            header="\n\n=== MULTIPLE REQUESTS ===\n",
+        )
+    
+    return {"intent": intent, "intents": intents, "actions": actions, "prompt": context.render(), "reply": None}
+
+
+async def _build_context_traced(user_id: str, session_id: str, message: str):
+    with span("build_context"):
+        return await build_context(user_id, session_id, message)
+
 
+def _plan_agents(intent: str, message: str) -> List[Tuple[str, str]]:
+    """
+    Pick the agents for a message as (intent, text) pairs, primary intent first.
+
+    Single-intent messages run one agent on the whole message. Compound
+    messages run one agent per detected segment, up to MULTI_INTENT_MAX
+    agents. Segments never cut through the words an intent was detected
+    from, so the primary agent always sees its whole request. If the
+    primary intent has no segment of its own, its agent gets the whole
+    message and nothing is split off.
+    """
+    if settings.multi_intent_max <= 1:
+        return [(intent, message)]
+    segments = detect_intents(message, settings.multi_intent_max)
+    primary = [text for segment_intent, text in segments if segment_intent == intent]
+    if len(segments) <= 1 or not primary:
+        return [(intent, message)]
+    return [(intent, primary[0])] + [segment for segment in segments if segment[0] != intent]
+
+
+def _owner(user_id: str, session_id: str) -> Tuple[str, str]:
     owner_type = "user" if user_id and not user_id.startswith("guest_") else "guest"
-    owner_id = user_id if owner_type == "user" else session_id
+    return owner_type, user_id if owner_type == "user" else session_id
+
+
+def _product_summaries(products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "product_id": p.get("product_id"),
+            "name": p.get("name"),
+            "price": p.get("price"),
+            "category": p.get("category"),
+            "stock": p.get("stock", 0),
+            "image": p.get("image"),
+            "description": p.get("description"),
+            "rating": p.get("rating"),
+        }
+        for p in products
+    ]
+
+
+async def _suggestions(product_name: str) -> List[str]:
+    """Names of close matches for a product that was not found, for the reply to offer (never acted on)."""
+    from app.repositories.product_repository import search_products
+    return [product.get("name") for product in await search_products(product_name, limit=3)]
+
+
+async def _recommendation_agent(user_id: str, session_id: str, message: str) -> AgentResult:
+    actions = []
+    agent_result = await recommend_products(user_id, message)
+    if agent_result:
+        actions.append({"type": "show_products", "data": agent_result, "verified": True})
+    return agent_result, actions
+
+
+async def _inventory_agent(user_id: str, session_id: str, message: str) -> AgentResult:
+    agent_result = None
+    actions = []
+    category = extract_category(message)
+    product_name = extract_product_name(message)
     
-    if intent == "recommendation":
-        agent_result = await recommend_products(user_id, message)
+    if category:
+        # Category query - list products in that category
+        products = await find_products({"category": category}, limit=10)
+        if products:
+            agent_result = _product_summaries(products)
+            actions.append({"type": "show_products", "data": agent_result, "verified": True})
+    elif product_name:
+        # Specific product query
+        agent_result = await check_stock(product_name)
         if agent_result:
+            actions.append({"type": "show_stock", "data": agent_result, "verified": True})
+        else:
+            agent_result = {"error": "Product not found", "suggestions": await _suggestions(product_name)}
+    else:
+        # General inventory query - show some products
+        products = await find_products({}, limit=10)
+        if products:
+            agent_result = _product_summaries(products)
             actions.append({"type": "show_products", "data": agent_result, "verified": True})
-    
-    elif intent == "inventory":
-        category = extract_category(message)
+    return agent_result, actions
+
+
+async def _cart_agent(user_id: str, session_id: str, message: str) -> AgentResult:
+    agent_result = None
+    actions = []
+    message_lower = message.lower() if message else ""
+    owner_type, owner_id = _owner(user_id, session_id)
+    if "view" in message_lower or "show" in message_lower or "my cart" in message_lower:
+        # View cart
+        cart_items = await get_cart(owner_type, owner_id)
+        if cart_items:
+            agent_result = {
+                "items": cart_items,
+                "total": sum(item.get("price", 0) * item.get("quantity", 1) for item in cart_items)
+            }
+            actions.append({"type": "show_cart", "data": agent_result, "verified": True})
+        else:
+            agent_result = {"items": [], "total": 0}
+            actions.append({"type": "show_cart", "data": agent_result, "verified": True})
+
+    elif "remove" in message_lower or "delete" in message_lower:
+        # Remove item from cart (simplified - removes all instances)
         product_name = extract_product_name(message)
-        
-        if category:
-            # Category query - list products in that category
-            products = await find_products({"category": category}, limit=10)
-            if products:
-                agent_result = [
-                    {
-                        "product_id": p.get("product_id"),
-                        "name": p.get("name"),
-                        "price": p.get("price"),
-                        "category": p.get("category"),
-                        "stock": p.get("stock", 0),
-                        "image": p.get("image"),
-                        "description": p.get("description"),
-                        "rating": p.get("rating"),
-                    }
-                    for p in products
-                ]
-                actions.append({"type": "show_products", "data": agent_result, "verified": True})
-        elif product_name:
-            # Specific product query
-            agent_result = await check_stock(product_name)
-            if agent_result:
-                actions.append({"type": "show_stock", "data": agent_result, "verified": True})
+        if not product_name:
+            agent_result = {"success": False, "error": "Product name not found", "verified": False}
         else:
-            # General inventory query - show some products
-            products = await find_products({}, limit=10)
-            if products:
-                agent_result = [
-                    {
-                        "product_id": p.get("product_id"),
-                        "name": p.get("name"),
-                        "price": p.get("price"),
-                        "category": p.get("category"),
-                        "stock": p.get("stock", 0),
-                        "image": p.get("image"),
-                        "description": p.get("description"),
-                        "rating": p.get("rating"),
-                    }
-                    for p in products
-                ]
-                actions.append({"type": "show_products", "data": agent_result, "verified": True})
-    
-    elif intent == "cart":
-        # Cart management
-        if "view" in message_lower or "show" in message_lower or "my cart" in message_lower:
-            # View cart
             cart_items = await get_cart(owner_type, owner_id)
-            if cart_items:
-                agent_result = {
-                    "items": cart_items,
-                    "total": sum(item.get("price", 0) * item.get("quantity", 1) for item in cart_items)
-                }
-                actions.append({"type": "show_cart", "data": agent_result, "verified": True})
+            target_item = next(
+                (item for item in cart_items if product_name.lower() in item.get("name", "").lower()),
+                None
+            )
+            if not target_item:
+                agent_result = {"success": False, "error": "Item not found in cart", "verified": False}
             else:
-                agent_result = {"items": [], "total": 0}
-                actions.append({"type": "show_cart", "data": agent_result, "verified": True})
-        
-        elif "remove" in message_lower or "delete" in message_lower:
-            # Remove item from cart (simplified - removes all instances)
-            product_name = extract_product_name(message)
-            if not product_name:
-                agent_result = {"success": False, "error": "Product name not found", "verified": False}
-            else:
-                cart_items = await get_cart(owner_type, owner_id)
-                target_item = next(
-                    (item for item in cart_items if product_name.lower() in item.get("name", "").lower()),
-                    None
+                await remove_item(owner_type, owner_id, target_item.get("product_id"))
+                updated_cart = await get_cart(owner_type, owner_id)
+                removed = not any(
+                    item.get("product_id") == target_item.get("product_id")
+                    for item in updated_cart
                 )
-                if not target_item:
-                    agent_result = {"success": False, "error": "Item not found in cart", "verified": False}
-                else:
-                    await remove_item(owner_type, owner_id, target_item.get("product_id"))
-                    updated_cart = await get_cart(owner_type, owner_id)
-                    removed = not any(
-                        item.get("product_id") == target_item.get("product_id")
-                        for item in updated_cart
-                    )
-                    agent_result = {
-                        "success": removed,
-                        "action": "removed" if removed else "remove_failed",
-                        "cart_size": len(updated_cart),
-                        "verified": removed
-                    }
-                actions.append({"type": "cart_updated", "data": agent_result, "verified": _action_verified(agent_result)})
-        
-        elif "clear" in message_lower or "empty" in message_lower:
-            # Clear entire cart
-            await set_cart(owner_type, owner_id, [])
-            updated_cart = await get_cart(owner_type, owner_id)
-            cleared = len(updated_cart) == 0
-            agent_result = {
-                "success": cleared,
-                "action": "cleared" if cleared else "clear_failed",
-                "cart_size": len(updated_cart),
-                "total": 0,
-                "verified": cleared
-            }
+                agent_result = {
+                    "success": removed,
+                    "action": "removed" if removed else "remove_failed",
+                    "cart_size": len(updated_cart),
+                    "verified": removed
+                }
             actions.append({"type": "cart_updated", "data": agent_result, "verified": _action_verified(agent_result)})
-        
-        else:
-            # Add to cart
-            product_name = extract_product_name(message)
-            if product_name:
-                from app.repositories.product_repository import find_product_by_name
-                product = await find_product_by_name(product_name)
-                logger.info("Cart product lookup", extra={"product_name": product_name, "found": bool(product)})
-                if product:
-                    stock = int(product.get("stock", 0))
-                    if stock <= 0:
-                        agent_result = {"success": False, "error": "Product is out of stock", "verified": False}
-                        actions.append({"type": "cart_updated", "data": agent_result, "verified": _action_verified(agent_result)})
-                        product = None
-                if product:
-                    cart_items = await add_item(
-                        owner_type,
-                        owner_id,
-                        {
-                            "product_id": product.get("product_id"),
-                            "name": product.get("name"),
-                            "price": product.get("price"),
-                            "quantity": 1,
-                        },
-                    )
-                    verified_add = any(
-                        item.get("product_id") == product.get("product_id") for item in cart_items
-                    )
-                    agent_result = {
-                        "success": verified_add,
-                        "product": product.get("name"),
-                        "cart_size": len(cart_items),
-                        "total": sum(item.get("price", 0) * item.get("quantity", 1) for item in cart_items),
-                        "verified": verified_add
-                    }
+
+    elif "clear" in message_lower or "empty" in message_lower:
+        # Clear entire cart
+        await set_cart(owner_type, owner_id, [])
+        updated_cart = await get_cart(owner_type, owner_id)
+        cleared = len(updated_cart) == 0
+        agent_result = {
+            "success": cleared,
+            "action": "cleared" if cleared else "clear_failed",
+            "cart_size": len(updated_cart),
+            "total": 0,
+            "verified": cleared
+        }
+        actions.append({"type": "cart_updated", "data": agent_result, "verified": _action_verified(agent_result)})
+
+    else:
+        # Add to cart
+        product_name = extract_product_name(message)
+        if product_name:
+            from app.repositories.product_repository import find_product_by_name
+            product = await find_product_by_name(product_name)
+            logger.info("Cart product lookup", extra={"product_name": product_name, "found": bool(product)})
+            if product:
+                stock = int(product.get("stock", 0))
+                if stock <= 0:
+                    agent_result = {"success": False, "error": "Product is out of stock", "verified": False}
                     actions.append({"type": "cart_updated", "data": agent_result, "verified": _action_verified(agent_result)})
-                elif agent_result is None:
-                    agent_result = {"success": False, "error": "Product not found", "verified": False}
-    
-    elif intent == "payment":
-        cart_items = await get_cart(owner_type, owner_id)
-        if cart_items:
-            agent_result = await process_payment(user_id, cart_items)
-            if agent_result:
-                actions.append({"type": "order_created", "data": agent_result, "verified": _action_verified(agent_result)})
-    
-    elif intent == "tracking":
-        order_id = extract_order_id(message)
-        if order_id:
-            agent_result = await track_order(order_id)
-            if agent_result:
-                actions.append({"type": "order_status", "data": agent_result, "verified": True})
-    
-    elif intent == "loyalty":
-        if "points" in message_lower or "balance" in message_lower:
+                    product = None
+            if product:
+                cart_items = await add_item(
+                    owner_type,
+                    owner_id,
+                    {
+                        "product_id": product.get("product_id"),
+                        "name": product.get("name"),
+                        "price": product.get("price"),
+                        "quantity": 1,
+                    },
+                )
+                verified_add = any(
+                    item.get("product_id") == product.get("product_id") for item in cart_items
+                )
+                agent_result = {
+                    "success": verified_add,
+                    "product": product.get("name"),
+                    "cart_size": len(cart_items),
+                    "total": sum(item.get("price", 0) * item.get("quantity", 1) for item in cart_items),
+                    "verified": verified_add
+                }
+                actions.append({"type": "cart_updated", "data": agent_result, "verified": _action_verified(agent_result)})
+            elif agent_result is None:
+                agent_result = {
+                    "success": False,
+                    "error": "Product not found",
+                    "suggestions": await _suggestions(product_name),
+                    "verified": False
+                }
+    return agent_result, actions
+
+
+async def _payment_agent(user_id: str, session_id: str, message: str) -> AgentResult:
+    agent_result = None
+    actions = []
+    cart_items = await get_cart(*_owner(user_id, session_id))
+    if cart_items:
+        agent_result = await process_payment(user_id, cart_items)
+        if agent_result:
+            actions.append({"type": "order_created", "data": agent_result, "verified": _action_verified(agent_result)})
+    return agent_result, actions
+
+
+async def _tracking_agent(user_id: str, session_id: str, message: str) -> AgentResult:
+    agent_result = None
+    actions = []
+    order_id = extract_order_id(message)
+    if order_id:
+        agent_result = await track_order(order_id)
+        if agent_result:
+            actions.append({"type": "order_status", "data": agent_result, "verified": True})
+    return agent_result, actions
+
+
+async def _loyalty_agent(user_id: str, session_id: str, message: str) -> AgentResult:
+    agent_result = None
+    actions = []
+    message_lower = message.lower() if message else ""
+    if "points" in message_lower or "balance" in message_lower:
+        agent_result = await get_loyalty_points(user_id)
+    elif "offer" in message_lower or "deal" in message_lower:
+        agent_result = await check_offers(user_id)
+    elif "redeem" in message_lower:
+        # Simple parsing - in production use NER
+        try:
+            points_to_redeem = int(''.join(filter(str.isdigit, message)))
+            agent_result = await redeem_points(user_id, points_to_redeem)
+        except:
             agent_result = await get_loyalty_points(user_id)
-        elif "offer" in message_lower or "deal" in message_lower:
-            agent_result = await check_offers(user_id)
-        elif "redeem" in message_lower:
-            # Simple parsing - in production use NER
-            try:
-                points_to_redeem = int(''.join(filter(str.isdigit, message)))
-                agent_result = await redeem_points(user_id, points_to_redeem)
-            except:
-                agent_result = await get_loyalty_points(user_id)
+    
+    if agent_result:
+        actions.append({"type": "loyalty_info", "data": agent_result, "verified": True})
+    return agent_result, actions
+
+
+async def _post_purchase_agent(user_id: str, session_id: str, message: str) -> AgentResult:
+    agent_result = None
+    actions = []
+    message_lower = message.lower() if message else ""
+    order_id = extract_order_id(message)
+    if order_id:
+        if "return" in message_lower:
+            agent_result = await initiate_return(order_id, message)
+        elif "refund" in message_lower:
+            agent_result = await request_refund(order_id)
+        elif "issue" in message_lower or "problem" in message_lower:
+            agent_result = await report_issue(order_id, "general", message)
         
         if agent_result:
-            actions.append({"type": "loyalty_info", "data": agent_result, "verified": True})
-    
-    elif intent == "post_purchase":
-        order_id = extract_order_id(message)
-        if order_id:
-            if "return" in message_lower:
-                agent_result = await initiate_return(order_id, message)
-            elif "refund" in message_lower:
-                agent_result = await request_refund(order_id)
-            elif "issue" in message_lower or "problem" in message_lower:
-                agent_result = await report_issue(order_id, "general", message)
-            
-            if agent_result:
-                actions.append({"type": "support_ticket", "data": agent_result, "verified": _action_verified(agent_result)})
-    
-    elif intent == "proactive":
-        if "call me" in message_lower:
-            agent_result = await schedule_follow_up_call(user_id, message)
-            if agent_result:
-                actions.append({"type": "call_scheduled", "data": agent_result, "verified": _action_verified(agent_result)})
-    
-    elif intent == "pos_sync":
-        product_name = extract_product_name(message)
-        if "inventory" in message_lower or "stock" in message_lower:
-            agent_result = await get_pos_inventory()
+            actions.append({"type": "support_ticket", "data": agent_result, "verified": _action_verified(agent_result)})
+    return agent_result, actions
+
+
+async def _proactive_agent(user_id: str, session_id: str, message: str) -> AgentResult:
+    agent_result = None
+    actions = []
+    if "call me" in (message.lower() if message else ""):
+        agent_result = await schedule_follow_up_call(user_id, message)
         if agent_result:
-            actions.append({"type": "pos_sync", "data": agent_result, "verified": _action_verified(agent_result)})
-    
-    context = await build_context(user_id, session_id, message)
-    
-    # Format agent results for AI context based on type
+            actions.append({"type": "call_scheduled", "data": agent_result, "verified": _action_verified(agent_result)})
+    return agent_result, actions
+
+
+async def _pos_sync_agent(user_id: str, session_id: str, message: str) -> AgentResult:
+    agent_result = None
+    actions = []
+    message_lower = message.lower() if message else ""
+    if "inventory" in message_lower or "stock" in message_lower:
+        agent_result = await get_pos_inventory()
+        product_name = extract_product_name(message)
+        if agent_result and agent_result.get("success") and product_name:
+            # Name the catalog product being asked about so the reply can focus on it
+            from app.repositories.product_repository import find_product_by_name
+            product = await find_product_by_name(product_name)
+            if product:
+                agent_result["product"] = {"product_id": product.get("product_id"), "name": product.get("name")}
     if agent_result:
-        if isinstance(agent_result, list):
-            # Format product list nicely
-            if agent_result and isinstance(agent_result[0], dict) and "name" in agent_result[0]:
-                products_text = "\n".join([
-                    f"- {p.get('name', 'Unknown')} (${p.get('price', 0):.2f}) - Stock: {p.get('stock', 'N/A')}"
-                    for p in agent_result
-                ])
-                context += f"\n\n=== AVAILABLE PRODUCTS ===\n{products_text}\n\nDescribe these products to the customer naturally."
-            else:
-                context += f"\n\n=== AGENT RESULT ===\n{str(agent_result)}"
-        elif isinstance(agent_result, dict):
-            # Format dict results based on content
-            if "order_id" in agent_result and "status" in agent_result:
-                # Order/tracking result
-                context += f"\n\n=== ORDER INFORMATION ===\n"
-                context += f"Order ID: {agent_result.get('order_id', 'N/A')}\n"
-                context += f"Status: {agent_result.get('status', 'unknown')}\n"
-                if agent_result.get('total_price'):
-                    context += f"Total: ${agent_result.get('total_price', 0):.2f}\n"
-                if agent_result.get('eta'):
-                    context += f"ETA: {agent_result.get('eta', 'N/A')}\n"
-                context += "\nExplain this order status to the customer in a friendly way."
-            
-            elif "points" in agent_result or "tier" in agent_result:
-                # Loyalty result
-                context += f"\n\n=== LOYALTY INFORMATION ===\n"
-                context += f"Points Balance: {agent_result.get('points', 0)}\n"
-                context += f"Tier: {agent_result.get('tier', 'bronze').title()}\n"
-                if agent_result.get('lifetime_value'):
-                    context += f"Lifetime Value: ${agent_result.get('lifetime_value', 0):.2f}\n"
-                context += "\nShare this loyalty information with the customer positively."
-            
-            elif "success" in agent_result:
-                # Action result (payment, return, refund, etc.)
-                if agent_result.get('success') and _action_verified(agent_result):
-                    context += f"\n\n=== ACTION COMPLETED ===\n"
-                    for key, value in agent_result.items():
-                        if key not in ['success', 'verified']:
-                            context += f"{key.replace('_', ' ').title()}: {value}\n"
-                    context += "\nConfirm this action to the customer positively."
-                elif agent_result.get('success') and not _action_verified(agent_result):
-                    context += f"\n\n=== ACTION PENDING CONFIRMATION ===\n"
-                    for key, value in agent_result.items():
-                        if key not in ['success', 'verified']:
-                            context += f"{key.replace('_', ' ').title()}: {value}\n"
-                    context += "\nDo NOT confirm completion. Ask the user to verify in the app."
-                else:
-                    context += f"\n\n=== ACTION FAILED ===\n"
-                    context += f"Error: {agent_result.get('error', 'Unknown error')}\n"
-                    context += "\nPolitely explain why this action failed and suggest alternatives."
-            
-            else:
-                # Generic dict result
-                context += f"\n\n=== AGENT RESULT ===\n{str(agent_result)}"
-        else:
-            context += f"\n\n=== AGENT RESULT ===\n{str(agent_result)}"
-    
-    llm_reply = await generate_response(context)
-    llm_reply = _sanitize_reply(llm_reply, actions)
+        actions.append({"type": "pos_sync", "data": agent_result, "verified": _action_verified(agent_result)})
+    return agent_result, actions
+
+
+# Dispatch table: one AgentSpec per intent (see app.agents.registry)
+for _spec in (
+    AgentSpec("recommendation", _recommendation_agent),
+    AgentSpec("inventory", _inventory_agent),
+    AgentSpec("cart", _cart_agent, needs_llm=False, writes=True),
+    AgentSpec("payment", _payment_agent, writes=True),
+    AgentSpec("tracking", _tracking_agent, needs_llm=False),
+    AgentSpec("loyalty", _loyalty_agent, needs_llm=False, writes=True),
+    AgentSpec("post_purchase", _post_purchase_agent, writes=True),
+    AgentSpec("proactive", _proactive_agent, max_concurrency=4, writes=True),
+    # The POS API allows 10s per request; answer without stock data rather than hold the turn
+    AgentSpec(
+        "pos_sync",
+        _pos_sync_agent,
+        timeout=3.0,
+        max_concurrency=2,
+        fallback={"success": False, "error": "The store system did not respond in time", "verified": False},
+    ),
+):
+    register_agent(_spec)
+
+
+async def route_request(user_id: str, session_id: str, message: str, channel: str = "web") -> Dict[str, Any]:
+    prepared = await prepare_request(user_id, session_id, message, channel=channel)
+    intent = prepared["intent"]
+    actions = prepared["actions"]
+
+    fixed_reply = resolve_fixed_reply(prepared)
+    if fixed_reply is not None:
+        logger.info(
+            "Agent completed without LLM",
+            extra={"agent_used": intent, "user_id": user_id, "session_id": session_id, "actions": len(actions)}
+        )
+        return {"reply": fixed_reply, "agent_used": intent, "actions": actions if actions else None}
+
+    with span("generate_response"):
+        llm_reply = await generate_response(prepared["prompt"], intent=intent)
+    with span("sanitize_reply"):
+        llm_reply = _sanitize_reply(llm_reply, actions)
 
     logger.info(
         "Agent completed",
@@ -0,0 +1,95 @@
+from typing import Any, Callable, Dict, List, Optional
+from app.config import get_settings
+
+settings = get_settings()
+
+
+def _money(value: Any) -> str:
+    try:
+        return f"${float(value or 0):.2f}"
+    except (TypeError, ValueError):
+        return "$0.00"
+
+
+def _join(parts: List[str], channel: str) -> str:
+    # Voice replies are spoken, so avoid markdown bullets
+    if channel == "voice":
+        return ", ".join(parts)
+    return "\n".join(f"- {part}" for part in parts)
+
+
+def _cart_view(data: Dict[str, Any], channel: str) -> Optional[str]:
+    items = data.get("items")
+    if items is None:
+        return None
+    if not items:
+        return "Your cart is empty."
+
+    parts = [
+        f"{item.get('name', 'Item')} x{item.get('quantity', 1)} "
+        f"({_money(item.get('price', 0) * item.get('quantity', 1))})"
+        for item in items
+    ]
+    count = sum(item.get("quantity", 1) for item in items)
+    noun = "item" if count == 1 else "items"
+    if channel == "voice":
+        return f"You have {count} {noun} in your cart: {_join(parts, channel)}. The total is {_money(data.get('total'))}."
+    return f"Here's your cart ({count} {noun}):\n{_join(parts, channel)}\nTotal: {_money(data.get('total'))}"
+
+
+def _cart_updated(data: Dict[str, Any], channel: str) -> Optional[str]:
+    if data.get("action") == "cleared":
+        return "Your cart is now empty."
+    return None
+
+
+def _order_status(data: Dict[str, Any], channel: str) -> Optional[str]:
+    order_id = data.get("order_id")
+    status = data.get("status")
+    if not order_id or not status:
+        return None
+
+    reply = f"Order {order_id} is currently {str(status).replace('_', ' ')}."
+    eta = data.get("eta")
+    if eta and status != "delivered":
+        reply += f" Estimated delivery: {str(eta)[:10]}."
+    return reply
+
+
+def _loyalty_info(data: Any, channel: str) -> Optional[str]:
+    # Offers lists and redemption results still go through the LLM
+    if not isinstance(data, dict) or "points" not in data or "success" in data:
+        return None
+    tier = str(data.get("tier") or "bronze").title()
+    return f"You have {data.get('points', 0)} loyalty points and you're at {tier} tier."
+
+
+_RENDERERS: Dict[str, Callable[[Any, str], Optional[str]]] = {
+    "show_cart": _cart_view,
+    "cart_updated": _cart_updated,
+    "order_status": _order_status,
+    "loyalty_info": _loyalty_info,
+}
+
+
+def templates_enabled(intent: str, channel: str) -> bool:
+    intents = settings.template_replies.get(channel, settings.template_replies.get("default", []))
+    return "*" in intents or intent in intents
+
+
+def render_template_reply(intent: str, actions: List[Dict[str, Any]], channel: str = "web") -> Optional[str]:
+    """
+    Build a deterministic reply for turns fully answered by backend data.
+
+    Returns None when templates are disabled for the intent/channel or the
+    turn's result needs LLM phrasing.
+    """
+    if not templates_enabled(intent, channel):
+        return None
+    if len(actions) != 1 or actions[0].get("verified") is not True:
+        return None
+
+    renderer = _RENDERERS.get(actions[0].get("type"))
+    if not renderer:
+        return None
+    return renderer(actions[0].get("data") or {}, channel)
@@ -1,9 +1,10 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from app.core.database import get_database
+from app.utils.request_loader import get_request_loader, invalidate
 
 
-async def get_cart(owner_type: str, owner_id: str) -> List[Dict[str, Any]]:
+async def _find_cart_items(owner_type: str, owner_id: str) -> List[Dict[str, Any]]:
     db = get_database()
     cart = await db.carts.find_one({"owner_type": owner_type, "owner_id": owner_id})
     if not cart:
@@ -11,6 +12,13 @@ async def get_cart(owner_type: str, owner_id: str) -> List[Dict[str, Any]]:
     return cart.get("items", [])
 
 
+async def get_cart(owner_type: str, owner_id: str) -> List[Dict[str, Any]]:
+    loader = get_request_loader()
+    if loader is None:
+        return await _find_cart_items(owner_type, owner_id)
+    return await loader.load("cart", (owner_type, owner_id), lambda: _find_cart_items(owner_type, owner_id))
+
+
 async def set_cart(owner_type: str, owner_id: str, items: List[Dict[str, Any]]) -> None:
     db = get_database()
     await db.carts.update_one(
@@ -18,6 +26,7 @@ async def set_cart(owner_type: str, owner_id: str, items: List[Dict[str, Any]])
         {"$set": {"items": items, "updated_at": datetime.utcnow()}},
         upsert=True,
     )
+    invalidate("cart", (owner_type, owner_id))
 
 
 async def clear_cart(owner_type: str, owner_id: str) -> None:
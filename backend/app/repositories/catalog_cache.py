@@ -0,0 +1,209 @@
+import asyncio
+import copy
+import logging
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from app.config import get_settings
+from app.core.database import get_database
+from app.utils.search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Re-read a little behind the watermark so writes stamped by a server with a lagging clock are not missed
+_REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+class UnsupportedFilter(Exception):
+    """The filter uses an operator the in-memory matcher does not implement; query Mongo instead."""
+
+
+_products: Dict[str, Dict[str, Any]] = {}
+_index = SearchIndex()
+_watermark: Optional[datetime] = None
+_loaded_at: Optional[float] = None
+_poller: Optional[asyncio.Task] = None
+
+
+def is_ready() -> bool:
+    return _loaded_at is not None
+
+
+def _advance_watermark(product: Dict[str, Any]) -> None:
+    global _watermark
+    updated_at = product.get("updated_at")
+    if isinstance(updated_at, datetime) and (_watermark is None or updated_at > _watermark):
+        _watermark = updated_at
+
+
+def _build_index(products: Dict[str, Dict[str, Any]]) -> SearchIndex:
+    index = SearchIndex()
+    for product_id, product in products.items():
+        index.add(product_id, product.get("name") or "", product.get("category") or "")
+    return index
+
+
+async def load_catalog() -> int:
+    """Read the whole products collection into memory; returns the number of products."""
+    global _products, _index, _watermark, _loaded_at
+    db = get_database()
+    products = {}
+    watermark = None
+    async for product in db.products.find({}):
+        products[product["product_id"]] = product
+        updated_at = product.get("updated_at")
+        if isinstance(updated_at, datetime) and (watermark is None or updated_at > watermark):
+            watermark = updated_at
+    # Indexing a large catalog takes seconds of CPU; keep the event loop serving meanwhile
+    index = await asyncio.to_thread(_build_index, products)
+    _products = products
+    _index = index
+    _watermark = watermark
+    _loaded_at = time.monotonic()
+    logger.info("Catalog cache loaded", extra={"products": len(products)})
+    return len(products)
+
+
+async def refresh_catalog() -> int:
+    """Apply products updated since the watermark; returns the number applied."""
+    db = get_database()
+    query = {"updated_at": {"$gte": _watermark - _REFRESH_OVERLAP}} if _watermark else {"updated_at": {"$exists": True}}
+    changed = 0
+    async for product in db.products.find(query):
+        # The overlap window re-reads recent writes; only count real changes
+        if _products.get(product["product_id"]) != product:
+            _set_product(product)
+            changed += 1
+        _advance_watermark(product)
+    return changed
+
+
+async def reload_product(product_id: str) -> None:
+    """Re-read one product after a write in this process (drops it if it was deleted)."""
+    if not is_ready():
+        return
+    db = get_database()
+    product = await db.products.find_one({"product_id": product_id})
+    if product is None:
+        _products.pop(product_id, None)
+        _index.remove(product_id)
+        return
+    _set_product(product)
+    _advance_watermark(product)
+
+
+def _set_product(product: Dict[str, Any]) -> None:
+    _products[product["product_id"]] = product
+    _index.add(product["product_id"], product.get("name") or "", product.get("category") or "")
+
+
+def search_cached_products(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    """Products ranked by name and category match (see app.utils.search_index)."""
+    found = (_products.get(product_id) for product_id, _ in _index.search(query, limit))
+    return [copy.deepcopy(product) for product in found if product is not None]
+
+
+def get_cached_product(product_id: str) -> Optional[Dict[str, Any]]:
+    product = _products.get(product_id)
+    return copy.deepcopy(product) if product is not None else None
+
+
+def _compare(operator: str, expected: Any) -> Callable[[Any], bool]:
+    if operator == "$gt":
+        return lambda value: value is not None and value > expected
+    if operator == "$gte":
+        return lambda value: value is not None and value >= expected
+    if operator == "$lt":
+        return lambda value: value is not None and value < expected
+    if operator == "$lte":
+        return lambda value: value is not None and value <= expected
+    if operator == "$ne":
+        return lambda value: value != expected
+    if operator == "$in":
+        allowed = list(expected)
+        return lambda value: value in allowed
+    raise UnsupportedFilter(operator)
+
+
+def _field_predicate(condition: Any) -> Callable[[Any], bool]:
+    if not isinstance(condition, dict):
+        return lambda value: value == condition
+    if "$regex" in condition:
+        flags = re.IGNORECASE if "i" in condition.get("$options", "") else 0
+        pattern = re.compile(condition["$regex"], flags)
+        return lambda value: isinstance(value, str) and pattern.search(value) is not None
+    checks = [_compare(operator, expected) for operator, expected in condition.items()]
+    return lambda value: all(check(value) for check in checks)
+
+
+def compile_filter(query_filter: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Turn a Mongo filter into a predicate over product documents.
+
+    Supports field equality, $gt/$gte/$lt/$lte/$ne/$in and $regex with
+    $options; raises UnsupportedFilter for anything else.
+    """
+    predicates = []
+    for field, condition in query_filter.items():
+        if field.startswith("$"):
+            raise UnsupportedFilter(field)
+        predicates.append((field, _field_predicate(condition)))
+    return lambda product: all(check(product.get(field)) for field, check in predicates)
+
+
+def find_cached_products(query_filter: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+    matches = compile_filter(query_filter)
+    found = []
+    for product in _products.values():
+        if matches(product):
+            found.append(copy.deepcopy(product))
+            if len(found) >= limit:
+                break
+    return found
+
+
+async def _run_poller() -> None:
+    last_full_load = time.monotonic()
+    while True:
+        await asyncio.sleep(settings.catalog_refresh_seconds)
+        try:
+            # Polling only sees changed documents; a periodic reload also drops products deleted elsewhere
+            if time.monotonic() - last_full_load >= settings.catalog_full_reload_seconds:
+                await load_catalog()
+                last_full_load = time.monotonic()
+            else:
+                changed = await refresh_catalog()
+                if changed:
+                    logger.info("Catalog cache refreshed", extra={"changed": changed})
+        except Exception as exc:
+            logger.error(f"Catalog cache refresh failed: {exc}", exc_info=True)
+
+
+async def start_catalog_cache() -> None:
+    global _poller
+    if not settings.catalog_cache_enabled or _poller is not None:
+        return
+    try:
+        await load_catalog()
+    except Exception as exc:
+        # Serve from Mongo until a restart rather than fail startup
+        logger.error(f"Catalog cache disabled; initial load failed: {exc}", exc_info=True)
+        return
+    _poller = asyncio.create_task(_run_poller())
+
+
+async def stop_catalog_cache() -> None:
+    global _poller, _index, _loaded_at, _watermark
+    if _poller is not None:
+        _poller.cancel()
+        try:
+            await _poller
+        except asyncio.CancelledError:
+            pass
+        _poller = None
+    _products.clear()
+    _index = SearchIndex()
+    _loaded_at = None
+    _watermark = None
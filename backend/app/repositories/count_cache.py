@@ -0,0 +1,52 @@
+from collections import defaultdict
+from typing import Any, Dict, Tuple
+from bson import json_util
+from app.config import get_settings
+from app.utils.cache import TTLCache
+from app.utils.singleflight import SingleFlight
+
+settings = get_settings()
+
+_counts = TTLCache(max_size=settings.count_cache_max_entries)
+_in_flight = SingleFlight()
+# Bumped on writes; cached counts from an older generation are never read again and age out
+_generations: Dict[str, int] = defaultdict(int)
+
+
+def _filter_key(query_filter: Dict[str, Any]) -> str:
+    # Sorted keys so {"a": 1, "b": 2} and {"b": 2, "a": 1} share an entry
+    return json_util.dumps(query_filter, sort_keys=True)
+
+
+async def count_documents(collection, query_filter: Dict[str, Any]) -> Tuple[int, bool]:
+    """
+    Total for a listing as (count, exact).
+
+    Without a filter the count comes from collection metadata
+    (estimated_document_count). Filtered counts are cached for
+    COUNT_CACHE_TTL_SECONDS, and concurrent requests for the same count
+    share one query. Only a count computed for this request is exact.
+    """
+    if not query_filter:
+        return await collection.estimated_document_count(), False
+
+    key = (collection.name, _generations[collection.name], _filter_key(query_filter))
+    cached = _counts.get(key)
+    if cached is not None:
+        return cached, False
+
+    async def run_count() -> int:
+        total = await collection.count_documents(query_filter)
+        _counts.set(key, total, settings.count_cache_ttl_seconds)
+        return total
+
+    return await _in_flight.do(key, run_count), True
+
+
+def invalidate_counts(collection_name: str) -> None:
+    """Forget cached counts for a collection after a write that can change them."""
+    _generations[collection_name] += 1
+
+
+def count_cache_stats() -> Dict[str, Any]:
+    return {**_counts.stats(), "in_flight": _in_flight.stats()}
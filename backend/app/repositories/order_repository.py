@@ -2,6 +2,7 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime
 from uuid import uuid4
 from app.core.database import get_database
+from app.repositories.count_cache import invalidate_counts
 
 
 async def create_order(user_id: str, items: List[Dict], total_amount: float, shipping_address: Dict) -> Dict:
@@ -21,6 +22,7 @@ async def create_order(user_id: str, items: List[Dict], total_amount: float, shi
     }
     
     result = await db.orders.insert_one(order)
+    invalidate_counts("orders")
     order["_id"] = result.inserted_id
     return order
 
@@ -50,6 +52,7 @@ async def update_order_status(order_id: str, status: str) -> bool:
         {"order_id": order_id},
         {"$set": {"status": status, "updated_at": datetime.utcnow()}}
     )
+    invalidate_counts("orders")
     return result.modified_count > 0
 
 
@@ -1,38 +1,202 @@
 from typing import List, Dict, Any, Optional
 import re
 from app.core.database import get_database
+from app.repositories import catalog_cache
+from app.utils.pagination import encode_cursor, sort_spec
+from app.utils.request_loader import get_request_loader
+
+# Stock filters behind the stock_filter query parameter and the stock facet
+STOCK_BANDS = {
+    "out_of_stock": {"$lte": 0},
+    "low_stock": {"$gt": 0, "$lte": 10},
+    "in_stock": {"$gt": 10},
+}
+# Lower bounds of the price facet buckets; the last bucket is open-ended
+PRICE_BUCKETS = (0, 25, 50, 100, 200, 500)
 
 
 async def find_products(query_filter: Dict[str, Any], limit: int = 5) -> List[Dict[str, Any]]:
+    if catalog_cache.is_ready():
+        try:
+            return catalog_cache.find_cached_products(query_filter, limit)
+        except catalog_cache.UnsupportedFilter:
+            pass
     db = get_database()
     cursor = db.products.find(query_filter).limit(limit)
     return await cursor.to_list(length=limit)
 
 
+def _name_patterns(product_name: str) -> List[str]:
+    # Escaped: the name comes from user text
+    patterns = [re.escape(product_name)]
+    keywords = product_name.split()
+    if len(keywords) > 1:
+        # (?=.*adidas)(?=.*shirt) - positive lookahead for each keyword
+        patterns.append("".join(f"(?=.*{re.escape(kw)})" for kw in keywords))
+    return patterns
+
+
 async def find_product_by_name(product_name: str) -> Optional[Dict[str, Any]]:
     """
     Search for a product by name using keyword matching.
     If product_name is "adidas shirt", it will find "Adidas T-Shirt" or "Adidas Dress Shirt".
+    This drives cart adds and stock checks, so it never guesses: misspelled
+    names find nothing (see search_products for suggestions). With the
+    catalog cache loaded the name is matched in memory, but the product,
+    and so its stock, is still read from Mongo.
     """
     db = get_database()
-    
-    # First try exact substring match
-    exact_match = await db.products.find_one({"name": {"$regex": product_name, "$options": "i"}})
-    if exact_match:
-        return exact_match
-    
-    # If no exact match, try keyword-based search (all keywords must be present)
-    keywords = product_name.split()
-    if len(keywords) > 1:
-        # Build regex pattern: (?=.*adidas)(?=.*shirt) - positive lookahead for each keyword
-        pattern = "".join([f"(?=.*{re.escape(kw)})" for kw in keywords])
-        keyword_match = await db.products.find_one({"name": {"$regex": pattern, "$options": "i"}})
-        if keyword_match:
-            return keyword_match
-    
+    for pattern in _name_patterns(product_name):
+        name_filter = {"name": {"$regex": pattern, "$options": "i"}}
+        if catalog_cache.is_ready():
+            found = catalog_cache.find_cached_products(name_filter, limit=1)
+            if found:
+                return await db.products.find_one({"product_id": found[0]["product_id"]})
+            continue
+        match = await db.products.find_one(name_filter)
+        if match:
+            return match
     return None
 
 
+async def search_products(query: str, limit: int = 5) -> List[Dict[str, Any]]:
+    """
+    Products ranked by how well their name matches query, tolerating typos
+    when the catalog cache is loaded (MongoDB text search otherwise). For
+    suggestions only: results may be near misses and cached stock can lag.
+    """
+    if catalog_cache.is_ready():
+        return catalog_cache.search_cached_products(query, limit)
+    db = get_database()
+    cursor = db.products.find({"$text": {"$search": query}}).limit(limit)
+    return await cursor.to_list(length=limit)
+
+
+async def _find_products_by_ids(product_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    db = get_database()
+    cursor = db.products.find({"product_id": {"$in": product_ids}})
+    return {product["product_id"]: product async for product in cursor}
+
+
 async def get_product_by_id(product_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up one product. With the catalog cache loaded, name, price and
+    category come from memory and stock may lag by one refresh; order
+    placement re-checks stock in Mongo.
+    """
+    if catalog_cache.is_ready():
+        cached = catalog_cache.get_cached_product(product_id)
+        if cached is not None:
+            return cached
+    loader = get_request_loader()
+    if loader is None:
+        db = get_database()
+        return await db.products.find_one({"product_id": product_id})
+    return await loader.load_many("product", product_id, _find_products_by_ids)
+
+
+def _stock_band_expression() -> Dict[str, Any]:
+    return {"$switch": {
+        "branches": [
+            {"case": {"$lte": ["$stock", 0]}, "then": "out_of_stock"},
+            {"case": {"$lte": ["$stock", 10]}, "then": "low_stock"},
+        ],
+        "default": "in_stock",
+    }}
+
+
+def build_listing_pipeline(
+    search: Optional[str],
+    category: Optional[str],
+    stock_band: Optional[str],
+    sort_by: str,
+    direction: int,
+    skip: int,
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """
+    One aggregation for a product listing page: the page (plus one extra
+    product to tell whether another page exists), the total and the facet
+    counts.
+
+    Each facet ignores its own filter, so the category counts show what
+    picking another category would return.
+    """
+    category_filter = {"category": category} if category else {}
+    stock_filter = {"stock": STOCK_BANDS[stock_band]} if stock_band else {}
+    filters = {**category_filter, **stock_filter}
+
+    page = [{"$match": filters}, {"$sort": dict(sort_spec(sort_by, direction))}]
+    if skip:
+        page.append({"$skip": skip})
+    page.append({"$limit": limit + 1})
+
+    pipeline = []
+    if search:
+        # $text must be in the first stage
+        pipeline.append({"$match": {"$text": {"$search": search}}})
+    pipeline.append({"$facet": {
+        "page": page,
+        "total": [{"$match": filters}, {"$count": "count"}],
+        "category": [
+            {"$match": stock_filter},
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+        ],
+        "stock": [
+            # No band filter matches a missing or null stock, so neither does the facet
+            {"$match": {**category_filter, "stock": {"$ne": None}}},
+            {"$group": {"_id": _stock_band_expression(), "count": {"$sum": 1}}},
+        ],
+        "price": [
+            {"$match": filters},
+            {"$bucket": {
+                "groupBy": "$price",
+                "boundaries": list(PRICE_BUCKETS) + [float("inf")],
+                "default": "other",
+                "output": {"count": {"$sum": 1}},
+            }},
+        ],
+    }})
+    return pipeline
+
+
+def _facet_counts(result: Dict[str, Any]) -> Dict[str, Any]:
+    categories = {
+        group["_id"]: group["count"]
+        for group in sorted(result["category"], key=lambda group: str(group["_id"]))
+        if group["_id"] is not None
+    }
+    stock = {band: 0 for band in STOCK_BANDS}
+    for group in result["stock"]:
+        stock[group["_id"]] = group["count"]
+    price_counts = {group["_id"]: group["count"] for group in result["price"]}
+    upper_bounds = list(PRICE_BUCKETS[1:]) + [None]
+    price = [
+        {"min": lower, "max": upper, "count": price_counts.get(lower, 0)}
+        for lower, upper in zip(PRICE_BUCKETS, upper_bounds)
+    ]
+    return {"category": categories, "stock": stock, "price": price}
+
+
+async def list_products_with_facets(
+    search: Optional[str],
+    category: Optional[str],
+    stock_band: Optional[str],
+    sort_by: str,
+    direction: int,
+    skip: int,
+    limit: int,
+) -> Dict[str, Any]:
+    """A page of products with total, facet counts and next_cursor, in one round trip."""
     db = get_database()
-    return await db.products.find_one({"product_id": product_id})
+    pipeline = build_listing_pipeline(search, category, stock_band, sort_by, direction, skip, limit)
+    results = await db.products.aggregate(pipeline).to_list(length=1)
+    result = results[0]
+    products = result["page"][:limit]
+    has_more = len(result["page"]) > limit
+    return {
+        "products": products,
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "facets": _facet_counts(result),
+        "next_cursor": encode_cursor(products[-1], sort_by, direction) if has_more else None,
+    }
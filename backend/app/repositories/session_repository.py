@@ -1,16 +1,26 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from pymongo import UpdateOne
 from app.core.database import get_database
+from app.utils.request_loader import get_request_loader, invalidate
 
 MAX_MESSAGES = 5
 
 
-async def get_session(session_id: str, user_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+async def get_session(
+    session_id: str,
+    user_id: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
     db = get_database()
     query = {"session_id": session_id}
     if user_id:
         query["user_id"] = user_id
-    return await db.sessions.find_one(query)
+    loader = get_request_loader()
+    if loader is None:
+        return await db.sessions.find_one(query, projection)
+    key = (session_id, user_id, tuple(sorted(projection.items())) if projection else None)
+    return await loader.load("session", key, lambda: db.sessions.find_one(query, projection))
 
 
 async def save_message(
@@ -26,7 +36,7 @@ async def save_message(
         text = ""
     session = await db.sessions.find_one(
         {"session_id": session_id},
-        {"last_messages": 1}
+        {"user_id": 1, "last_messages": 1}
     )
     if session:
         if session.get("user_id") and session.get("user_id") != user_id:
@@ -37,6 +47,19 @@ async def save_message(
             if last.get("role") == role and last.get("text") == text:
                 return
 
+    message = build_message(role, text, agent, actions)
+    await db.sessions.update_one(*_append_messages_update(session_id, user_id, [message]), upsert=True)
+    invalidate("session")
+
+
+def build_message(
+    role: str,
+    text: str,
+    agent: Optional[str] = None,
+    actions: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    if text is None:
+        text = ""
     message = {
         "role": role,
         "text": text,
@@ -49,7 +72,11 @@ async def save_message(
         safe_actions = [a for a in actions if isinstance(a, dict)]
         if safe_actions:
             message["actions"] = safe_actions
-    await db.sessions.update_one(
+    return message
+
+
+def _append_messages_update(session_id: str, user_id: str, messages: List[Dict[str, Any]]):
+    return (
         {"session_id": session_id},
         {
             "$setOnInsert": {
@@ -58,20 +85,68 @@ async def save_message(
             },
             "$push": {
                 "last_messages": {
-                    "$each": [message],
+                    "$each": messages,
                     "$slice": -MAX_MESSAGES
                 },
                 "all_messages": {
-                    "$each": [message],
+                    "$each": messages,
                     "$slice": -200
                 }
             },
             "$set": {"updated_at": datetime.utcnow()}
         },
-        upsert=True
     )
 
 
+async def save_messages_bulk(entries: List[Tuple[str, str, Dict[str, Any]]]) -> int:
+    """
+    Append queued (session_id, user_id, message) entries with one bulk_write.
+
+    Applies the same rules as save_message: sessions owned by another user
+    are skipped and a message repeating the previous one is dropped. Each
+    session gets a single update with its messages in the given order.
+    Returns the number of messages written.
+    """
+    if not entries:
+        return 0
+    db = get_database()
+    session_ids = list({session_id for session_id, _, _ in entries})
+    cursor = db.sessions.find(
+        {"session_id": {"$in": session_ids}},
+        {"session_id": 1, "user_id": 1, "last_messages": {"$slice": -1}}
+    )
+    existing = {}
+    async for session in cursor:
+        existing.setdefault(session["session_id"], session)
+
+    owners: Dict[str, str] = {}
+    last_seen: Dict[str, Optional[Tuple[str, str]]] = {}
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for session_id, user_id, message in entries:
+        session = existing.get(session_id) or {}
+        owner = owners.setdefault(session_id, session.get("user_id") or user_id)
+        if owner != user_id:
+            continue
+        if session_id not in last_seen:
+            last_messages = session.get("last_messages") or []
+            last = last_messages[-1] if last_messages else {}
+            last_seen[session_id] = (last.get("role"), last.get("text")) if last else None
+        if last_seen[session_id] == (message["role"], message["text"]):
+            continue
+        last_seen[session_id] = (message["role"], message["text"])
+        grouped.setdefault(session_id, []).append(message)
+
+    operations = [
+        UpdateOne(*_append_messages_update(session_id, owners[session_id], messages), upsert=True)
+        for session_id, messages in grouped.items()
+    ]
+    if operations:
+        # One operation per session, so cross-session order does not matter
+        await db.sessions.bulk_write(operations, ordered=False)
+    invalidate("session")
+    return sum(len(messages) for messages in grouped.values())
+
+
 async def get_last_messages(session_id: str, user_id: str) -> List[Dict[str, str]]:
     session = await get_session(session_id, user_id)
     if not session:
@@ -98,5 +173,30 @@ async def update_summary(session_id: str, user_id: str, summary_text: str) -> No
         {"$set": {"summary": summary_text, "updated_at": datetime.utcnow()}},
         upsert=True
     )
+    invalidate("session")
+
 
+async def save_summary(
+    session_id: str,
+    user_id: str,
+    summary_text: str,
+    watermark: str,
+    previous_watermark: Optional[str] = None
+) -> bool:
+    """
+    Store a summary covering messages up to watermark (a message timestamp).
 
+    Only applies if the stored watermark is still previous_watermark, so two
+    summarizer runs for one session cannot overwrite each other.
+    """
+    db = get_database()
+    result = await db.sessions.update_one(
+        {"session_id": session_id, "user_id": user_id, "summary_watermark": previous_watermark},
+        {"$set": {
+            "summary": summary_text,
+            "summary_watermark": watermark,
+            "summary_updated_at": datetime.utcnow()
+        }}
+    )
+    invalidate("session")
+    return result.modified_count > 0
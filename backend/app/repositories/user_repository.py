@@ -1,15 +1,32 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from app.core.database import get_database
+from app.repositories.count_cache import invalidate_counts
+from app.utils.request_loader import get_request_loader, invalidate
 
 
-async def get_user(user_id: str) -> Optional[Dict[str, Any]]:
+async def _find_user(user_id: str) -> Optional[Dict[str, Any]]:
     db = get_database()
     return await db.users.find_one({"user_id": user_id})
 
 
+async def _find_users(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    db = get_database()
+    cursor = db.users.find({"user_id": {"$in": user_ids}})
+    return {user["user_id"]: user async for user in cursor}
+
+
+async def get_user(user_id: str) -> Optional[Dict[str, Any]]:
+    loader = get_request_loader()
+    if loader is None:
+        return await _find_user(user_id)
+    return await loader.load_many("user", user_id, _find_users)
+
+
 async def create_user(user_data: Dict[str, Any]) -> str:
     db = get_database()
     result = await db.users.insert_one(user_data)
+    invalidate("user", user_data.get("user_id"))
+    invalidate_counts("users")
     return str(result.inserted_id)
 
 
@@ -20,4 +37,7 @@ async def update_user_preferences(user_id: str, preferences: Dict[str, Any]) ->
         {"$set": {"preferences": preferences}},
         upsert=True
     )
+    invalidate("user", user_id)
+    if result.upserted_id is not None:
+        invalidate_counts("users")
     return result.modified_count > 0
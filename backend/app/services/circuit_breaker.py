@@ -0,0 +1,148 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class CircuitBreaker:
+    """
+    Sliding-window circuit breaker for one upstream provider.
+
+    Calls are recorded with their latency for window_seconds. Once at least
+    min_calls are in the window and the share of failed calls (errors, empty
+    answers and, if slow_call_seconds is set, slow calls) reaches
+    failure_rate, the breaker opens and the provider is skipped. After
+    open_seconds it lets half_open_probes calls through; a successful probe
+    closes it again, a failed one re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 60.0,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+        slow_call_seconds: float = 0.0,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = max(1, min_calls)
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        self.slow_call_seconds = slow_call_seconds
+        self._calls: Deque[Tuple[float, bool, float]] = deque()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+        return self._state
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes_in_flight < self.half_open_probes:
+            return True
+        return False
+
+    def acquire(self) -> bool:
+        """Reserve a call slot; half-open breakers only hand out a few probes."""
+        if not self.allow_request():
+            return False
+        if self._state == HALF_OPEN:
+            self._probes_in_flight += 1
+        return True
+
+    def release(self) -> None:
+        """Give back a probe slot for a call that ended without an outcome (e.g. cancelled)."""
+        if self._state == HALF_OPEN and self._probes_in_flight > 0:
+            self._probes_in_flight -= 1
+
+    def record_success(self, latency: float) -> None:
+        if self.slow_call_seconds and latency >= self.slow_call_seconds:
+            self.record_failure(latency)
+            return
+        now = time.monotonic()
+        self._calls.append((now, True, latency))
+        if self._state == HALF_OPEN:
+            self._state = CLOSED
+            self._probes_in_flight = 0
+            self._calls.clear()
+            self._calls.append((now, True, latency))
+        self._prune(now)
+
+    def record_failure(self, latency: float) -> None:
+        now = time.monotonic()
+        self._calls.append((now, False, latency))
+        self._prune(now)
+        if self._state == HALF_OPEN:
+            self._trip(now)
+            return
+        if self._state == CLOSED and len(self._calls) >= self.min_calls and self.error_rate() >= self.failure_rate:
+            self._trip(now)
+
+    def error_rate(self) -> float:
+        self._prune(time.monotonic())
+        if not self._calls:
+            return 0.0
+        failures = sum(1 for _, ok, _ in self._calls if not ok)
+        return failures / len(self._calls)
+
+    def health_score(self) -> float:
+        """Success rate over the window; 1.0 until there are enough calls to judge."""
+        self._prune(time.monotonic())
+        if len(self._calls) < self.min_calls:
+            return 1.0
+        return 1.0 - self.error_rate()
+
+    def reset(self) -> None:
+        self._calls.clear()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self.times_opened = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        latencies = [latency for _, _, latency in self._calls]
+        return {
+            "name": self.name,
+            "state": state,
+            "calls": len(self._calls),
+            "error_rate": round(self.error_rate(), 4),
+            "health_score": round(self.health_score(), 4),
+            "p50_seconds": round(_percentile(latencies, 50), 4),
+            "p95_seconds": round(_percentile(latencies, 95), 4),
+            "times_opened": self.times_opened,
+        }
+
+    def _trip(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self.times_opened += 1
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
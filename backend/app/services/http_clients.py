@@ -0,0 +1,70 @@
+import logging
+from typing import Dict
+import httpx
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PROVIDERS = ("openrouter", "ollama")
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _provider_timeout(provider: str) -> float:
+    timeouts = {
+        "openrouter": settings.openrouter_timeout,
+        "ollama": settings.ollama_timeout,
+    }
+    return timeouts.get(provider, 60.0)
+
+
+def _http2_enabled() -> bool:
+    if not settings.llm_http2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("LLM_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+        return False
+    return True
+
+
+def _build_client(provider: str) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_keepalive_connections,
+        keepalive_expiry=settings.llm_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(_provider_timeout(provider), connect=settings.llm_connect_timeout)
+    return httpx.AsyncClient(timeout=timeout, limits=limits, http2=_http2_enabled())
+
+
+def get_client(provider: str) -> httpx.AsyncClient:
+    """
+    Return the long-lived HTTP client for an LLM provider.
+
+    Clients are normally created in the app lifespan; scripts and tests that
+    skip the lifespan get one lazily on first use.
+    """
+    client = _clients.get(provider)
+    if client is None or client.is_closed:
+        client = _build_client(provider)
+        _clients[provider] = client
+    return client
+
+
+async def start_clients() -> None:
+    for provider in PROVIDERS:
+        get_client(provider)
+    logger.info("LLM HTTP clients started", extra={"providers": list(_clients)})
+
+
+async def close_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as exc:
+            logger.error(f"Failed to close LLM HTTP client: {exc}", exc_info=True)
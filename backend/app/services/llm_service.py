@@ -1,7 +1,16 @@
+import asyncio
+import hashlib
 import httpx
+import json
 import logging
-from typing import Optional, Callable
+import time
+from typing import Optional, Callable, AsyncIterator, Tuple
 from app.config import get_settings
+from app.services.circuit_breaker import CircuitBreaker, CLOSED
+from app.services.http_clients import get_client
+from app.utils.cache import TTLCache
+from app.utils.singleflight import SingleFlight
+from app.utils.tracing import record_span, span
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -12,41 +21,277 @@ OPENROUTER_BASE_URL = settings.openrouter_base_url.rstrip("/")
 OLLAMA_API_URL = settings.ollama_url or settings.ollama_api_url
 OLLAMA_MODEL = "qwen2.5:3b"
 
+FALLBACK_REPLY = "I'm sorry, I couldn't process your request at the moment. Please try again."
 
-async def generate_response(prompt: str) -> Optional[str]:
+_response_cache = TTLCache(max_size=settings.llm_cache_max_entries)
+_in_flight = SingleFlight()
+
+
+def _build_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        window_seconds=settings.llm_breaker_window_seconds,
+        min_calls=settings.llm_breaker_min_calls,
+        failure_rate=settings.llm_breaker_failure_rate,
+        open_seconds=settings.llm_breaker_open_seconds,
+        half_open_probes=settings.llm_breaker_half_open_probes,
+        slow_call_seconds=settings.llm_breaker_slow_call_seconds,
+    )
+
+
+_breakers = {name: _build_breaker(name) for name in ("openrouter", "ollama")}
+
+
+async def generate_response(prompt: str, intent: Optional[str] = None) -> Optional[str]:
     """
     Generate AI response using OpenRouter (primary) or Ollama (fallback)
     
     Args:
         prompt: The prompt to send to AI
+        intent: Intent of the turn, used to pick the response cache TTL
         
     Returns:
         Generated text response or None if failed
     """
+    ttl = _cache_ttl(intent)
+    prompt_key = _cache_key(prompt)
+    if ttl > 0:
+        cached = _response_cache.get(prompt_key)
+        if cached is not None:
+            return cached
+
+    if not settings.llm_singleflight_enabled:
+        return await _generate_uncached(prompt, prompt_key, ttl)
+    # Identical prompts already in flight (webhook redelivery, repeated transcripts) share one upstream call
+    return await _in_flight.do(prompt_key, lambda: _generate_uncached(prompt, prompt_key, ttl))
+
+
+async def _generate_uncached(prompt: str, prompt_key: str, ttl: float) -> str:
     providers = _get_providers()
+    deadline = settings.llm_deadline_seconds
 
-    for provider in providers:
-        try:
-            response = await provider(prompt)
+    try:
+        if deadline > 0:
+            response = await asyncio.wait_for(_first_response(prompt, providers), timeout=deadline)
+        else:
+            response = await _first_response(prompt, providers)
+    except asyncio.TimeoutError:
+        logger.warning(f"AI providers did not answer within the {deadline:.1f}s deadline")
+        response = None
+
+    if response:
+        _response_cache.set(prompt_key, response, ttl)
+        return response
+
+    return FALLBACK_REPLY
+
+
+async def _attempt(provider: Tuple[str, Callable[[str], Optional[str]]], prompt: str) -> Optional[str]:
+    name, call = provider
+    breaker = _breakers[name]
+    if not breaker.acquire():
+        return None
+
+    started = time.perf_counter()
+    try:
+        with span("llm_attempt", provider=name) as attempt:
+            response = await call(prompt)
+            attempt["ok"] = bool(response)
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as exc:
+        logger.error(f"AI provider error: {exc}", exc_info=True)
+        response = None
+
+    latency = time.perf_counter() - started
+    if response:
+        breaker.record_success(latency)
+    else:
+        breaker.record_failure(latency)
+    return response
+
+
+async def _first_response(prompt: str, providers: list) -> Optional[str]:
+    hedge_delay = settings.llm_hedge_delay_seconds
+    if hedge_delay <= 0 or len(providers) < 2:
+        for provider in providers:
+            response = await _attempt(provider, prompt)
             if response:
                 return response
-        except Exception as exc:
-            logger.error(f"AI provider error: {exc}", exc_info=True)
+        return None
+    return await _hedged_response(prompt, providers, hedge_delay)
+
+
+async def _hedged_response(prompt: str, providers: list, hedge_delay: float) -> Optional[str]:
+    """
+    Race providers in priority order.
+
+    The next provider starts when the running ones have not answered within
+    hedge_delay, or right away when one fails. The first non-empty answer
+    wins and every other attempt is cancelled.
+    """
+    remaining = list(providers)
+    pending = set()
+
+    def launch_next() -> None:
+        provider = remaining.pop(0)
+        pending.add(asyncio.create_task(_attempt(provider, prompt)))
+
+    launch_next()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=hedge_delay if remaining else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                logger.info("AI provider slow, hedging with next provider")
+                launch_next()
+                continue
+
+            for task in done:
+                pending.discard(task)
+                response = task.result()
+                if response:
+                    return response
+                if remaining:
+                    launch_next()
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def prompt_token_budget() -> int:
+    """
+    Token budget for prompts sent through the configured provider chain.
+
+    The same prompt may fall back to a smaller local model, so the tightest
+    budget among the configured models applies.
+    """
+    models = {"openrouter": OPENROUTER_MODEL, "ollama": OLLAMA_MODEL}
+    budgets = [
+        settings.prompt_token_budgets.get(models[name], settings.prompt_token_budget)
+        for name in _configured_provider_names()
+    ]
+    return min(budgets) if budgets else settings.prompt_token_budget
+
+
+def cache_stats() -> dict:
+    return {**_response_cache.stats(), "coalesced": _in_flight.stats()}
+
+
+def provider_status() -> list[dict]:
+    """Circuit breaker state and rolling latency for each configured provider."""
+    return [_breakers[name].snapshot() for name in _configured_provider_names()]
+
+
+def reset_breakers() -> None:
+    for breaker in _breakers.values():
+        breaker.reset()
+
+
+def _cache_ttl(intent: Optional[str]) -> float:
+    if not settings.llm_cache_enabled or not intent:
+        return 0.0
+    return float(settings.llm_cache_ttls.get(intent, 0.0))
+
+
+def _provider_signature() -> str:
+    models = {"openrouter": OPENROUTER_MODEL, "ollama": OLLAMA_MODEL}
+    return "|".join(f"{name}:{models[name]}" for name in _configured_provider_names())
+
+
+def _cache_key(prompt: str) -> str:
+    """
+    Hash of the whitespace-normalized prompt plus the provider chain.
+
+    The whole prompt is hashed, so per-user sections (cart, preferences,
+    summary, recent messages) always take part in the key.
+    """
+    normalized = " ".join(prompt.split())
+    digest = hashlib.sha256(f"{_provider_signature()}\n{normalized}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+async def stream_response(prompt: str) -> AsyncIterator[str]:
+    """
+    Stream an AI response token by token, trying providers in the same order
+    as generate_response.
+
+    A provider is only abandoned for the next one if it fails before producing
+    any text; once tokens have been sent they cannot be taken back, so a
+    mid-stream failure simply ends the stream.
+    """
+    for name, streamer in _get_stream_providers():
+        breaker = _breakers[name]
+        if not breaker.acquire():
             continue
+        started = False
+        began = time.perf_counter()
+        try:
+            async for chunk in streamer(prompt):
+                if chunk:
+                    if not started:
+                        breaker.record_success(time.perf_counter() - began)
+                        # Time to first token, recorded now rather than when the stream ends
+                        record_span("llm_attempt", began, provider=name, ok=True, stream=True)
+                    started = True
+                    yield chunk
+        except Exception as exc:
+            logger.error(f"AI provider stream error: {exc}", exc_info=True)
+        finally:
+            if not started:
+                breaker.release()
+                # Time to failure
+                record_span("llm_attempt", began, provider=name, ok=False, stream=True)
+        if started:
+            return
+        breaker.record_failure(time.perf_counter() - began)
 
-    return "I'm sorry, I couldn't process your request at the moment. Please try again."
+    yield FALLBACK_REPLY
 
 
-def _get_providers() -> list[Callable[[str], Optional[str]]]:
-    providers = []
+def _configured_provider_names() -> list[str]:
+    names = []
 
     if OPENROUTER_API_KEY:
-        providers.append(_call_openrouter)
+        names.append("openrouter")
 
     if OLLAMA_API_URL:
-        providers.append(_call_ollama)
+        names.append("ollama")
 
-    return providers
+    return names
+
+
+def _select_providers(names: list[str]) -> list[str]:
+    """
+    Drop providers whose breaker is open and order the rest by health.
+
+    Closed breakers come before half-open ones, and a closed provider whose
+    health score has dropped below LLM_BREAKER_DEGRADED_SCORE moves behind
+    healthy ones. Configured priority breaks ties.
+    """
+    available = [name for name in names if _breakers[name].allow_request()]
+
+    def rank(name: str) -> tuple:
+        breaker = _breakers[name]
+        degraded = breaker.health_score() < settings.llm_breaker_degraded_score
+        return (breaker.state != CLOSED, degraded)
+
+    return sorted(available, key=rank)
+
+
+def _get_providers() -> list[Tuple[str, Callable[[str], Optional[str]]]]:
+    calls = {"openrouter": _call_openrouter, "ollama": _call_ollama}
+    return [(name, calls[name]) for name in _select_providers(_configured_provider_names())]
+
+
+def _get_stream_providers() -> list[Tuple[str, Callable[[str], AsyncIterator[str]]]]:
+    streamers = {"openrouter": _stream_openrouter, "ollama": _stream_ollama}
+    return [(name, streamers[name]) for name in _select_providers(_configured_provider_names())]
 
 
 async def _call_openrouter(prompt: str) -> Optional[str]:
@@ -62,14 +307,14 @@ async def _call_openrouter(prompt: str) -> Optional[str]:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{OPENROUTER_BASE_URL}/chat/completions",
-                json=payload,
-                headers=headers,
-            )
-            response.raise_for_status()
-            data = response.json()
+        client = get_client("openrouter")
+        response = await client.post(
+            f"{OPENROUTER_BASE_URL}/chat/completions",
+            json=payload,
+            headers=headers,
+        )
+        response.raise_for_status()
+        data = response.json()
 
         choices = data.get("choices", [])
         if choices:
@@ -89,17 +334,17 @@ async def _call_ollama(prompt: str) -> Optional[str]:
     }
     
     try:
-        async with httpx.AsyncClient(timeout=180.0) as client:  # 3 minutes for local AI
-            response = await client.post(
-                f"{OLLAMA_API_URL}/api/generate",
-                json=payload
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            if "response" in data:
-                return data["response"]
-            return None
+        client = get_client("ollama")
+        response = await client.post(
+            f"{OLLAMA_API_URL}/api/generate",
+            json=payload
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+        if "response" in data:
+            return data["response"]
+        return None
             
     except httpx.ConnectError:
         logger.error(
@@ -111,7 +356,7 @@ async def _call_ollama(prompt: str) -> Optional[str]:
         return None
     except httpx.ReadTimeout:
         logger.error(
-            f"Ollama timeout after 180 seconds. This can happen with:\n"
+            f"Ollama timeout after {settings.ollama_timeout:.0f} seconds. This can happen with:\n"
             f"- Large prompts\n"
             f"- Slow hardware\n"
             f"Try a faster model: ollama pull llama3.2:1b"
@@ -120,3 +365,59 @@ async def _call_ollama(prompt: str) -> Optional[str]:
     except Exception as e:
         logger.error(f"Ollama API error: {e}", exc_info=True)
         return None
+
+
+async def _stream_openrouter(prompt: str) -> AsyncIterator[str]:
+    """Stream from OpenRouter's OpenAI-compatible SSE endpoint."""
+    headers = {
+        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+        "Content-Type": "application/json",
+    }
+
+    payload = {
+        "model": OPENROUTER_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "stream": True,
+    }
+
+    client = get_client("openrouter")
+    async with client.stream(
+        "POST",
+        f"{OPENROUTER_BASE_URL}/chat/completions",
+        json=payload,
+        headers=headers,
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            # SSE comments such as ": OPENROUTER PROCESSING" keep the connection alive
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices", [])
+            if choices:
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
+
+
+async def _stream_ollama(prompt: str) -> AsyncIterator[str]:
+    """Stream from Ollama, which sends one JSON object per line."""
+    payload = {
+        "model": OLLAMA_MODEL,
+        "prompt": prompt,
+        "stream": True
+    }
+
+    client = get_client("ollama")
+    async with client.stream("POST", f"{OLLAMA_API_URL}/api/generate", json=payload) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            if data.get("response"):
+                yield data["response"]
+            if data.get("done"):
+                break
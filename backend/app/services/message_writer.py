@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import get_settings
+from app.repositories import session_repository
+from app.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+MAX_FLUSH_ATTEMPTS = 3
+
+_queue: Optional[asyncio.Queue] = None
+_pending: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+_worker: Optional[asyncio.Task] = None
+
+
+async def write_message(
+    session_id: str,
+    user_id: str,
+    role: str,
+    text: str,
+    agent: Optional[str] = None,
+    actions: Optional[List[Dict[str, Any]]] = None
+) -> None:
+    """
+    Persist a chat message, or queue it when write-behind is running.
+
+    Queued messages are written by a single worker in arrival order, so a
+    session's messages always land in the order the endpoints produced them.
+    """
+    with span(f"save_{role}_message", queued=_queue is not None):
+        if _queue is None:
+            await session_repository.save_message(session_id, user_id, role, text, agent=agent, actions=actions)
+            return
+        message = session_repository.build_message(role, text, agent, actions)
+        _pending.setdefault((session_id, user_id), []).append(message)
+        _queue.put_nowait((session_id, user_id, message))
+
+
+def pending_messages(session_id: str, user_id: str) -> List[Dict[str, Any]]:
+    """Messages queued for a session but not yet flushed, oldest first."""
+    return list(_pending.get((session_id, user_id), []))
+
+
+def _forget(entries: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+    for session_id, user_id, message in entries:
+        queued = _pending.get((session_id, user_id))
+        if not queued:
+            continue
+        for index, candidate in enumerate(queued):
+            if candidate is message:
+                del queued[index]
+                break
+        if not queued:
+            del _pending[(session_id, user_id)]
+
+
+async def _flush(entries: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+    for attempt in range(1, MAX_FLUSH_ATTEMPTS + 1):
+        try:
+            await session_repository.save_messages_bulk(entries)
+            return
+        except Exception as exc:
+            if attempt == MAX_FLUSH_ATTEMPTS:
+                logger.error(
+                    f"Dropping {len(entries)} chat messages after {attempt} failed writes: {exc}",
+                    exc_info=True
+                )
+                return
+            logger.warning(f"Chat message flush failed (attempt {attempt}): {exc}")
+            await asyncio.sleep(0.1 * 2 ** (attempt - 1))
+
+
+async def _run_worker(queue: asyncio.Queue) -> None:
+    while True:
+        entries = [await queue.get()]
+        # Give the rest of the burst a moment to arrive so it shares one bulk_write
+        await asyncio.sleep(settings.message_flush_interval_seconds)
+        while len(entries) < settings.message_flush_batch_size and not queue.empty():
+            entries.append(queue.get_nowait())
+        try:
+            await _flush(entries)
+        finally:
+            _forget(entries)
+            for _ in entries:
+                queue.task_done()
+
+
+async def start_message_writer() -> None:
+    global _queue, _worker
+    if not settings.message_write_behind or _worker is not None:
+        return
+    _queue = asyncio.Queue()
+    _worker = asyncio.create_task(_run_worker(_queue))
+    logger.info("Chat message write-behind started")
+
+
+async def stop_message_writer(timeout: float = 10.0) -> None:
+    """Flush queued messages (up to timeout seconds), then stop the worker."""
+    global _queue, _worker
+    if _worker is None:
+        return
+    queue = _queue
+    try:
+        # Messages written while draining still go through the queue, behind the ones already in it
+        await asyncio.wait_for(queue.join(), timeout)
+    except asyncio.TimeoutError:
+        logger.error("Chat message write-behind stopped with messages unsaved", extra={"pending": queue.qsize()})
+    # New messages are written directly from here on
+    _queue = None
+    _worker.cancel()
+    try:
+        await _worker
+    except asyncio.CancelledError:
+        pass
+    _worker = None
+    _pending.clear()
@@ -1,7 +1,7 @@
-import httpx
 import logging
 from typing import Optional, List, Dict
 from app.config import get_settings
+from app.services.http_clients import get_client
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -23,14 +23,14 @@ async def generate_with_ollama(prompt: str, model: str = "olmo:1b") -> Optional[
     }
     
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{OLLAMA_API_URL}/api/generate",
-                json=payload
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data.get("response", "").strip()
+        client = get_client("ollama")
+        response = await client.post(
+            f"{OLLAMA_API_URL}/api/generate",
+            json=payload
+        )
+        response.raise_for_status()
+        data = response.json()
+        return data.get("response", "").strip()
     except Exception as e:
         logger.error(f"Ollama error: {e}", exc_info=True)
         return None
@@ -45,14 +45,14 @@ async def chat_with_ollama(messages: List[Dict[str, str]], model: str = "olmo:1b
     }
     
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{OLLAMA_API_URL}/api/chat",
-                json=payload
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data.get("message", {}).get("content", "").strip()
+        client = get_client("ollama")
+        response = await client.post(
+            f"{OLLAMA_API_URL}/api/chat",
+            json=payload
+        )
+        response.raise_for_status()
+        data = response.json()
+        return data.get("message", {}).get("content", "").strip()
     except Exception as e:
         logger.error(f"Ollama chat error: {e}", exc_info=True)
         return None
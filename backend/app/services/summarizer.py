@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.config import get_settings
+from app.orchestrator.prompt_builder import truncate_to_tokens
+from app.repositories.session_repository import MAX_MESSAGES, get_session, save_summary
+from app.services.llm_service import FALLBACK_REPLY, generate_response
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SUMMARY_PROJECTION = {"_id": 0, "summary": 1, "summary_watermark": 1, "all_messages": 1}
+
+_queue: Optional[asyncio.Queue] = None
+_pending: Set[Tuple[str, str]] = set()
+_worker: Optional[asyncio.Task] = None
+
+
+def _summary_budget() -> int:
+    return settings.prompt_section_budgets.get("summary", 300)
+
+
+def _format_messages(messages: List[Dict[str, Any]], width: int) -> str:
+    return "\n".join(f"{m.get('role', 'user')}: {(m.get('text') or '')[:width]}" for m in messages)
+
+
+def _fold_extractive(summary: str, messages: List[Dict[str, Any]]) -> str:
+    combined = "\n".join(part for part in [summary, _format_messages(messages, 80)] if part)
+    return truncate_to_tokens(combined, _summary_budget(), keep="tail")
+
+
+async def _fold_with_llm(summary: str, messages: List[Dict[str, Any]]) -> Optional[str]:
+    prompt = (
+        "Update the running summary of a customer support conversation.\n"
+        f"Keep it under {_summary_budget() // 2} words. Keep products, order IDs, preferences "
+        "and unresolved requests; drop greetings and small talk.\n\n"
+        f"=== CURRENT SUMMARY ===\n{summary or '(none)'}\n\n"
+        f"=== NEW MESSAGES ===\n{_format_messages(messages, 500)}\n\n"
+        "Updated summary:"
+    )
+    reply = await generate_response(prompt)
+    if not reply or reply == FALLBACK_REPLY:
+        return None
+    return truncate_to_tokens(reply.strip(), _summary_budget(), keep="head")
+
+
+async def summarize_session(session_id: str, user_id: str) -> bool:
+    """
+    Fold messages newer than the session's watermark into its summary.
+
+    The newest MAX_MESSAGES messages are left out because the prompt already
+    carries them as recent messages. Returns True if a new summary was saved.
+    """
+    session = await get_session(session_id, user_id, projection=SUMMARY_PROJECTION)
+    if not session:
+        return False
+
+    watermark = session.get("summary_watermark")
+    older = session.get("all_messages", [])[:-MAX_MESSAGES]
+    new_messages = [m for m in older if watermark is None or (m.get("timestamp") or "") > watermark]
+    if len(new_messages) < settings.summary_min_new_messages:
+        return False
+
+    summary = session.get("summary", "")
+    folded = await _fold_with_llm(summary, new_messages) if settings.summary_use_llm else None
+    if folded is None:
+        folded = _fold_extractive(summary, new_messages)
+
+    saved = await save_summary(
+        session_id,
+        user_id,
+        folded,
+        watermark=new_messages[-1].get("timestamp") or "",
+        previous_watermark=watermark,
+    )
+    logger.info(
+        "Session summary updated" if saved else "Session summary skipped; watermark moved",
+        extra={"session_id": session_id, "folded_messages": len(new_messages)}
+    )
+    return saved
+
+
+def schedule_summary(session_id: str, user_id: str) -> bool:
+    """Queue a session for background summarization; no-op if already queued or the worker is not running."""
+    if _queue is None or not settings.summary_enabled or not session_id or not user_id:
+        return False
+    key = (session_id, user_id)
+    if key in _pending:
+        return False
+    _pending.add(key)
+    _queue.put_nowait(key)
+    return True
+
+
+async def _run_worker() -> None:
+    while True:
+        session_id, user_id = await _queue.get()
+        # Forget the key first so messages arriving during this run queue another pass
+        _pending.discard((session_id, user_id))
+        try:
+            await summarize_session(session_id, user_id)
+        except Exception as exc:
+            logger.error(f"Session summarization failed: {exc}", exc_info=True, extra={"session_id": session_id})
+        finally:
+            _queue.task_done()
+
+
+async def start_summarizer() -> None:
+    global _queue, _worker
+    if not settings.summary_enabled or _worker is not None:
+        return
+    _queue = asyncio.Queue()
+    _worker = asyncio.create_task(_run_worker())
+    logger.info("Session summarizer started")
+
+
+async def stop_summarizer(timeout: float = 5.0) -> None:
+    """Finish queued summaries (up to timeout seconds), then stop the worker."""
+    global _queue, _worker
+    if _worker is None:
+        return
+    try:
+        await asyncio.wait_for(_queue.join(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Session summarizer stopped with work pending", extra={"pending": _queue.qsize()})
+    _worker.cancel()
+    try:
+        await _worker
+    except asyncio.CancelledError:
+        pass
+    _queue = None
+    _worker = None
+    _pending.clear()
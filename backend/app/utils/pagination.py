@@ -0,0 +1,83 @@
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Tuple
+from bson import json_util
+
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed or was issued for a different sort."""
+
+
+def sort_spec(sort_by: str, direction: int) -> List[Tuple[str, int]]:
+    """Sort on the requested field with _id as tie-breaker, so every document has a unique position."""
+    return [(sort_by, direction), ("_id", direction)]
+
+
+def encode_cursor(doc: Dict[str, Any], sort_by: str, direction: int) -> str:
+    """Opaque cursor pointing just past doc in the given sort."""
+    payload = json_util.dumps({"s": sort_by, "d": direction, "v": doc.get(sort_by), "id": doc["_id"]})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, direction: int) -> Tuple[Any, Any]:
+    """Return the (sort value, _id) a cursor points past; raises InvalidCursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        value, last_id = payload["v"], payload["id"]
+        issued_for = (payload["s"], payload["d"])
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if issued_for != (sort_by, direction):
+        raise InvalidCursor("Cursor was issued for a different sort")
+    return value, last_id
+
+
+def keyset_filter(sort_by: str, direction: int, value: Any, last_id: Any) -> Dict[str, Any]:
+    """
+    Filter for documents after (value, last_id) in sort_spec order.
+
+    MongoDB sorts null and missing values before everything else, so they
+    come first when ascending and last when descending.
+    """
+    id_after = {"$gt" if direction == 1 else "$lt": last_id}
+    same_value = {sort_by: value, "_id": id_after}
+    if value is None:
+        if direction == 1:
+            return {"$or": [same_value, {sort_by: {"$ne": None}}]}
+        return same_value
+    if direction == 1:
+        return {"$or": [{sort_by: {"$gt": value}}, same_value]}
+    return {"$or": [{sort_by: {"$lt": value}}, same_value, {sort_by: None}]}
+
+
+async def fetch_page(
+    collection,
+    query_filter: Dict[str, Any],
+    sort_by: str,
+    direction: int,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Read one page and the cursor for the next one (None on the last page).
+
+    With a cursor, skip is ignored and the page starts right after the
+    cursor's position, so the cost of a page does not grow with its depth.
+    """
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, direction)
+        after = keyset_filter(sort_by, direction, value, last_id)
+        query_filter = {"$and": [query_filter, after]} if query_filter else after
+        skip = 0
+    # One extra document tells whether another page exists
+    found = collection.find(query_filter, projection).sort(sort_spec(sort_by, direction))
+    if skip:
+        found = found.skip(skip)
+    docs = await found.limit(limit + 1).to_list(length=limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1], sort_by, direction)
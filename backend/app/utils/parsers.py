@@ -1,5 +1,53 @@
 import re
-from typing import Optional
+from typing import List, Optional
+
+# Action/filler words stripped from product queries, in their original removal order
+FILLER_WORDS = [
+    "add", "put", "place", "to", "the", "a", "an", "my", "in", "into",
+    "cart", "shopping cart", "basket", "available", "stock", "check",
+    "is there", "do you have", "show me", "find", "search", "for",
+    "i want", "i need", "i'll take", "give me", "get me", "this", "that"
+]
+
+
+def _compile_filler_pattern(words: List[str]) -> re.Pattern:
+    """
+    Compile the filler words into one alternation, longest phrase first.
+
+    Removing the words one after another never lets a phrase match once an
+    earlier entry has removed part of it ("shopping cart" loses "cart"
+    first), so such phrases are left out to keep the output identical.
+    """
+    live = []
+    for index, word in enumerate(words):
+        shadowed = any(
+            re.search(r"\b" + re.escape(earlier) + r"\b", word, re.IGNORECASE)
+            for earlier in words[:index]
+        )
+        if not shadowed:
+            live.append(word)
+    alternation = "|".join(re.escape(word) for word in sorted(live, key=len, reverse=True))
+    return re.compile(r"\b(?:" + alternation + r")\b", re.IGNORECASE)
+
+
+_FILLER_PATTERN = _compile_filler_pattern(FILLER_WORDS)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# Tried in priority order: the first pattern found anywhere in the message wins
+ORDER_ID_PATTERNS = [
+    r'order[:\s#-]+([a-zA-Z0-9\-]{3,})',  # "order 123", "order #123", "order: ABC-123"
+    r'#([a-zA-Z0-9\-]{3,})',              # "#12345" or "#ORD-123"
+    r'\b([a-fA-F0-9\-]{30,})\b',          # Full UUID format
+    r'\b(ORD-\d+)\b',                      # ORD-12345 format
+    r'\b(ORDER\d+)\b',                     # ORDER12345 format
+]
+
+# Anchored at the start, each ".*?" branch finds the leftmost match of its
+# pattern and later branches are only tried when earlier ones match nowhere
+_ORDER_ID_PATTERN = re.compile(
+    r"(?:" + "|".join(r".*?" + pattern for pattern in ORDER_ID_PATTERNS) + r")",
+    re.IGNORECASE | re.DOTALL,
+)
 
 
 def extract_product_name(message: str) -> Optional[str]:
@@ -10,22 +58,11 @@ def extract_product_name(message: str) -> Optional[str]:
     - "show me Nike shoes" → "Nike shoes"
     - "I want the iPhone" → "iPhone"
     """
-    message_cleaned = message.lower()
-    
-    # Remove common action/filler words
-    remove_words = [
-        "add", "put", "place", "to", "the", "a", "an", "my", "in", "into",
-        "cart", "shopping cart", "basket", "available", "stock", "check",
-        "is there", "do you have", "show me", "find", "search", "for",
-        "i want", "i need", "i'll take", "give me", "get me", "this", "that"
-    ]
-    
-    # Replace each word/phrase
-    for word in remove_words:
-        message_cleaned = re.sub(r'\b' + re.escape(word) + r'\b', '', message_cleaned, flags=re.IGNORECASE)
+    # Remove common action/filler words in one pass
+    message_cleaned = _FILLER_PATTERN.sub('', message.lower())
     
     # Clean up extra spaces
-    message_cleaned = re.sub(r'\s+', ' ', message_cleaned).strip()
+    message_cleaned = _WHITESPACE_PATTERN.sub(' ', message_cleaned).strip()
     
     return message_cleaned if message_cleaned else None
 
@@ -40,18 +77,9 @@ def extract_order_id(message: str) -> Optional[str]:
     message = message.strip()
     
     # Try common order ID patterns
-    patterns = [
-        r'order[:\s#-]+([a-zA-Z0-9\-]{3,})',  # "order 123", "order #123", "order: ABC-123"
-        r'#([a-zA-Z0-9\-]{3,})',              # "#12345" or "#ORD-123"
-        r'\b([a-fA-F0-9\-]{30,})\b',          # Full UUID format
-        r'\b(ORD-\d+)\b',                      # ORD-12345 format
-        r'\b(ORDER\d+)\b',                     # ORDER12345 format
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, message, re.IGNORECASE)
-        if match:
-            return match.group(1).upper()  # Return uppercase for consistency
+    match = _ORDER_ID_PATTERN.match(message)
+    if match:
+        return match.group(match.lastindex).upper()  # Return uppercase for consistency
     
     # Fallback: check if message contains standalone number (3+ digits)
     words = message.split()
@@ -0,0 +1,119 @@
+import asyncio
+import contextvars
+import copy
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+_loader_ctx = contextvars.ContextVar("request_loader", default=None)
+
+
+class RequestLoader:
+    """
+    Per-request identity map for repository reads.
+
+    Values are memoized by (kind, key) for the lifetime of one request, and
+    lookups of the same kind issued in the same event-loop tick can be
+    batched into one query. Callers get a deep copy so mutating a result
+    never changes what the next reader sees. Writes must call invalidate.
+    """
+
+    def __init__(self):
+        self._values: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self._batches: Dict[str, Dict[Hashable, asyncio.Future]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+
+    async def load(self, kind: str, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Memoize a single lookup."""
+        future = self._values.get((kind, key))
+        if future is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            future = asyncio.ensure_future(fetch())
+            self._remember(kind, key, future)
+        return copy.deepcopy(await asyncio.shield(future))
+
+    async def load_many(
+        self,
+        kind: str,
+        key: Hashable,
+        fetch_many: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+    ) -> Any:
+        """
+        Memoize a lookup and batch it with other lookups of the same kind.
+
+        fetch_many receives every key requested before the loop yields and
+        returns a mapping of key to value; missing keys resolve to None.
+        """
+        future = self._values.get((kind, key))
+        if future is not None:
+            self.hits += 1
+            return copy.deepcopy(await asyncio.shield(future))
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._remember(kind, key, future)
+        pending = self._batches.get(kind)
+        if pending is None:
+            pending = self._batches[kind] = {}
+            asyncio.ensure_future(self._dispatch(kind, fetch_many))
+        pending[key] = future
+        return copy.deepcopy(await asyncio.shield(future))
+
+    def invalidate(self, kind: str, key: Optional[Hashable] = None) -> None:
+        """Drop one memoized entry, or every entry of a kind when key is None."""
+        if key is not None:
+            self._values.pop((kind, key), None)
+            return
+        for cached in [cached for cached in self._values if cached[0] == kind]:
+            del self._values[cached]
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "batches": self.batches}
+
+    async def _dispatch(self, kind: str, fetch_many) -> None:
+        # Let the other coroutines started in this tick queue their keys first
+        await asyncio.sleep(0)
+        pending = self._batches.pop(kind, {})
+        self.batches += 1
+        try:
+            found = await fetch_many(list(pending))
+        except Exception as exc:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for key, future in pending.items():
+            if not future.done():
+                future.set_result(found.get(key))
+
+    def _remember(self, kind: str, key: Hashable, future: asyncio.Future) -> None:
+        self._values[(kind, key)] = future
+
+        def _on_done(done: asyncio.Future) -> None:
+            # Failed lookups are not memoized so the next caller retries
+            if done.cancelled() or done.exception() is not None:
+                if self._values.get((kind, key)) is done:
+                    del self._values[(kind, key)]
+
+        future.add_done_callback(_on_done)
+
+
+def get_request_loader() -> Optional[RequestLoader]:
+    return _loader_ctx.get()
+
+
+def start_request_scope() -> contextvars.Token:
+    return _loader_ctx.set(RequestLoader())
+
+
+def end_request_scope(token: Optional[contextvars.Token]) -> None:
+    if token is not None:
+        _loader_ctx.reset(token)
+
+
+def invalidate(kind: str, key: Optional[Hashable] = None) -> None:
+    loader = _loader_ctx.get()
+    if loader is not None:
+        loader.invalidate(kind, key)
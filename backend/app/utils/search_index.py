@@ -0,0 +1,287 @@
+import heapq
+import itertools
+import math
+import re
+from collections import defaultdict
+from typing import Dict, FrozenSet, Hashable, List, Optional, Tuple
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Trigram matches count for less than whole-word matches
+TRIGRAM_WEIGHT = 0.5
+# Candidates rescored with full coverage checks
+RESCORE_CANDIDATES = 50
+# Documents scored when a query has only common words (any of them is an equally good match)
+MAX_COMMON_CANDIDATES = 200
+# Upper bound on documents examined while looking for those candidates
+MAX_SCANNED = 2000
+
+
+def _stem(token: str) -> str:
+    # Enough to make "shirts" find "shirt"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(token) for token in _TOKEN_PATTERN.findall((text or "").lower())]
+
+
+def trigrams(tokens: List[str]) -> List[str]:
+    grams = []
+    for token in tokens:
+        padded = f"<{token}>"
+        grams += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    return grams
+
+
+class _Field:
+    """Postings and length statistics for one kind of term (tokens or trigrams)."""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[Hashable, int]] = defaultdict(dict)
+        self.lengths: Dict[Hashable, int] = {}
+        self.total_length = 0
+
+    def add(self, doc_id: Hashable, terms: List[str]) -> None:
+        counts: Dict[str, int] = defaultdict(int)
+        for term in terms:
+            counts[term] += 1
+        for term, count in counts.items():
+            self.postings[term][doc_id] = count
+        self.lengths[doc_id] = len(terms)
+        self.total_length += len(terms)
+
+    def remove(self, doc_id: Hashable, terms: List[str]) -> None:
+        for term in set(terms):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_length -= self.lengths.pop(doc_id, 0)
+
+    def term_scorer(self, term: str):
+        """BM25 weight of term for a document, as a function of (doc_id, frequency)."""
+        count = len(self.lengths)
+        average = self.total_length / count
+        df = len(self.postings.get(term, ()))
+        idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+
+        def score(doc_id: Hashable, frequency: int) -> float:
+            norm = frequency + K1 * (1 - B + B * self.lengths[doc_id] / average)
+            return idf * frequency * (K1 + 1) / norm
+
+        return score
+
+    def score(self, terms: List[str], scores: Dict[Hashable, float], weight: float, max_postings: int) -> List[str]:
+        """Add BM25 scores for terms to scores; returns the matching terms skipped for being too common."""
+        if not self.lengths:
+            return []
+        skipped = []
+        for term in set(terms):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            if len(posting) > max_postings:
+                skipped.append(term)
+                continue
+            scorer = self.term_scorer(term)
+            for doc_id, frequency in posting.items():
+                scores[doc_id] += weight * scorer(doc_id, frequency)
+        return skipped
+
+    def score_docs(self, terms: List[str], doc_ids, scores: Dict[Hashable, float], weight: float) -> None:
+        """Add BM25 scores for terms, but only to the given documents."""
+        for term in terms:
+            posting = self.postings[term]
+            scorer = self.term_scorer(term)
+            for doc_id in doc_ids:
+                frequency = posting.get(doc_id)
+                if frequency:
+                    scores[doc_id] += weight * scorer(doc_id, frequency)
+
+
+def _documents_in(postings: List[Dict[Hashable, int]], needed: int, limit: int) -> List[Hashable]:
+    """
+    Up to limit documents found in at least needed of the posting lists.
+
+    A document in needed of n lists must be in one of the n - needed + 1
+    shortest, so only those are walked (at most MAX_SCANNED documents);
+    the rest are probed.
+    """
+    if needed <= 0 or needed > len(postings):
+        return []
+    postings = sorted(postings, key=len)
+    found = []
+    if needed == len(postings):
+        # Documents in every list: walk the shortest, stop at limit
+        for doc_id in itertools.islice(postings[0], MAX_SCANNED):
+            if all(doc_id in other for other in postings[1:]):
+                found.append(doc_id)
+                if len(found) >= limit:
+                    break
+        return found
+    seen = set()
+    for posting in postings[:len(postings) - needed + 1]:
+        for doc_id in posting:
+            if doc_id in seen:
+                continue
+            if len(seen) >= MAX_SCANNED:
+                return found
+            seen.add(doc_id)
+            if sum(1 for other in postings if doc_id in other) >= needed:
+                found.append(doc_id)
+                if len(found) >= limit:
+                    return found
+    return found
+
+
+def _best_candidates(postings: List[Dict[Hashable, int]], fewest: int) -> List[Hashable]:
+    """Documents found in the most posting lists, trying every count down to fewest."""
+    for needed in range(len(postings), fewest - 1, -1):
+        found = _documents_in(postings, needed, MAX_COMMON_CANDIDATES)
+        if found:
+            return found
+    return []
+
+
+def _typos_allowed(word: str) -> int:
+    if len(word) < 4:
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def _within_typos(word: str, candidate: str, limit: int) -> bool:
+    """Restricted Damerau-Levenshtein distance (adjacent swaps count once) of at most limit."""
+    if abs(len(word) - len(candidate)) > limit:
+        return False
+    previous2 = None
+    previous = list(range(len(candidate) + 1))
+    for i in range(1, len(word) + 1):
+        current = [i] + [0] * len(candidate)
+        for j in range(1, len(candidate) + 1):
+            cost = 0 if word[i - 1] == candidate[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and i > 1 and j > 1
+                    and word[i - 1] == candidate[j - 2] and word[i - 2] == candidate[j - 1]):
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return False
+        previous2, previous = previous, current
+    return previous[-1] <= limit
+
+
+def _words_matched(
+    query_tokens: List[str], doc_tokens: FrozenSet[str], typo_memo: Dict[Tuple[str, str], bool]
+) -> Optional[int]:
+    """How many query words the document has verbatim, or None if some word is missing even allowing typos."""
+    exact = 0
+    for token in query_tokens:
+        if token in doc_tokens:
+            exact += 1
+            continue
+        limit = _typos_allowed(token)
+        if not limit:
+            return None
+        for candidate in doc_tokens:
+            key = (token, candidate)
+            if key not in typo_memo:
+                typo_memo[key] = _within_typos(token, candidate, limit)
+            if typo_memo[key]:
+                break
+        else:
+            return None
+    return exact
+
+
+class SearchIndex:
+    """
+    In-memory BM25 index over a title and a secondary text per document.
+
+    Titles are indexed as stemmed tokens and as character trigrams; the
+    secondary text (e.g. a category) is indexed as tokens only. Candidates
+    come from token and trigram postings, so misspelled queries ("adidas
+    shrit") still find their document. A result must then contain every
+    query word, verbatim or within one typo (two for words of eight or more
+    letters). Titles containing the query verbatim rank first, then titles
+    with more verbatim words, then BM25 score.
+
+    Terms found in more than max(common_floor, common_ratio * documents)
+    documents are not walked in full: they only add to the scores of
+    candidates found through rarer terms, or, when nothing rarer matches,
+    of a bounded set of documents containing as many of them as possible.
+    This keeps lookups fast on large catalogs.
+    """
+
+    def __init__(self, common_ratio: float = 0.02, common_floor: int = 200):
+        self.common_ratio = common_ratio
+        self.common_floor = common_floor
+        self._tokens = _Field()
+        self._trigrams = _Field()
+        self._docs: Dict[Hashable, Tuple[str, List[str], List[str], FrozenSet[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc_id: Hashable, title: str, secondary: str = "") -> None:
+        if doc_id in self._docs:
+            self.remove(doc_id)
+        title_tokens = tokenize(title)
+        tokens = title_tokens + tokenize(secondary)
+        grams = trigrams(title_tokens)
+        self._docs[doc_id] = (" ".join(title_tokens), tokens, grams, frozenset(tokens))
+        self._tokens.add(doc_id, tokens)
+        self._trigrams.add(doc_id, grams)
+
+    def remove(self, doc_id: Hashable) -> None:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        _, tokens, grams, _ = doc
+        self._tokens.remove(doc_id, tokens)
+        self._trigrams.remove(doc_id, grams)
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[Hashable, float]]:
+        """Best matches for query as (doc_id, score), best first."""
+        query_tokens = tokenize(query)
+        if not query_tokens or not self._docs:
+            return []
+        query_grams = trigrams(query_tokens)
+        max_postings = max(self.common_floor, int(self.common_ratio * len(self._docs)))
+
+        scores: Dict[Hashable, float] = defaultdict(float)
+        common_tokens = self._tokens.score(query_tokens, scores, 1.0, max_postings)
+        common_grams = self._trigrams.score(query_grams, scores, TRIGRAM_WEIGHT, max_postings)
+        if not scores and common_tokens:
+            # Only common words matched: documents with as many of them as possible
+            candidates = _best_candidates([self._tokens.postings[token] for token in common_tokens], 1)
+            self._tokens.score_docs(common_tokens, candidates, scores, 1.0)
+        elif common_tokens:
+            self._tokens.score_docs(common_tokens, list(scores), scores, 1.0)
+        misspelled = any(token not in self._tokens.postings for token in query_tokens)
+        if common_grams and (not scores or misspelled):
+            # Misspelled words made only of common trigrams
+            fewest = math.ceil(len(set(query_grams)) / 2)
+            candidates = _best_candidates([self._trigrams.postings[gram] for gram in common_grams], fewest)
+            self._trigrams.score_docs(common_grams, candidates, scores, TRIGRAM_WEIGHT)
+
+        phrase = " ".join(query_tokens)
+        # Candidates share most of their words, so each typo comparison is done once per query
+        typo_memo: Dict[Tuple[str, str], bool] = {}
+        ranked = []
+        for doc_id, score in heapq.nlargest(RESCORE_CANDIDATES, scores.items(), key=lambda item: item[1]):
+            title, _, _, doc_tokens = self._docs[doc_id]
+            exact = _words_matched(query_tokens, doc_tokens, typo_memo)
+            if exact is not None:
+                ranked.append(((phrase in title, exact, score), doc_id))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return [(doc_id, key[2]) for key, doc_id in ranked[:limit]]
+
+    def best(self, query: str) -> Optional[Hashable]:
+        results = self.search(query, limit=1)
+        return results[0][0] if results else None
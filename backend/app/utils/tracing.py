@@ -0,0 +1,111 @@
+import contextvars
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_trace_ctx = contextvars.ContextVar("trace", default=None)
+
+_TOKEN_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class Trace:
+    """
+    Timing spans for one request.
+
+    Tasks started during the request inherit the context, so spans from
+    concurrent agents and hedged LLM calls all land in the same trace.
+    """
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+
+    def add(self, name: str, started: float, ended: float, **attrs: Any) -> None:
+        self.spans.append({
+            "name": name,
+            "start_ms": round((started - self.started) * 1000, 2),
+            "duration_ms": round((ended - started) * 1000, 2),
+            **{key: value for key, value in attrs.items() if value is not None},
+        })
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"request_id": self.request_id, "total_ms": self.elapsed_ms(), "spans": list(self.spans)}
+
+    def server_timing(self) -> str:
+        """Spans in Server-Timing header syntax, plus the elapsed total."""
+        entries = []
+        for recorded in self.spans:
+            entry = f"{_TOKEN_UNSAFE.sub('_', recorded['name'])};dur={recorded['duration_ms']}"
+            detail = recorded.get("provider") or recorded.get("intent")
+            if detail:
+                entry += f';desc="{_TOKEN_UNSAFE.sub("_", str(detail))}"'
+            entries.append(entry)
+        entries.append(f"total;dur={self.elapsed_ms()}")
+        return ", ".join(entries)
+
+
+def start_trace(request_id: str) -> contextvars.Token:
+    return _trace_ctx.set(Trace(request_id))
+
+
+def end_trace(token: Optional[contextvars.Token]) -> None:
+    if token is not None:
+        _trace_ctx.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace_ctx.get()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Time the enclosed block as a span of the current trace; no-op outside a traced request.
+
+    Yields a dict the block can add attributes to. A block that raises
+    (or is cancelled) records the exception class as "error".
+    """
+    trace = _trace_ctx.get()
+    if trace is None:
+        yield attrs
+        return
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as exc:
+        attrs["error"] = type(exc).__name__
+        raise
+    finally:
+        trace.add(name, started, time.perf_counter(), **attrs)
+
+
+def record_span(name: str, started: float, **attrs: Any) -> None:
+    """Record a span that started at perf_counter() value started and ends now."""
+    trace = _trace_ctx.get()
+    if trace is not None:
+        trace.add(name, started, time.perf_counter(), **attrs)
+
+
+def export_trace(trace: Trace, span_file: str = "") -> None:
+    """Log a finished trace as one structured record and optionally append it to a JSON-lines file."""
+    if not trace.spans:
+        return
+    record = trace.to_dict()
+    stages = ", ".join(f"{recorded['name']} {recorded['duration_ms']}ms" for recorded in record["spans"])
+    logger.info(f"Request trace: {record['total_ms']}ms ({stages})", extra={"trace": record})
+    if not span_file:
+        return
+    try:
+        with open(span_file, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record) + "\n")
+    except OSError as exc:
+        logger.warning(f"Could not write span file {span_file}: {exc}")
@@ -0,0 +1,91 @@
+"""
+Microbenchmark for extract_product_name and extract_order_id.
+
+Compares the precompiled single-regex versions with the previous
+per-call re.sub/re.search loops, after checking both return the same result
+for every sample. Run from the backend directory:
+
+    python -m benchmarks.parsers_benchmark
+"""
+import re
+import time
+
+from app.utils.parsers import extract_order_id, extract_product_name
+
+MESSAGES = [
+    "Add the Adidas shirt to cart",
+    "Put Nike shoes in my cart",
+    "I want the iPhone",
+    "show me Nike shoes",
+    "do you have the Sony headphones in stock?",
+    "is there a Premium Puma T-Shirt - Black available",
+    "please remove the red sneakers from my shopping cart",
+    "where is order #ORD-48213, it should have arrived last week",
+    "track 550e8400-e29b-41d4-a716-446655440000",
+    "I need to return order 12345 because the zipper is broken",
+    "can you check stock for the Classic Levi's 501 jeans size 32 in blue, I'll take two if available",
+]
+
+
+def legacy_extract_product_name(message):
+    message_cleaned = message.lower()
+    remove_words = [
+        "add", "put", "place", "to", "the", "a", "an", "my", "in", "into",
+        "cart", "shopping cart", "basket", "available", "stock", "check",
+        "is there", "do you have", "show me", "find", "search", "for",
+        "i want", "i need", "i'll take", "give me", "get me", "this", "that"
+    ]
+    for word in remove_words:
+        message_cleaned = re.sub(r'\b' + re.escape(word) + r'\b', '', message_cleaned, flags=re.IGNORECASE)
+    message_cleaned = re.sub(r'\s+', ' ', message_cleaned).strip()
+    return message_cleaned if message_cleaned else None
+
+
+def legacy_extract_order_id(message):
+    message = message.strip()
+    patterns = [
+        r'order[:\s#-]+([a-zA-Z0-9\-]{3,})',
+        r'#([a-zA-Z0-9\-]{3,})',
+        r'\b([a-fA-F0-9\-]{30,})\b',
+        r'\b(ORD-\d+)\b',
+        r'\b(ORDER\d+)\b',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, message, re.IGNORECASE)
+        if match:
+            return match.group(1).upper()
+    for word in message.split():
+        cleaned = word.strip('#:')
+        if cleaned.isdigit() and len(cleaned) >= 3:
+            return cleaned
+    return None
+
+
+def calls_per_second(fn, messages, rounds: int = 2000) -> float:
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for message in messages:
+                fn(message)
+        best = min(best, time.perf_counter() - start)
+    return rounds * len(messages) / best
+
+
+def main():
+    for message in MESSAGES:
+        assert extract_product_name(message) == legacy_extract_product_name(message), message
+        assert extract_order_id(message) == legacy_extract_order_id(message), message
+
+    print(f"{'function':<22} {'legacy calls/s':>15} {'compiled calls/s':>17} {'speedup':>8}")
+    for name, new, old in (
+        ("extract_product_name", extract_product_name, legacy_extract_product_name),
+        ("extract_order_id", extract_order_id, legacy_extract_order_id),
+    ):
+        legacy = calls_per_second(old, MESSAGES)
+        compiled = calls_per_second(new, MESSAGES)
+        print(f"{name:<22} {legacy:>15.0f} {compiled:>17.0f} {compiled / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark for product name lookups on a 100k-product catalog.
+
+Compares SearchIndex with the previous find_product_by_name strategy: a
+case-insensitive $regex on the raw name, then a chain of (?=.*keyword)
+lookaheads. Neither regex can use an index, so MongoDB runs each one as a
+collection scan; here the scan is replayed in process over the same
+documents, which understates MongoDB's per-query overhead but keeps the
+per-document work. Run from the backend directory:
+
+    python -m benchmarks.product_search_benchmark [--products 100000]
+"""
+import argparse
+import random
+import re
+import statistics
+import time
+
+from app.utils.search_index import SearchIndex
+from load_products import CATEGORIES, generate_product
+
+QUERIES = [
+    "adidas shirt",
+    "sony headphones",
+    "running shoes",
+    "premium nike sneakers",
+    "slim fit jeans",
+    "smart watch",
+    "hedphones",
+    "adidas shrit",
+    "laptop",
+]
+
+
+def legacy_find_product_by_name(products, product_name):
+    exact = re.compile(product_name, re.IGNORECASE)
+    for product in products:
+        if exact.search(product["name"]):
+            return product
+    keywords = product_name.split()
+    if len(keywords) > 1:
+        pattern = re.compile("".join(f"(?=.*{re.escape(kw)})" for kw in keywords), re.IGNORECASE)
+        for product in products:
+            if pattern.search(product["name"]):
+                return product
+    return None
+
+
+def median_ms(fn, query, rounds):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(query)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100_000)
+    args = parser.parse_args()
+
+    random.seed(7)
+    categories = list(CATEGORIES)
+    products = []
+    for index in range(args.products):
+        category = random.choice(categories)
+        product = generate_product(category, random.choice(CATEGORIES[category]))
+        product["product_id"] = str(index)
+        products.append(product)
+
+    start = time.perf_counter()
+    search_index = SearchIndex()
+    for product in products:
+        search_index.add(product["product_id"], product["name"], product["category"])
+    print(f"Indexed {len(products)} products in {time.perf_counter() - start:.1f}s\n")
+
+    by_id = {product["product_id"]: product for product in products}
+    print(f"{'query':<24} {'regex scan ms':>14} {'index ms':>9}  {'regex result':<36} index result")
+    for query in QUERIES:
+        legacy = legacy_find_product_by_name(products, query)
+        best = search_index.best(query)
+        legacy_ms = median_ms(lambda q: legacy_find_product_by_name(products, q), query, 5)
+        index_ms = median_ms(search_index.best, query, 50)
+        print(
+            f"{query:<24} {legacy_ms:>14.2f} {index_ms:>9.3f}  "
+            f"{(legacy or {}).get('name', '-'):<36} {by_id[best]['name'] if best else '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import asyncio
 import random
 import uuid
+from datetime import datetime
 from app.core.database import connect_db, close_db, get_database
 
 CATEGORIES = {
@@ -64,10 +65,13 @@ async def load_products():
     await products_collection.delete_many({})
     
     products = []
+    loaded_at = datetime.utcnow()
     for _ in range(200):
         category = random.choice(list(CATEGORIES.keys()))
         product_type = random.choice(CATEGORIES[category])
         product = generate_product(category, product_type)
+        # Running servers pick up catalog changes by polling updated_at
+        product["updated_at"] = loaded_at
         products.append(product)
     
     result = await products_collection.insert_many(products)
@@ -0,0 +1,117 @@
+import json
+
+
+def _parse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = block.split("\n")
+        event = lines[0].split(": ", 1)[1]
+        data = json.loads(lines[1].split(": ", 1)[1])
+        events.append((event, data))
+    return events
+
+
+def test_chat_stream_sends_actions_then_tokens(client, monkeypatch):
+    import app.orchestrator.router as router
+    import app.repositories.session_repository as session_repo
+    import app.services.llm_service as llm_service
+
+    saved = []
+
+    async def fake_prepare_request(*args, **kwargs):
+        return {
+            "intent": "recommendation",
+            "actions": [{"type": "show_products", "data": [], "verified": True}],
+            "prompt": "prompt",
+            "reply": None,
+        }
+
+    async def fake_stream_response(prompt):
+        for chunk in ["Hello", " there"]:
+            yield chunk
+
+    async def fake_save_message(session_id, user_id, role, text, **kwargs):
+        saved.append((role, text))
+
+    monkeypatch.setattr(router, "prepare_request", fake_prepare_request)
+    monkeypatch.setattr(llm_service, "stream_response", fake_stream_response)
+    monkeypatch.setattr(session_repo, "save_message", fake_save_message)
+
+    response = client.post(
+        "/chat/stream",
+        headers={"X-Session-Id": "s1"},
+        json={"user_id": "guest_s1", "session_id": "s1", "message": "recommend shoes", "channel": "web"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_events(response.text)
+    assert [name for name, _ in events] == ["actions", "token", "token", "done"]
+    assert events[0][1]["actions"][0]["type"] == "show_products"
+    assert events[-1][1]["reply"] == "Hello there"
+    assert saved == [("user", "recommend shoes"), ("assistant", "Hello there")]
+
+
+def test_chat_stream_skips_llm_for_unverified_actions(client, monkeypatch):
+    import app.orchestrator.router as router
+    import app.repositories.session_repository as session_repo
+    import app.services.llm_service as llm_service
+
+    async def fake_prepare_request(*args, **kwargs):
+        return {
+            "intent": "cart",
+            "actions": [{"type": "cart_updated", "data": {}, "verified": False}],
+            "prompt": "prompt",
+            "reply": None,
+        }
+
+    async def failing_stream_response(prompt):
+        raise AssertionError("LLM should not be called")
+        yield
+
+    async def fake_save_message(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(router, "prepare_request", fake_prepare_request)
+    monkeypatch.setattr(llm_service, "stream_response", failing_stream_response)
+    monkeypatch.setattr(session_repo, "save_message", fake_save_message)
+
+    response = client.post(
+        "/chat/stream",
+        headers={"X-Session-Id": "s1"},
+        json={"user_id": "guest_s1", "session_id": "s1", "message": "add widget", "channel": "web"}
+    )
+
+    events = _parse_events(response.text)
+    assert "pending backend confirmation" in events[-1][1]["reply"]
+
+
+def test_chat_stream_reports_server_timing(client, monkeypatch):
+    import app.orchestrator.router as router
+    import app.repositories.session_repository as session_repo
+    import app.services.llm_service as llm_service
+    from app.middleware import tracing
+
+    async def fake_prepare_request(*args, **kwargs):
+        return {"intent": "general", "actions": [], "prompt": "prompt", "reply": None}
+
+    async def fake_stream_response(prompt):
+        yield "Hi"
+
+    async def fake_save_message(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(router, "prepare_request", fake_prepare_request)
+    monkeypatch.setattr(llm_service, "stream_response", fake_stream_response)
+    monkeypatch.setattr(session_repo, "save_message", fake_save_message)
+    monkeypatch.setattr(tracing.settings, "tracing_server_timing", True)
+
+    response = client.post(
+        "/chat/stream",
+        headers={"X-Session-Id": "s1"},
+        json={"user_id": "guest_s1", "session_id": "s1", "message": "hello", "channel": "web"}
+    )
+
+    timing = response.headers["server-timing"]
+    assert timing.startswith("save_user_message;dur=")
+    assert timing.split(", ")[-1].startswith("total;dur=")
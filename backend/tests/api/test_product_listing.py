@@ -0,0 +1,100 @@
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+        self.skipped = 0
+        self.limited = None
+
+    def sort(self, spec):
+        self.spec = spec
+        return self
+
+    def skip(self, count):
+        self.skipped = count
+        return self
+
+    def limit(self, count):
+        self.limited = count
+        return self
+
+    async def to_list(self, length):
+        end = None if self.limited is None else self.skipped + self.limited
+        return self.docs[self.skipped:end]
+
+
+class FakeProducts:
+    def __init__(self, docs):
+        self.docs = docs
+        self.filters = []
+        self.pipelines = []
+
+    def find(self, query_filter, projection=None):
+        self.filters.append(query_filter)
+        return FakeCursor(self.docs)
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        page = pipeline[-1]["$facet"]["page"]
+        limit = page[-1]["$limit"]
+        result = {
+            "page": self.docs[:limit],
+            "total": [{"count": len(self.docs)}],
+            "category": [{"_id": "shirts", "count": len(self.docs)}],
+            "stock": [{"_id": "in_stock", "count": len(self.docs)}],
+            "price": [{"_id": 25, "count": len(self.docs)}],
+        }
+        return FakeCursor([result])
+
+
+def _use_products(monkeypatch, docs):
+    products = FakeProducts(docs)
+    db = type("FakeDb", (), {"products": products})()
+    monkeypatch.setattr("app.main.get_database", lambda: db)
+    monkeypatch.setattr("app.repositories.product_repository.get_database", lambda: db)
+    return products
+
+
+def test_skip_mode_returns_page_total_and_facets_in_one_round_trip(client, monkeypatch):
+    docs = [{"_id": f"id{i}", "name": f"Product {i}"} for i in range(3)]
+    products = _use_products(monkeypatch, docs)
+
+    response = client.get("/products", params={"limit": 2})
+
+    data = response.json()["data"]
+    assert [product["name"] for product in data["products"]] == ["Product 0", "Product 1"]
+    assert data["total"] == 3
+    assert data["pages"] == 2
+    assert data["next_cursor"]
+    assert data["facets"]["category"] == {"shirts": 3}
+    assert data["facets"]["stock"] == {"out_of_stock": 0, "low_stock": 0, "in_stock": 3}
+    assert data["facets"]["price"][1] == {"min": 25, "max": 50, "count": 3}
+    assert data["facets"]["price"][-1] == {"min": 500, "max": None, "count": 0}
+    assert len(products.pipelines) == 1
+    assert products.filters == []
+
+
+def test_cursor_mode_filters_past_cursor_without_counting(client, monkeypatch):
+    docs = [{"_id": f"id{i}", "name": f"Product {i}"} for i in range(3)]
+    products = _use_products(monkeypatch, docs)
+    next_cursor = client.get("/products", params={"limit": 2, "category": "shirts"}).json()["data"]["next_cursor"]
+    products.pipelines = []
+
+    response = client.get("/products", params={"limit": 2, "category": "shirts", "cursor": next_cursor})
+
+    data = response.json()["data"]
+    assert "total" not in data
+    assert "facets" not in data
+    assert products.pipelines == []
+    assert products.filters[-1] == {"$and": [
+        {"category": "shirts"},
+        {"$or": [{"name": {"$gt": "Product 1"}}, {"name": "Product 1", "_id": {"$gt": "id1"}}]},
+    ]}
+
+
+def test_cursor_for_another_sort_is_rejected(client, monkeypatch):
+    docs = [{"_id": f"id{i}", "name": f"Product {i}"} for i in range(3)]
+    _use_products(monkeypatch, docs)
+    next_cursor = client.get("/products", params={"limit": 2}).json()["data"]["next_cursor"]
+
+    response = client.get("/products", params={"limit": 2, "sort_by": "price", "cursor": next_cursor})
+
+    assert response.status_code == 400
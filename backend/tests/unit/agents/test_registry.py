@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+
+from app.agents.registry import AgentSpec, LatencyHistogram
+
+
+@pytest.mark.asyncio
+async def test_timeout_returns_fallback_and_records_latency():
+    async def slow(user_id, session_id, message):
+        await asyncio.sleep(5)
+
+    spec = AgentSpec("pos_sync", slow, timeout=0.02, fallback={"success": False, "verified": False})
+    result, actions = await spec.run("u1", "s1", "sync stock")
+
+    assert result == {"success": False, "verified": False} and actions == []
+    snapshot = spec.snapshot()
+    assert snapshot["calls"] == 1 and snapshot["timeouts"] == 1
+    assert snapshot["latency"]["count"] == 1 and snapshot["latency"]["buckets"]["0.01"] == 0
+
+
+@pytest.mark.asyncio
+async def test_max_concurrency_limits_parallel_calls():
+    running = 0
+    peak = 0
+
+    async def handler(user_id, session_id, message):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return message, []
+
+    spec = AgentSpec("proactive", handler, timeout=0, max_concurrency=2)
+    results = await asyncio.gather(*(spec.run("u1", "s1", str(i)) for i in range(5)))
+
+    assert [result for result, _ in results] == ["0", "1", "2", "3", "4"]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_and_are_counted():
+    async def broken(user_id, session_id, message):
+        raise ValueError("boom")
+
+    spec = AgentSpec("payment", broken)
+    with pytest.raises(ValueError):
+        await spec.run("u1", "s1", "pay")
+    assert spec.snapshot()["errors"] == 1
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = LatencyHistogram((0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(seconds)
+    assert histogram.snapshot()["buckets"] == {"0.1": 1, "1.0": 3, "+Inf": 4}
+
+
+@pytest.mark.asyncio
+async def test_timed_out_write_agent_still_completes_its_write():
+    written = []
+
+    async def slow_write(user_id, session_id, message):
+        await asyncio.sleep(0.05)
+        written.append(message)
+        return {"success": True}, []
+
+    spec = AgentSpec("post_purchase", slow_write, timeout=0.01, writes=True)
+    result, actions = await spec.run("u1", "s1", "cancel order ORD1")
+
+    assert result is None and actions == []
+    assert spec.snapshot()["timeouts"] == 1
+    await asyncio.sleep(0.1)
+    assert written == ["cancel order ORD1"]
+    assert spec.snapshot()["errors"] == 0
@@ -0,0 +1,83 @@
+"""
+Unit tests for the hashed n-gram intent classifier
+"""
+import time
+import pytest
+
+from app.orchestrator import classifier
+from app.orchestrator.classifier import IntentClassifier, classify_intent, classify_many
+
+EXAMPLES = [
+    ("recommend me a laptop", "recommendation"),
+    ("suggest some running shoes", "recommendation"),
+    ("what would you suggest for a gift", "recommendation"),
+    ("any ideas for a birthday present", "recommendation"),
+    ("where is my parcel", "tracking"),
+    ("has my package shipped yet", "tracking"),
+    ("when does my order arrive", "tracking"),
+    ("track my delivery please", "tracking"),
+    ("i want my money back", "post_purchase"),
+    ("the zipper arrived broken", "post_purchase"),
+    ("refund my last order", "post_purchase"),
+    ("this item is damaged", "post_purchase"),
+]
+
+
+@pytest.fixture
+def model():
+    return IntentClassifier.train([t for t, _ in EXAMPLES], [i for _, i in EXAMPLES], n_features=2 ** 12)
+
+
+@pytest.fixture
+def loaded(model, monkeypatch):
+    monkeypatch.setattr(classifier, "_model", model)
+    monkeypatch.setattr(classifier, "_model_loaded", True)
+    return model
+
+
+def test_predicts_training_intents(model):
+    predictions = model.predict(["where is my parcel now", "my money back please", "suggest a laptop"])
+    assert [intent for intent, _ in predictions] == ["tracking", "post_purchase", "recommendation"]
+    assert all(0.0 < confidence <= 1.0 for _, confidence in predictions)
+
+
+def test_save_and_load_round_trip(model, tmp_path):
+    path = str(tmp_path / "model" / "intent.npz")
+    model.save(path)
+    restored = IntentClassifier.load(path)
+    assert restored.labels == model.labels
+    assert restored.predict(["has it shipped"]) == model.predict(["has it shipped"])
+
+
+def test_low_confidence_uses_keyword_rules(loaded, monkeypatch):
+    monkeypatch.setattr(classifier.settings, "intent_min_confidence", 1.01)
+    assert classify_intent("add to cart") == ("cart", 0.0)
+
+
+def test_confident_prediction_wins_over_keywords(loaded, monkeypatch):
+    monkeypatch.setattr(classifier.settings, "intent_min_confidence", 0.5)
+    intent, confidence = classify_intent("has my package shipped")
+    assert intent == "tracking"
+    assert confidence >= 0.5
+
+
+def test_without_model_falls_back(monkeypatch):
+    monkeypatch.setattr(classifier, "_model", None)
+    monkeypatch.setattr(classifier, "_model_loaded", True)
+    assert classify_many(["track my order", ""]) == [("tracking", 0.0), ("general", 0.0)]
+
+
+def test_missing_artifact_leaves_keyword_rules(tmp_path, monkeypatch):
+    monkeypatch.setattr(classifier, "_model", None)
+    monkeypatch.setattr(classifier, "_model_loaded", False)
+    assert classifier.load_intent_classifier(str(tmp_path / "missing.npz")) is None
+    assert classifier.get_intent_classifier() is None
+
+
+def test_single_message_is_fast(monkeypatch):
+    model = IntentClassifier.train([t for t, _ in EXAMPLES], [i for _, i in EXAMPLES])
+    model.predict(["warm up"])
+    started = time.perf_counter()
+    for _ in range(100):
+        model.predict(["where is my order, it was supposed to arrive yesterday"])
+    assert (time.perf_counter() - started) / 100 < 0.001
@@ -0,0 +1,61 @@
+"""
+Unit tests for context building
+"""
+import pytest
+from unittest.mock import AsyncMock, patch
+
+
+def _patch_repositories(session=None, cart=None, user=None):
+    return (
+        patch("app.orchestrator.context.get_session", new_callable=AsyncMock, return_value=session),
+        patch("app.orchestrator.context.get_cart", new_callable=AsyncMock, return_value=cart or []),
+        patch("app.orchestrator.context.get_user", new_callable=AsyncMock, return_value=user),
+    )
+
+
+@pytest.mark.asyncio
+async def test_build_context_includes_all_sections():
+    from app.orchestrator.context import build_context
+
+    patches = _patch_repositories(
+        session={"summary": "Asked about shoes", "last_messages": [{"role": "user", "text": "hi"}]},
+        cart=[{"name": "Nike Air", "quantity": 2}],
+        user={"preferences": {"category": "shoes"}},
+    )
+    with patches[0], patches[1], patches[2]:
+        prompt = await build_context("u1", "s1", "what's in my cart?")
+
+    assert prompt.section_names() == ["policy", "summary", "preferences", "cart", "recent", "current"]
+    rendered = prompt.render()
+    assert "=== CART ===\n- Nike Air x2" in rendered
+    assert rendered.endswith("=== CURRENT ===\nUSER: what's in my cart?")
+
+
+@pytest.mark.asyncio
+async def test_build_context_drops_summary_before_current_message(monkeypatch):
+    from app.orchestrator import context
+    from app.orchestrator.prompt_builder import count_tokens
+
+    monkeypatch.setattr(context, "prompt_token_budget", lambda: 120)
+    patches = _patch_repositories(session={"summary": "older " * 500})
+    with patches[0], patches[1], patches[2]:
+        prompt = await context.build_context("u1", "s1", "track order 12345")
+
+    rendered = prompt.render()
+    assert "USER: track order 12345" in rendered
+    assert "=== ACTION POLICY ===" in rendered
+    assert count_tokens(rendered) <= 120
+
+
+@pytest.mark.asyncio
+async def test_build_context_reads_session_once_with_projection():
+    from app.orchestrator.context import build_context, CONTEXT_SESSION_PROJECTION
+
+    patches = _patch_repositories(session={"last_messages": [{"role": "user", "text": "hi"}]})
+    with patches[0] as get_session, patches[1] as get_cart, patches[2] as get_user:
+        prompt = await build_context("guest_1", "s1", "hello")
+
+    get_session.assert_awaited_once_with("s1", "guest_1", projection=CONTEXT_SESSION_PROJECTION)
+    get_cart.assert_awaited_once_with("guest", "s1")
+    get_user.assert_awaited_once_with("guest_1")
+    assert "USER: hi" in prompt.render()
@@ -143,3 +143,60 @@ class TestIntentDetection:
         # Cart keywords should be detected even with other words
         assert detect_intent("I want to add Nike shoes to cart") == "cart"
         assert detect_intent("Help me find shoes and add to cart") == "cart"
+    
+    def test_overlapping_keywords(self):
+        """Test keywords that start inside or at the same place as longer ones"""
+        assert detect_intent("add this and another one") == "cart"
+        assert detect_intent("i want that too") == "cart"
+        assert detect_intent("put it in the basket") == "cart"
+        assert detect_intent("is it in stock at the in-store pos?") == "inventory"
+        assert detect_intent("please stop") == "recommendation"
+        assert detect_intent("view my points balance") == "general"
+        assert detect_intent("my cart has a coupon") == "loyalty"
+    
+    def test_regex_fallback_matches_automaton(self, monkeypatch):
+        """Test the regex matcher used without pyahocorasick gives the same intents"""
+        from app.orchestrator import intent
+        
+        messages = [
+            "add this and another one", "i want that too", "put it in the basket",
+            "is it in stock at the in-store pos?", "please stop", "my cart has a coupon",
+            "where is my order? " * 200, "proceed to payment", "refund the broken one",
+        ]
+        expected = [detect_intent(msg) for msg in messages]
+        monkeypatch.setattr(intent, "ahocorasick", None)
+        regex_matcher, _ = intent._compile_matcher(intent._TERMS)
+        monkeypatch.setattr(intent, "_MATCHER", regex_matcher)
+        assert [detect_intent(msg) for msg in messages] == expected
+
+
+class TestMultiIntentDetection:
+    """Test clause-level intent detection for compound messages"""
+    
+    def test_compound_message(self):
+        from app.orchestrator.intent import detect_intents
+        assert detect_intents("add the Nike shoes to my cart and where is order 12345") == [
+            ("cart", "add the Nike shoes to my cart"),
+            ("tracking", "where is order 12345"),
+        ]
+    
+    def test_single_intent_and_product_names(self):
+        from app.orchestrator.intent import detect_intents
+        assert detect_intents("show me black and white shirts") == [("recommendation", "show me black and white shirts")]
+        assert detect_intents("") == []
+    
+    def test_never_splits_inside_the_words_an_intent_came_from(self):
+        from app.orchestrator.intent import detect_intents
+        assert detect_intents("remove the black and white sneakers from my cart and where is order 12345") == [
+            ("cart", "remove the black and white sneakers from my cart"),
+            ("tracking", "where is order 12345"),
+        ]
+        assert detect_intents("where is order 1 and add black and white shoes to cart") == [
+            ("tracking", "where is order 1"),
+            ("cart", "add black and white shoes to cart"),
+        ]
+    
+    def test_limit_and_duplicates(self):
+        from app.orchestrator.intent import detect_intents
+        message = "track order 1, track order 2, refund order 3, then recommend shoes"
+        assert [intent for intent, _ in detect_intents(message, max_intents=2)] == ["tracking", "post_purchase"]
@@ -0,0 +1,76 @@
+"""
+Unit tests for token-budgeted prompt assembly
+"""
+from app.orchestrator.prompt_builder import (
+    PromptBuilder,
+    count_tokens,
+    truncate_to_tokens,
+    PRIORITY_POLICY,
+    PRIORITY_CURRENT,
+    PRIORITY_CART,
+    PRIORITY_RECENT,
+    PRIORITY_SUMMARY,
+)
+
+
+class TestPromptBuilder:
+    """Test section ordering, caps and budget enforcement"""
+
+    def test_renders_sections_in_insertion_order_without_budget(self):
+        prompt = PromptBuilder()
+        prompt.add("policy", "Policy.", PRIORITY_POLICY)
+        prompt.add("cart", "- Shoes x1", PRIORITY_CART, header="\n\n=== CART ===\n")
+        prompt.add("current", "USER: hi", PRIORITY_CURRENT, header="\n\n=== CURRENT ===\n")
+
+        assert prompt.render() == "Policy.\n\n=== CART ===\n- Shoes x1\n\n=== CURRENT ===\nUSER: hi"
+
+    def test_empty_sections_are_skipped(self):
+        prompt = PromptBuilder()
+        prompt.add("summary", "", PRIORITY_SUMMARY, header="\n\n=== SUMMARY ===\n")
+
+        assert prompt.section_names() == []
+        assert prompt.render() == ""
+
+    def test_lowest_priority_sections_are_dropped_first(self):
+        summary = " ".join(["older"] * 200)
+        prompt = PromptBuilder(budget=60)
+        prompt.add("policy", "Policy text.", PRIORITY_POLICY)
+        prompt.add("summary", summary, PRIORITY_SUMMARY, header="\n\n=== SUMMARY ===\n")
+        prompt.add("current", "USER: where is my order", PRIORITY_CURRENT, header="\n\n=== CURRENT ===\n")
+
+        rendered = prompt.render()
+
+        assert "USER: where is my order" in rendered
+        assert "Policy text." in rendered
+        assert count_tokens(rendered) <= 60
+
+    def test_section_cap_keeps_most_recent_lines(self):
+        recent = "\n".join(f"USER: message {i}" for i in range(50))
+        prompt = PromptBuilder()
+        prompt.add("recent", recent, PRIORITY_RECENT, max_tokens=20, keep="tail")
+
+        rendered = prompt.render()
+
+        assert "message 49" in rendered
+        assert "message 0\n" not in rendered
+        assert count_tokens(rendered) <= 20
+
+
+class TestTruncation:
+    """Test token counting and truncation helpers"""
+
+    def test_short_text_is_unchanged(self):
+        assert truncate_to_tokens("a b c", 10) == "a b c"
+
+    def test_head_truncation_keeps_first_lines(self):
+        text = "line one\nline two\nline three"
+
+        assert truncate_to_tokens(text, 5) == "line one"
+
+    def test_single_long_line_is_cut_by_words(self):
+        result = truncate_to_tokens("word " * 100, 10)
+
+        assert 0 < count_tokens(result) <= 10
+
+    def test_count_tokens_handles_long_identifiers(self):
+        assert count_tokens("x" * 40) == 10
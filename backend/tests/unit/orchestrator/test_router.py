@@ -1,32 +1,196 @@
 import pytest
 from unittest.mock import AsyncMock, patch
 
+from app.orchestrator.prompt_builder import PromptBuilder
+
 
 @pytest.mark.asyncio
 async def test_route_request_sanitizes_unverified_action():
-        with patch("app.orchestrator.router.detect_intent", return_value="cart"), \
-            patch("app.orchestrator.router.build_context", new_callable=AsyncMock, return_value=""), \
-            patch("app.orchestrator.router.generate_response", new_callable=AsyncMock, return_value="Order confirmed"), \
-            patch("app.orchestrator.router.extract_product_name", return_value="Widget"), \
-            patch("app.repositories.product_repository.find_product_by_name", new_callable=AsyncMock, return_value={"product_id": "p1", "name": "Widget", "price": 10, "stock": 5}), \
-            patch("app.orchestrator.router.add_item", new_callable=AsyncMock, return_value=[]):
+    with patch("app.orchestrator.router.detect_intent", return_value="cart"), \
+        patch("app.orchestrator.router.build_context", new_callable=AsyncMock, return_value=PromptBuilder()), \
+        patch("app.orchestrator.router.generate_response", new_callable=AsyncMock, return_value="Order confirmed") as generate_response, \
+        patch("app.orchestrator.router.extract_product_name", return_value="Widget"), \
+        patch("app.repositories.product_repository.find_product_by_name", new_callable=AsyncMock, return_value={"product_id": "p1", "name": "Widget", "price": 10, "stock": 5}), \
+        patch("app.orchestrator.router.add_item", new_callable=AsyncMock, return_value=[]):
 
-        from app.orchestrator.router import route_request
+        from app.orchestrator.router import route_request, llm_skip_stats
+        skipped_before = llm_skip_stats()["pending_confirmation"]
         result = await route_request("guest_s1", "s1", "add widget")
 
     assert "pending backend confirmation" in result["reply"].lower()
+    generate_response.assert_not_awaited()
+    assert llm_skip_stats()["pending_confirmation"] == skipped_before + 1
 
 
 @pytest.mark.asyncio
 async def test_route_request_allows_verified_action_reply():
-        with patch("app.orchestrator.router.detect_intent", return_value="cart"), \
-            patch("app.orchestrator.router.build_context", new_callable=AsyncMock, return_value=""), \
-            patch("app.orchestrator.router.generate_response", new_callable=AsyncMock, return_value="Order confirmed"), \
-            patch("app.orchestrator.router.extract_product_name", return_value="Widget"), \
-            patch("app.repositories.product_repository.find_product_by_name", new_callable=AsyncMock, return_value={"product_id": "p1", "name": "Widget", "price": 10, "stock": 5}), \
-            patch("app.orchestrator.router.add_item", new_callable=AsyncMock, return_value=[{"product_id": "p1"}]):
+    with patch("app.orchestrator.router.detect_intent", return_value="cart"), \
+        patch("app.orchestrator.router.build_context", new_callable=AsyncMock, return_value=PromptBuilder()), \
+        patch("app.orchestrator.router.generate_response", new_callable=AsyncMock, return_value="Order confirmed"), \
+        patch("app.orchestrator.router.extract_product_name", return_value="Widget"), \
+        patch("app.repositories.product_repository.find_product_by_name", new_callable=AsyncMock, return_value={"product_id": "p1", "name": "Widget", "price": 10, "stock": 5}), \
+        patch("app.orchestrator.router.add_item", new_callable=AsyncMock, return_value=[{"product_id": "p1"}]):
 
         from app.orchestrator.router import route_request
         result = await route_request("guest_s1", "s1", "add widget")
 
     assert result["reply"] == "Order confirmed"
+
+
+@pytest.mark.asyncio
+async def test_route_request_uses_template_for_cart_view(monkeypatch):
+    monkeypatch.setattr("app.orchestrator.templates.settings.template_replies", {"default": ["*"]})
+    cart = [{"product_id": "p1", "name": "Widget", "price": 10, "quantity": 2}]
+    with patch("app.orchestrator.router.detect_intent", return_value="cart"), \
+        patch("app.orchestrator.router.build_context", new_callable=AsyncMock) as build_context, \
+        patch("app.orchestrator.router.generate_response", new_callable=AsyncMock) as generate_response, \
+        patch("app.orchestrator.router.get_cart", new_callable=AsyncMock, return_value=cart):
+
+        from app.orchestrator.router import route_request
+        result = await route_request("guest_s1", "s1", "show my cart")
+
+    assert "Widget x2" in result["reply"]
+    assert "$20.00" in result["reply"]
+    assert result["actions"][0]["type"] == "show_cart"
+    generate_response.assert_not_awaited()
+    build_context.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_prepare_request_builds_context_while_agent_runs():
+    import asyncio
+    context_started = asyncio.Event()
+    agent_started = asyncio.Event()
+
+    async def fake_build_context(*args):
+        context_started.set()
+        await asyncio.wait_for(agent_started.wait(), 1)
+        return PromptBuilder()
+
+    async def fake_recommend(*args):
+        agent_started.set()
+        await asyncio.wait_for(context_started.wait(), 1)
+        return [{"name": "Widget", "price": 10, "stock": 3}]
+
+    with patch("app.orchestrator.router.detect_intent", return_value="recommendation"), \
+        patch("app.orchestrator.router.build_context", side_effect=fake_build_context), \
+        patch("app.orchestrator.router.recommend_products", side_effect=fake_recommend):
+
+        from app.orchestrator.router import prepare_request
+        prepared = await prepare_request("u1", "s1", "recommend something")
+
+    assert "Widget" in prepared["prompt"]
+
+
+@pytest.mark.asyncio
+async def test_prepare_request_cancels_context_for_template_reply(monkeypatch):
+    monkeypatch.setattr("app.orchestrator.templates.settings.template_replies", {"default": ["*"]})
+    import asyncio
+
+    async def slow_build_context(*args):
+        await asyncio.sleep(10)
+
+    with patch("app.orchestrator.router.detect_intent", return_value="tracking"), \
+        patch("app.orchestrator.router.build_context", side_effect=slow_build_context), \
+        patch("app.orchestrator.router.track_order", new_callable=AsyncMock, return_value={"order_id": "ORD1", "status": "shipped"}):
+
+        from app.orchestrator.router import prepare_request
+        prepared = await prepare_request("u1", "s1", "track order ORD1")
+        await asyncio.sleep(0)
+
+    assert prepared["reply"] == "Order ORD1 is currently shipped."
+    assert [task for task in asyncio.all_tasks() if task is not asyncio.current_task() and not task.done()] == []
+
+
+@pytest.mark.asyncio
+async def test_compound_message_fans_out_and_merges():
+    with patch("app.orchestrator.router.build_context", new_callable=AsyncMock, return_value=PromptBuilder()), \
+        patch("app.orchestrator.router.generate_response", new_callable=AsyncMock, return_value="Both done") as generate_response, \
+        patch("app.orchestrator.router.recommend_products", new_callable=AsyncMock, return_value=[{"name": "Laptop", "price": 900, "stock": 2}]) as recommend, \
+        patch("app.orchestrator.router.track_order", new_callable=AsyncMock, return_value={"order_id": "12345", "status": "shipped"}) as track:
+
+        from app.orchestrator.router import route_request
+        result = await route_request("u1", "s1", "recommend a laptop and where is order 12345")
+
+    recommend.assert_awaited_once_with("u1", "recommend a laptop")
+    track.assert_awaited_once_with("12345")
+    assert result["agent_used"] == "recommendation"
+    assert [action["type"] for action in result["actions"]] == ["show_products", "order_status"]
+    prompt = generate_response.await_args.args[0]
+    assert "Laptop" in prompt and "Order ID: 12345" in prompt and "=== MULTIPLE REQUESTS ===" in prompt
+
+
+@pytest.mark.asyncio
+async def test_agent_timeout_drops_only_that_result(monkeypatch):
+    import asyncio
+    from app.orchestrator import router
+
+    async def slow_track(order_id):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(router.settings, "agent_timeout_seconds", 0.05)
+    with patch("app.orchestrator.router.build_context", new_callable=AsyncMock, return_value=PromptBuilder()), \
+        patch("app.orchestrator.router.recommend_products", new_callable=AsyncMock, return_value=[{"name": "Laptop", "price": 900, "stock": 2}]), \
+        patch("app.orchestrator.router.track_order", side_effect=slow_track):
+
+        prepared = await router.prepare_request("u1", "s1", "recommend a laptop and where is order 12345")
+
+    assert prepared["intents"] == ["recommendation", "tracking"]
+    assert [action["type"] for action in prepared["actions"]] == ["show_products"]
+
+
+@pytest.mark.asyncio
+async def test_fixed_confirmation_reply_is_not_counted_as_skipped_llm_call():
+    with patch("app.orchestrator.router.detect_intent", return_value="general"):
+        from app.orchestrator.router import route_request, llm_skip_stats
+        before = llm_skip_stats()
+        result = await route_request("u1", "s1", "please confirm the adjustment")
+
+    assert result["reply"].startswith("I cannot confirm or revert changes")
+    assert llm_skip_stats() == before
+    assert "fixed" not in before
+
+
+@pytest.mark.asyncio
+async def test_cart_add_with_unknown_name_suggests_instead_of_adding():
+    with patch("app.orchestrator.router.detect_intent", return_value="cart"), \
+        patch("app.repositories.product_repository.find_product_by_name", new_callable=AsyncMock, return_value=None), \
+        patch("app.repositories.product_repository.search_products", new_callable=AsyncMock, return_value=[{"name": "Sony Headphones"}]), \
+        patch("app.orchestrator.router.add_item", new_callable=AsyncMock) as add_item:
+
+        from app.orchestrator.router import run_agent
+        result, actions = await run_agent("cart", "u1", "s1", "add sony hedphones")
+
+    add_item.assert_not_awaited()
+    assert result["error"] == "Product not found"
+    assert result["suggestions"] == ["Sony Headphones"]
+    assert actions == []
+
+
+@pytest.mark.asyncio
+async def test_compound_cart_turn_keeps_product_name_with_and():
+    product = {"product_id": "p7", "name": "Black and White Sneakers", "price": 60, "stock": 3}
+    with patch("app.repositories.product_repository.find_product_by_name", new_callable=AsyncMock, return_value=product) as find, \
+        patch("app.orchestrator.router.add_item", new_callable=AsyncMock, return_value=[{**product, "quantity": 1}]) as add_item, \
+        patch("app.orchestrator.router.track_order", new_callable=AsyncMock, return_value={"order_id": "12345", "status": "shipped"}) as track:
+
+        from app.orchestrator.router import _plan_agents, run_agent
+        message = "add the black and white sneakers to cart and where is order 12345"
+        plan = _plan_agents("cart", message)
+        for intent, text in plan:
+            await run_agent(intent, "u1", "s1", text)
+
+    assert plan == [("cart", "add the black and white sneakers to cart"), ("tracking", "where is order 12345")]
+    find.assert_awaited_once_with("black and white sneakers")
+    assert add_item.await_args.args[2]["product_id"] == "p7"
+    track.assert_awaited_once_with("12345")
+
+
+def test_compound_remove_is_not_cut_into_an_add():
+    from app.orchestrator.router import _plan_agents
+    message = "remove the black and white sneakers from my cart and where is order 12345"
+
+    assert _plan_agents("cart", message) == [
+        ("cart", "remove the black and white sneakers from my cart"),
+        ("tracking", "where is order 12345"),
+    ]
@@ -0,0 +1,65 @@
+import pytest
+
+from app.orchestrator import templates
+from app.orchestrator.templates import render_template_reply
+
+
+@pytest.fixture(autouse=True)
+def web_templates(monkeypatch):
+    monkeypatch.setattr(templates.settings, "template_replies", {"default": ["cart", "tracking", "loyalty"], "voice": ["*"]})
+
+
+def _action(action_type, data, verified=True):
+    return [{"type": action_type, "data": data, "verified": verified}]
+
+
+def test_cart_view_lists_items_and_total():
+    data = {"items": [{"name": "Widget", "price": 5, "quantity": 3}], "total": 15}
+    reply = render_template_reply("cart", _action("show_cart", data))
+    assert reply == "Here's your cart (3 items):\n- Widget x3 ($15.00)\nTotal: $15.00"
+
+
+def test_cart_view_voice_has_no_bullets():
+    data = {"items": [{"name": "Widget", "price": 5, "quantity": 1}], "total": 5}
+    reply = render_template_reply("cart", _action("show_cart", data), channel="voice")
+    assert reply == "You have 1 item in your cart: Widget x1 ($5.00). The total is $5.00."
+
+
+def test_empty_cart_and_clear():
+    assert render_template_reply("cart", _action("show_cart", {"items": [], "total": 0})) == "Your cart is empty."
+    cleared = {"success": True, "action": "cleared", "cart_size": 0, "verified": True}
+    assert render_template_reply("cart", _action("cart_updated", cleared)) == "Your cart is now empty."
+
+
+def test_cart_add_still_needs_llm():
+    added = {"success": True, "product": "Widget", "cart_size": 1, "verified": True}
+    assert render_template_reply("cart", _action("cart_updated", added)) is None
+
+
+def test_order_status_with_eta():
+    data = {"order_id": "ORD1", "status": "in_transit", "eta": "2026-01-05T10:00:00"}
+    reply = render_template_reply("tracking", _action("order_status", data))
+    assert reply == "Order ORD1 is currently in transit. Estimated delivery: 2026-01-05."
+
+
+def test_loyalty_balance_but_not_offers():
+    reply = render_template_reply("loyalty", _action("loyalty_info", {"points": 120, "tier": "silver"}))
+    assert reply == "You have 120 loyalty points and you're at Silver tier."
+    assert render_template_reply("loyalty", _action("loyalty_info", [{"offer": "10% off"}])) is None
+
+
+def test_unverified_actions_are_not_templated():
+    cleared = {"success": False, "action": "clear_failed", "verified": False}
+    assert render_template_reply("cart", _action("cart_updated", cleared, verified=False)) is None
+
+
+def test_templates_follow_channel_settings(monkeypatch):
+    monkeypatch.setattr(templates.settings, "template_replies", {"default": [], "voice": ["*"]})
+    data = {"order_id": "ORD1", "status": "delivered"}
+    assert render_template_reply("tracking", _action("order_status", data), channel="web") is None
+    assert render_template_reply("tracking", _action("order_status", data), channel="voice") == "Order ORD1 is currently delivered."
+
+
+def test_only_voice_uses_templates_by_default():
+    defaults = type(templates.settings).model_fields["template_replies"].default
+    assert defaults == {"voice": ["*"]}
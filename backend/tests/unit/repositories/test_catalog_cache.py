@@ -0,0 +1,102 @@
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.repositories import catalog_cache
+from app.repositories.product_repository import find_product_by_name, find_products, get_product_by_id, search_products
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+PRODUCTS = [
+    {"product_id": "P1", "name": "Nike Running Shoes", "category": "shoes", "price": 120.0, "stock": 4,
+     "updated_at": datetime(2026, 1, 1, 10)},
+    {"product_id": "P2", "name": "Adidas Dress Shirt", "category": "shirts", "price": 45.0, "stock": 0},
+    {"product_id": "P3", "name": "Sony Headphones", "category": "electronics", "price": 80.0, "stock": 9,
+     "updated_at": datetime(2026, 1, 1, 11)},
+]
+
+
+@pytest.fixture
+async def loaded_catalog():
+    finds = []
+
+    def find(query, *args, **kwargs):
+        finds.append(query)
+        return _Cursor([dict(p) for p in PRODUCTS])
+
+    db = SimpleNamespace(products=SimpleNamespace(find=find, find_one=AsyncMock()))
+    with patch("app.repositories.catalog_cache.get_database", return_value=db):
+        await catalog_cache.load_catalog()
+        yield db, finds
+    await catalog_cache.stop_catalog_cache()
+
+
+@pytest.mark.asyncio
+async def test_reads_are_served_from_memory(loaded_catalog):
+    with patch("app.repositories.product_repository.get_database", side_effect=AssertionError("Mongo queried")):
+        product = await get_product_by_id("P1")
+        in_stock = await find_products({"stock": {"$gt": 0}, "price": {"$lte": 100}}, limit=5)
+        by_category = await find_products({"category": {"$regex": "SHIRT", "$options": "i"}})
+        suggestions = await search_products("adidas shrt")
+
+    assert product["name"] == "Nike Running Shoes"
+    assert [p["product_id"] for p in in_stock] == ["P3"]
+    assert [p["product_id"] for p in by_category] == ["P2"]
+    assert [p["product_id"] for p in suggestions] == ["P2"]
+
+    # Callers get copies
+    product["price"] = 0
+    assert catalog_cache.get_cached_product("P1")["price"] == 120.0
+
+
+@pytest.mark.asyncio
+async def test_name_lookup_is_exact_and_reads_stock_from_mongo(loaded_catalog):
+    fresh = {"product_id": "P2", "name": "Adidas Dress Shirt", "stock": 3}
+    mongo = SimpleNamespace(products=SimpleNamespace(find_one=AsyncMock(return_value=fresh)))
+    with patch("app.repositories.product_repository.get_database", return_value=mongo):
+        by_keywords = await find_product_by_name("adidas shirt")
+        misspelled = await find_product_by_name("adidas shrt")
+
+    assert by_keywords["stock"] == 3
+    mongo.products.find_one.assert_awaited_once_with({"product_id": "P2"})
+    assert misspelled is None
+
+
+@pytest.mark.asyncio
+async def test_unsupported_filters_and_misses_fall_back_to_mongo(loaded_catalog):
+    mongo = SimpleNamespace(products=SimpleNamespace(find_one=AsyncMock(return_value={"product_id": "P9"})))
+    with patch("app.repositories.product_repository.get_database", return_value=mongo):
+        assert (await get_product_by_id("P9"))["product_id"] == "P9"
+
+    with pytest.raises(catalog_cache.UnsupportedFilter):
+        catalog_cache.find_cached_products({"$or": [{"stock": 0}]}, 5)
+
+
+@pytest.mark.asyncio
+async def test_refresh_polls_from_watermark_and_reload_applies_admin_writes(loaded_catalog):
+    db, finds = loaded_catalog
+    with patch("app.repositories.catalog_cache.get_database", return_value=db):
+        assert await catalog_cache.refresh_catalog() == 0
+        assert finds[-1] == {"updated_at": {"$gte": datetime(2026, 1, 1, 10, 59, 55)}}
+
+        db.products.find_one.return_value = {**PRODUCTS[0], "price": 99.0, "updated_at": datetime(2026, 1, 1, 12)}
+        await catalog_cache.reload_product("P1")
+        assert catalog_cache.get_cached_product("P1")["price"] == 99.0
+
+        db.products.find_one.return_value = None
+        await catalog_cache.reload_product("P2")
+        assert catalog_cache.get_cached_product("P2") is None
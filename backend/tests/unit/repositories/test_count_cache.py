@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from app.repositories import count_cache
+
+
+class FakeCollection:
+    def __init__(self, name, total):
+        self.name = name
+        self.total = total
+        self.count_calls = 0
+
+    async def count_documents(self, query_filter):
+        self.count_calls += 1
+        await asyncio.sleep(0)
+        return self.total
+
+    async def estimated_document_count(self):
+        return 1000
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(count_cache, "_counts", count_cache.TTLCache(max_size=16))
+
+
+async def test_filtered_count_is_exact_then_cached_by_normalized_filter():
+    orders = FakeCollection("orders", 7)
+
+    assert await count_cache.count_documents(orders, {"status": "pending", "user_id": "u1"}) == (7, True)
+    orders.total = 8
+    assert await count_cache.count_documents(orders, {"user_id": "u1", "status": "pending"}) == (7, False)
+    assert orders.count_calls == 1
+
+
+async def test_writes_invalidate_cached_counts():
+    orders = FakeCollection("orders", 7)
+    await count_cache.count_documents(orders, {"status": "pending"})
+
+    orders.total = 8
+    count_cache.invalidate_counts("orders")
+
+    assert await count_cache.count_documents(orders, {"status": "pending"}) == (8, True)
+
+
+async def test_concurrent_counts_share_one_query():
+    users = FakeCollection("users", 3)
+
+    results = await asyncio.gather(*(count_cache.count_documents(users, {"role": "admin"}) for _ in range(5)))
+
+    assert [total for total, _ in results] == [3] * 5
+    assert users.count_calls == 1
+
+
+async def test_unfiltered_count_uses_collection_metadata():
+    users = FakeCollection("users", 3)
+
+    assert await count_cache.count_documents(users, {}) == (1000, False)
+    assert users.count_calls == 0
@@ -7,7 +7,8 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from app.repositories.product_repository import (
     find_products,
     find_product_by_name,
-    get_product_by_id
+    get_product_by_id,
+    build_listing_pipeline
 )
 
 
@@ -166,3 +167,32 @@ class TestProductRepository:
             
             mock_cursor.limit.assert_called_once_with(3)
             mock_cursor.to_list.assert_called_once_with(length=3)
+
+
+class TestProductListingPipeline:
+    """Test the faceted listing aggregation"""
+
+    def test_each_facet_ignores_its_own_filter(self):
+        pipeline = build_listing_pipeline("nike", "shoes", "low_stock", "price", -1, 40, 20)
+
+        assert pipeline[0] == {"$match": {"$text": {"$search": "nike"}}}
+        facets = pipeline[1]["$facet"]
+        both = {"category": "shoes", "stock": {"$gt": 0, "$lte": 10}}
+        assert facets["page"] == [
+            {"$match": both},
+            {"$sort": {"price": -1, "_id": -1}},
+            {"$skip": 40},
+            {"$limit": 21},
+        ]
+        assert facets["total"][0] == {"$match": both}
+        assert facets["category"][0] == {"$match": {"stock": {"$gt": 0, "$lte": 10}}}
+        assert facets["stock"][0] == {"$match": {"category": "shoes", "stock": {"$ne": None}}}
+        assert facets["price"][0] == {"$match": both}
+
+    def test_without_search_the_facet_stage_comes_first(self):
+        pipeline = build_listing_pipeline(None, None, None, "name", 1, 0, 20)
+
+        assert list(pipeline[0]) == ["$facet"]
+        assert pipeline[0]["$facet"]["page"][-1] == {"$limit": 21}
+        assert {"$skip": 0} not in pipeline[0]["$facet"]["page"]
+        assert pipeline[0]["$facet"]["stock"][0] == {"$match": {"stock": {"$ne": None}}}
@@ -2,7 +2,9 @@ import pytest
 from types import SimpleNamespace
 from unittest.mock import AsyncMock, patch
 
-from app.repositories.session_repository import save_message, get_last_messages, update_summary
+from app.repositories.session_repository import (
+    build_message, save_message, save_messages_bulk, get_last_messages, update_summary, save_summary
+)
 
 
 @pytest.mark.asyncio
@@ -33,6 +35,65 @@ async def test_save_message_appends():
     mock_sessions.update_one.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_save_message_skips_session_owned_by_another_user():
+    mock_sessions = SimpleNamespace(
+        find_one=AsyncMock(return_value={"user_id": "owner", "last_messages": []}),
+        update_one=AsyncMock()
+    )
+    mock_db = SimpleNamespace(sessions=mock_sessions)
+
+    with patch("app.repositories.session_repository.get_database", return_value=mock_db):
+        await save_message("s1", "intruder", "user", "Hi")
+
+    projection = mock_sessions.find_one.call_args.args[1]
+    assert projection.get("user_id") == 1
+    mock_sessions.update_one.assert_not_called()
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.mark.asyncio
+async def test_save_messages_bulk_groups_per_session_in_order():
+    existing = [
+        {"session_id": "s1", "user_id": "u1", "last_messages": [{"role": "assistant", "text": "Hello"}]},
+        {"session_id": "s2", "user_id": "owner", "last_messages": []},
+    ]
+    mock_sessions = SimpleNamespace(find=lambda *args, **kwargs: _Cursor(existing), bulk_write=AsyncMock())
+    mock_db = SimpleNamespace(sessions=mock_sessions)
+    entries = [
+        ("s1", "u1", build_message("assistant", "Hello")),  # repeats the stored last message
+        ("s1", "u1", build_message("user", "Track my order")),
+        ("s2", "intruder", build_message("user", "Hi")),  # session owned by someone else
+        ("s3", "u3", build_message("user", "Hi")),
+        ("s1", "u1", build_message("assistant", "It ships today")),
+        ("s3", "u3", build_message("user", "Hi")),
+    ]
+
+    with patch("app.repositories.session_repository.get_database", return_value=mock_db):
+        written = await save_messages_bulk(entries)
+
+    assert written == 3
+    operations = mock_sessions.bulk_write.call_args.args[0]
+    pushed = {op._filter["session_id"]: op._doc["$push"]["last_messages"]["$each"] for op in operations}
+    assert [m["text"] for m in pushed["s1"]] == ["Track my order", "It ships today"]
+    assert [m["text"] for m in pushed["s3"]] == ["Hi"]
+    assert "s2" not in pushed
+    assert mock_sessions.bulk_write.call_args.kwargs == {"ordered": False}
+
+
 @pytest.mark.asyncio
 async def test_get_last_messages_empty():
     mock_sessions = SimpleNamespace(find_one=AsyncMock(return_value=None))
@@ -53,3 +114,17 @@ async def test_update_summary_persists():
         await update_summary("s1", "u1", "summary")
 
     mock_sessions.update_one.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_save_summary_is_conditional_on_watermark():
+    mock_sessions = SimpleNamespace(update_one=AsyncMock(return_value=SimpleNamespace(modified_count=0)))
+    mock_db = SimpleNamespace(sessions=mock_sessions)
+
+    with patch("app.repositories.session_repository.get_database", return_value=mock_db):
+        saved = await save_summary("s1", "u1", "summary", watermark="t2", previous_watermark="t1")
+
+    assert saved is False
+    query, update = mock_sessions.update_one.call_args.args
+    assert query == {"session_id": "s1", "user_id": "u1", "summary_watermark": "t1"}
+    assert update["$set"]["summary_watermark"] == "t2"
@@ -0,0 +1,80 @@
+import pytest
+
+from app.services import circuit_breaker
+from app.services.circuit_breaker import CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_failure_rate_reached(clock):
+    breaker = CircuitBreaker("p", min_calls=4, failure_rate=0.5)
+
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == "closed"
+
+    breaker.record_failure(0.1)
+
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+
+def test_half_open_probe_closes_on_success(clock):
+    breaker = CircuitBreaker("p", min_calls=1, failure_rate=0.5, open_seconds=10, half_open_probes=1)
+    breaker.record_failure(0.1)
+
+    clock[0] += 11
+
+    assert breaker.state == "half_open"
+    assert breaker.acquire()
+    assert not breaker.acquire()
+    breaker.record_success(0.2)
+    assert breaker.state == "closed"
+
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = CircuitBreaker("p", min_calls=1, failure_rate=0.5, open_seconds=10)
+    breaker.record_failure(0.1)
+    clock[0] += 11
+
+    assert breaker.acquire()
+    breaker.record_failure(0.1)
+
+    assert breaker.state == "open"
+    assert breaker.times_opened == 2
+
+
+def test_old_calls_leave_the_window(clock):
+    breaker = CircuitBreaker("p", window_seconds=30, min_calls=2, failure_rate=0.5)
+    breaker.record_failure(0.1)
+    clock[0] += 31
+    breaker.record_success(0.1)
+
+    assert breaker.error_rate() == 0.0
+    assert breaker.state == "closed"
+
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = CircuitBreaker("p", min_calls=1, failure_rate=0.5, slow_call_seconds=2.0)
+
+    breaker.record_success(3.0)
+
+    assert breaker.state == "open"
+
+
+def test_snapshot_reports_latency_percentiles(clock):
+    breaker = CircuitBreaker("p", min_calls=1)
+    for latency in [0.1, 0.2, 0.3, 0.4, 1.0]:
+        breaker.record_success(latency)
+
+    snapshot = breaker.snapshot()
+
+    assert snapshot["p50_seconds"] == 0.3
+    assert snapshot["p95_seconds"] == 1.0
+    assert snapshot["calls"] == 5
@@ -0,0 +1,42 @@
+import pytest
+
+from app.services import http_clients
+
+
+@pytest.fixture(autouse=True)
+async def reset_clients():
+    await http_clients.close_clients()
+    yield
+    await http_clients.close_clients()
+
+
+@pytest.mark.asyncio
+async def test_get_client_reuses_instance():
+    first = http_clients.get_client("openrouter")
+    second = http_clients.get_client("openrouter")
+
+    assert first is second
+
+
+@pytest.mark.asyncio
+async def test_clients_are_per_provider_with_own_timeout(monkeypatch):
+    monkeypatch.setattr(http_clients.settings, "openrouter_timeout", 12.0)
+    monkeypatch.setattr(http_clients.settings, "ollama_timeout", 90.0)
+
+    openrouter = http_clients.get_client("openrouter")
+    ollama = http_clients.get_client("ollama")
+
+    assert openrouter is not ollama
+    assert openrouter.timeout.read == 12.0
+    assert ollama.timeout.read == 90.0
+
+
+@pytest.mark.asyncio
+async def test_close_clients_recreates_on_next_use():
+    await http_clients.start_clients()
+    client = http_clients.get_client("ollama")
+
+    await http_clients.close_clients()
+
+    assert client.is_closed
+    assert http_clients.get_client("ollama") is not client
@@ -3,6 +3,13 @@ import pytest
 from app.services import llm_service
 
 
+@pytest.fixture(autouse=True)
+def reset_breakers():
+    llm_service.reset_breakers()
+    yield
+    llm_service.reset_breakers()
+
+
 @pytest.mark.asyncio
 async def test_routing_prefers_openrouter(monkeypatch):
     monkeypatch.setattr(llm_service, "OPENROUTER_API_KEY", "key")
@@ -83,3 +90,226 @@ async def test_provider_returns_none_then_next(monkeypatch):
     response = await llm_service.generate_response("hi")
 
     assert response == "ollama"
+
+
+@pytest.mark.asyncio
+async def test_stream_falls_back_when_primary_fails_before_first_token(monkeypatch):
+    monkeypatch.setattr(llm_service, "OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(llm_service, "OLLAMA_API_URL", "http://ollama")
+
+    async def failing_openrouter(prompt):
+        raise RuntimeError("openrouter down")
+        yield
+
+    async def fake_ollama(prompt):
+        for chunk in ["a", "b"]:
+            yield chunk
+
+    monkeypatch.setattr(llm_service, "_stream_openrouter", failing_openrouter)
+    monkeypatch.setattr(llm_service, "_stream_ollama", fake_ollama)
+
+    chunks = [chunk async for chunk in llm_service.stream_response("hi")]
+
+    assert chunks == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_stream_span_ends_at_first_token(monkeypatch):
+    from app.utils.tracing import current_trace, end_trace, start_trace
+
+    monkeypatch.setattr(llm_service, "OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(llm_service, "OLLAMA_API_URL", "")
+
+    async def fake_openrouter(prompt):
+        for chunk in ["a", "b"]:
+            yield chunk
+
+    monkeypatch.setattr(llm_service, "_stream_openrouter", fake_openrouter)
+    token = start_trace("r1")
+    try:
+        stream = llm_service.stream_response("hi")
+        assert await stream.__anext__() == "a"
+        spans = list(current_trace().spans)
+        await stream.aclose()
+    finally:
+        end_trace(token)
+
+    assert [(recorded["name"], recorded["ok"], recorded["stream"]) for recorded in spans] == [
+        ("llm_attempt", True, True)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_returns_fallback_when_no_provider(monkeypatch):
+    monkeypatch.setattr(llm_service, "OPENROUTER_API_KEY", "")
+    monkeypatch.setattr(llm_service, "OLLAMA_API_URL", "")
+
+    chunks = [chunk async for chunk in llm_service.stream_response("hi")]
+
+    assert chunks == [llm_service.FALLBACK_REPLY]
+
+
+@pytest.mark.asyncio
+async def test_response_cache_hits_for_cacheable_intent(monkeypatch):
+    monkeypatch.setattr(llm_service, "OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(llm_service, "OLLAMA_API_URL", "")
+    monkeypatch.setattr(llm_service, "_response_cache", llm_service.TTLCache(max_size=8))
+    calls = []
+
+    async def fake_openrouter(prompt):
+        calls.append(prompt)
+        return "cached answer"
+
+    monkeypatch.setattr(llm_service, "_call_openrouter", fake_openrouter)
+
+    first = await llm_service.generate_response("list products", intent="general")
+    second = await llm_service.generate_response("list   products ", intent="general")
+
+    assert first == second == "cached answer"
+    assert len(calls) == 1
+    assert llm_service.cache_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_response_cache_skips_uncached_intents(monkeypatch):
+    monkeypatch.setattr(llm_service, "OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(llm_service, "OLLAMA_API_URL", "")
+    monkeypatch.setattr(llm_service, "_response_cache", llm_service.TTLCache(max_size=8))
+    calls = []
+
+    async def fake_openrouter(prompt):
+        calls.append(prompt)
+        return "fresh answer"
+
+    monkeypatch.setattr(llm_service, "_call_openrouter", fake_openrouter)
+
+    await llm_service.generate_response("=== CART ===\n- Shoes x1", intent="cart")
+    await llm_service.generate_response("=== CART ===\n- Shoes x1", intent="cart")
+
+    assert len(calls) == 2
+
+
+def test_cache_key_includes_personal_sections():
+    base = "=== CURRENT ===\nUSER: list products"
+
+    assert llm_service._cache_key(base) != llm_service._cache_key("=== CART ===\n- Shoes x1\n" + base)
+
+
+@pytest.mark.asyncio
+async def test_hedging_starts_secondary_and_cancels_slow_primary(monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr(llm_service, "OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(llm_service, "OLLAMA_API_URL", "http://ollama")
+    monkeypatch.setattr(llm_service.settings, "llm_hedge_delay_seconds", 0.01)
+    cancelled = []
+
+    async def slow_openrouter(prompt):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "openrouter"
+
+    async def fake_ollama(prompt):
+        return "ollama"
+
+    monkeypatch.setattr(llm_service, "_call_openrouter", slow_openrouter)
+    monkeypatch.setattr(llm_service, "_call_ollama", fake_ollama)
+
+    response = await llm_service.generate_response("hi")
+    await asyncio.sleep(0)
+
+    assert response == "ollama"
+    assert cancelled == [True]
+
+
+@pytest.mark.asyncio
+async def test_hedging_keeps_fast_primary(monkeypatch):
+    monkeypatch.setattr(llm_service, "OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(llm_service, "OLLAMA_API_URL", "http://ollama")
+    monkeypatch.setattr(llm_service.settings, "llm_hedge_delay_seconds", 1.0)
+    calls = []
+
+    async def fake_openrouter(prompt):
+        calls.append("openrouter")
+        return "openrouter"
+
+    async def fake_ollama(prompt):
+        calls.append("ollama")
+        return "ollama"
+
+    monkeypatch.setattr(llm_service, "_call_openrouter", fake_openrouter)
+    monkeypatch.setattr(llm_service, "_call_ollama", fake_ollama)
+
+    response = await llm_service.generate_response("hi")
+
+    assert response == "openrouter"
+    assert calls == ["openrouter"]
+
+
+@pytest.mark.asyncio
+async def test_deadline_returns_fallback(monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr(llm_service, "OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(llm_service, "OLLAMA_API_URL", "")
+    monkeypatch.setattr(llm_service.settings, "llm_deadline_seconds", 0.01)
+
+    async def hanging_openrouter(prompt):
+        await asyncio.sleep(5)
+        return "late"
+
+    monkeypatch.setattr(llm_service, "_call_openrouter", hanging_openrouter)
+
+    response = await llm_service.generate_response("hi")
+
+    assert response == llm_service.FALLBACK_REPLY
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_skips_failing_provider(monkeypatch):
+    monkeypatch.setattr(llm_service, "OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(llm_service, "OLLAMA_API_URL", "http://ollama")
+    calls = []
+
+    async def failing_openrouter(prompt):
+        calls.append("openrouter")
+        return None
+
+    async def fake_ollama(prompt):
+        return "ollama"
+
+    monkeypatch.setattr(llm_service, "_call_openrouter", failing_openrouter)
+    monkeypatch.setattr(llm_service, "_call_ollama", fake_ollama)
+
+    min_calls = llm_service._breakers["openrouter"].min_calls
+    for _ in range(min_calls + 3):
+        assert await llm_service.generate_response("hi") == "ollama"
+
+    assert len(calls) == min_calls
+    statuses = {status["name"]: status for status in llm_service.provider_status()}
+    assert statuses["openrouter"]["state"] == "open"
+    assert statuses["ollama"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_identical_in_flight_prompts_are_coalesced(monkeypatch):
+    import asyncio
+
+    monkeypatch.setattr(llm_service, "OPENROUTER_API_KEY", "key")
+    monkeypatch.setattr(llm_service, "OLLAMA_API_URL", "")
+    calls = []
+
+    async def slow_openrouter(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.01)
+        return "shared"
+
+    monkeypatch.setattr(llm_service, "_call_openrouter", slow_openrouter)
+
+    responses = await asyncio.gather(*[llm_service.generate_response("same prompt") for _ in range(3)])
+
+    assert responses == ["shared"] * 3
+    assert len(calls) == 1
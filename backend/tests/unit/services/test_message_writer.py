@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.services import message_writer
+from app.repositories import session_repository
+
+
+@pytest.mark.asyncio
+async def test_writes_directly_when_write_behind_is_off():
+    with patch.object(session_repository, "save_message", new_callable=AsyncMock) as save_message:
+        await message_writer.write_message("s1", "u1", "user", "Hi", agent="cart")
+    save_message.assert_awaited_once_with("s1", "u1", "user", "Hi", agent="cart", actions=None)
+
+
+@pytest.mark.asyncio
+async def test_queued_messages_flush_in_order_and_drain(monkeypatch):
+    monkeypatch.setattr(message_writer.settings, "message_write_behind", True)
+    monkeypatch.setattr(message_writer.settings, "message_flush_interval_seconds", 0.01)
+    monkeypatch.setattr(message_writer.settings, "message_flush_batch_size", 3)
+    batches = []
+
+    async def fake_bulk(entries):
+        batches.append([(session_id, message["text"]) for session_id, _, message in entries])
+        return len(entries)
+
+    with patch.object(session_repository, "save_messages_bulk", side_effect=fake_bulk):
+        await message_writer.start_message_writer()
+        for i in range(4):
+            await message_writer.write_message("s1", "u1", "user", f"m{i}")
+        await message_writer.write_message("s2", "u2", "user", "other")
+        assert [m["text"] for m in message_writer.pending_messages("s1", "u1")] == ["m0", "m1", "m2", "m3"]
+        await message_writer.stop_message_writer()
+
+    assert [entry for batch in batches for entry in batch] == [
+        ("s1", "m0"), ("s1", "m1"), ("s1", "m2"), ("s1", "m3"), ("s2", "other")
+    ]
+    assert all(len(batch) <= 3 for batch in batches)
+    assert message_writer.pending_messages("s1", "u1") == []
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_retried(monkeypatch):
+    monkeypatch.setattr(message_writer.settings, "message_write_behind", True)
+    monkeypatch.setattr(message_writer.settings, "message_flush_interval_seconds", 0)
+    monkeypatch.setattr(message_writer.asyncio, "sleep", AsyncMock())
+    bulk = AsyncMock(side_effect=[RuntimeError("primary stepped down"), 1])
+
+    with patch.object(session_repository, "save_messages_bulk", bulk):
+        await message_writer.start_message_writer()
+        await message_writer.write_message("s1", "u1", "user", "Hi")
+        await asyncio.wait_for(message_writer.stop_message_writer(), 1)
+
+    assert bulk.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_messages_written_while_stopping_stay_behind_queued_ones(monkeypatch):
+    monkeypatch.setattr(message_writer.settings, "message_write_behind", True)
+    monkeypatch.setattr(message_writer.settings, "message_flush_interval_seconds", 0)
+    monkeypatch.setattr(message_writer.settings, "message_flush_batch_size", 1)
+    saved = []
+
+    async def slow_bulk(entries):
+        await asyncio.sleep(0.01)
+        saved.extend(message["text"] for _, _, message in entries)
+        return len(entries)
+
+    async def direct_save(session_id, user_id, role, text, agent=None, actions=None):
+        saved.append(text)
+
+    with patch.object(session_repository, "save_messages_bulk", side_effect=slow_bulk), \
+            patch.object(session_repository, "save_message", side_effect=direct_save):
+        await message_writer.start_message_writer()
+        for i in range(3):
+            await message_writer.write_message("s1", "u1", "user", f"m{i}")
+        stopping = asyncio.create_task(message_writer.stop_message_writer())
+        await asyncio.sleep(0)
+        await message_writer.write_message("s1", "u1", "assistant", "late")
+        await stopping
+        await message_writer.write_message("s1", "u1", "user", "after")
+
+    assert saved == ["m0", "m1", "m2", "late", "after"]
@@ -0,0 +1,70 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.services import summarizer
+
+
+def _messages(count):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "text": f"message {i}", "timestamp": f"2026-01-01T00:00:{i:02d}"}
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_folds_only_messages_after_watermark():
+    session = {"summary": "user: message 0", "summary_watermark": "2026-01-01T00:00:00", "all_messages": _messages(13)}
+    with patch.object(summarizer, "get_session", new_callable=AsyncMock, return_value=session), \
+        patch.object(summarizer, "save_summary", new_callable=AsyncMock, return_value=True) as save_summary:
+        assert await summarizer.summarize_session("s1", "u1") is True
+
+    args, kwargs = save_summary.call_args
+    summary = args[2]
+    assert summary.startswith("user: message 0\nassistant: message 1")
+    # The last five messages stay out of the summary (they are sent as recent messages)
+    assert "message 7" in summary and "message 8" not in summary
+    assert kwargs == {"watermark": "2026-01-01T00:00:07", "previous_watermark": "2026-01-01T00:00:00"}
+
+
+@pytest.mark.asyncio
+async def test_skips_until_enough_new_messages():
+    session = {"summary_watermark": "2026-01-01T00:00:03", "all_messages": _messages(10)}
+    with patch.object(summarizer, "get_session", new_callable=AsyncMock, return_value=session), \
+        patch.object(summarizer, "save_summary", new_callable=AsyncMock) as save_summary:
+        assert await summarizer.summarize_session("s1", "u1") is False
+    save_summary.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_llm_summary_with_extractive_fallback(monkeypatch):
+    monkeypatch.setattr(summarizer.settings, "summary_use_llm", True)
+    session = {"all_messages": _messages(12)}
+    with patch.object(summarizer, "get_session", new_callable=AsyncMock, return_value=session), \
+        patch.object(summarizer, "save_summary", new_callable=AsyncMock, return_value=True) as save_summary, \
+        patch.object(summarizer, "generate_response", new_callable=AsyncMock, return_value="Customer asked about shoes."):
+        await summarizer.summarize_session("s1", "u1")
+        assert save_summary.call_args.args[2] == "Customer asked about shoes."
+
+        summarizer.generate_response.return_value = summarizer.FALLBACK_REPLY
+        await summarizer.summarize_session("s1", "u1")
+        assert save_summary.call_args.args[2].startswith("user: message 0")
+
+
+@pytest.mark.asyncio
+async def test_worker_coalesces_and_drains():
+    calls = []
+
+    async def fake_summarize(session_id, user_id):
+        calls.append((session_id, user_id))
+
+    with patch.object(summarizer, "summarize_session", side_effect=fake_summarize):
+        assert summarizer.schedule_summary("s1", "u1") is False  # worker not running
+        await summarizer.start_summarizer()
+        try:
+            assert summarizer.schedule_summary("s1", "u1") is True
+            assert summarizer.schedule_summary("s1", "u1") is False
+            summarizer.schedule_summary("s2", "u1")
+        finally:
+            await summarizer.stop_summarizer()
+
+    assert calls == [("s1", "u1"), ("s2", "u1")]
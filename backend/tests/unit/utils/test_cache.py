@@ -0,0 +1,51 @@
+"""
+Unit tests for the LRU + TTL cache
+"""
+from app.utils import cache as cache_module
+from app.utils.cache import TTLCache
+
+
+class TestTTLCache:
+    """Test eviction, expiry and counters"""
+
+    def test_get_returns_stored_value(self):
+        cache = TTLCache(max_size=2)
+        cache.set("a", 1, ttl=60)
+
+        assert cache.get("a") == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_missing_key_counts_miss(self):
+        cache = TTLCache(max_size=2)
+
+        assert cache.get("missing") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(max_size=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_expired_entry_is_dropped(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        cache = TTLCache(max_size=2)
+        cache.set("a", 1, ttl=5)
+
+        now[0] = 106.0
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_zero_ttl_is_not_stored(self):
+        cache = TTLCache(max_size=2)
+        cache.set("a", 1, ttl=0)
+
+        assert len(cache) == 0
@@ -0,0 +1,70 @@
+import pytest
+from bson import ObjectId
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_filter
+
+
+def _matches(doc, query):
+    """Just enough of MongoDB's matcher for the filters keyset_filter builds."""
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(doc, branch) for branch in condition):
+                return False
+            continue
+        value = doc.get(field)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        for operator, expected in condition.items():
+            if operator == "$ne" and value == expected:
+                return False
+            if operator in ("$gt", "$lt") and value is None:
+                return False
+            if operator == "$gt" and not value > expected:
+                return False
+            if operator == "$lt" and not value < expected:
+                return False
+    return True
+
+
+def _mongo_order(docs, field, direction):
+    # Null sorts before any value
+    key = lambda doc: (doc.get(field) is not None, doc.get(field) or 0, doc["_id"])
+    return sorted(docs, key=key, reverse=direction == -1)
+
+
+@pytest.mark.parametrize("direction", [1, -1])
+def test_keyset_pages_cover_every_document_once(direction):
+    ids = [ObjectId() for _ in range(7)]
+    docs = [{"_id": oid, "price": price} for oid, price in zip(ids, [5, None, 3, 5, None, 9, 3])]
+    expected = _mongo_order(docs, "price", direction)
+
+    seen, cursor = [], None
+    while True:
+        remaining = expected
+        if cursor:
+            value, last_id = decode_cursor(cursor, "price", direction)
+            remaining = [doc for doc in expected if _matches(doc, keyset_filter("price", direction, value, last_id))]
+        page = remaining[:2]
+        seen += page
+        if len(remaining) <= 2:
+            break
+        cursor = encode_cursor(page[-1], "price", direction)
+
+    assert seen == expected
+
+
+def test_cursor_round_trips_bson_values():
+    oid = ObjectId()
+    cursor = encode_cursor({"_id": oid, "created_at": None}, "created_at", -1)
+    assert decode_cursor(cursor, "created_at", -1) == (None, oid)
+
+
+def test_cursor_rejects_other_sort_and_garbage():
+    cursor = encode_cursor({"_id": "a", "name": "Shirt"}, "name", 1)
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "name", -1)
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "price", 1)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor", "name", 1)
@@ -130,3 +130,29 @@ class TestOrderIdExtraction:
         """Test that returned order IDs are uppercase"""
         assert extract_order_id("track ord-123") == "ORD-123"
         assert extract_order_id("order order999") == "ORDER999"
+
+
+class TestCompiledParsersEquivalence:
+    """The precompiled parsers must match the previous per-call regex loops"""
+    
+    def test_random_messages_match_legacy(self):
+        import random
+        from benchmarks.parsers_benchmark import legacy_extract_order_id, legacy_extract_product_name
+        
+        vocabulary = [
+            "add", "put", "place", "to", "the", "a", "an", "my", "in", "into", "cart", "shopping",
+            "basket", "available", "stock", "check", "is", "there", "do", "you", "have", "show", "me",
+            "find", "search", "for", "i", "want", "need", "i'll", "take", "give", "get", "this", "that",
+            "nike", "t-shirt", "levi's", "order", "#ORD-123", "ORDER987", "order:", "12345", "#", "-",
+            "550e8400-e29b-41d4-a716-446655440000", "ord-77", "\n", "ADD", "Cart,", "(the)",
+        ]
+        rng = random.Random(2024)
+        for _ in range(3000):
+            words = [rng.choice(vocabulary) for _ in range(rng.randint(1, 12))]
+            message = rng.choice([" ", "  ", "-"]).join(words)
+            assert extract_product_name(message) == legacy_extract_product_name(message), message
+            assert extract_order_id(message) == legacy_extract_order_id(message), message
+    
+    def test_shadowed_phrase_keeps_legacy_output(self):
+        """'shopping cart' never matched as a phrase because 'cart' is removed first"""
+        assert extract_product_name("add shoes to my shopping cart") == "shoes shopping"
@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.utils.request_loader import (
+    RequestLoader,
+    end_request_scope,
+    get_request_loader,
+    invalidate,
+    start_request_scope,
+)
+
+
+@pytest.mark.asyncio
+async def test_load_memoizes_and_returns_copies():
+    loader = RequestLoader()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return {"items": [1]}
+
+    first = await loader.load("cart", "c1", fetch)
+    first["items"].append(2)
+    second = await loader.load("cart", "c1", fetch)
+
+    assert second == {"items": [1]}
+    assert len(calls) == 1
+    assert loader.stats() == {"hits": 1, "misses": 1, "batches": 0}
+
+
+@pytest.mark.asyncio
+async def test_load_many_batches_concurrent_keys():
+    loader = RequestLoader()
+    batches = []
+
+    async def fetch_many(keys):
+        batches.append(sorted(keys))
+        return {key: {"user_id": key} for key in keys if key != "missing"}
+
+    results = await asyncio.gather(
+        loader.load_many("user", "u1", fetch_many),
+        loader.load_many("user", "u2", fetch_many),
+        loader.load_many("user", "u1", fetch_many),
+        loader.load_many("user", "missing", fetch_many),
+    )
+
+    assert results == [{"user_id": "u1"}, {"user_id": "u2"}, {"user_id": "u1"}, None]
+    assert batches == [["missing", "u1", "u2"]]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_forces_refetch():
+    loader = RequestLoader()
+    values = iter([1, 2])
+
+    async def fetch():
+        return next(values)
+
+    assert await loader.load("user", "u1", fetch) == 1
+    loader.invalidate("user", "u1")
+    assert await loader.load("user", "u1", fetch) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_lookups_are_not_memoized():
+    loader = RequestLoader()
+    attempts = []
+
+    async def fetch():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        await loader.load("session", "s1", fetch)
+    assert await loader.load("session", "s1", fetch) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_get_user_reads_once_per_request_and_invalidates_on_write():
+    from app.repositories import user_repository
+
+    class _Cursor:
+        def __init__(self, docs):
+            self.docs = docs
+
+        def __aiter__(self):
+            return self._iterate()
+
+        async def _iterate(self):
+            for doc in self.docs:
+                yield doc
+
+    db = MagicMock()
+    db.users.find.side_effect = lambda query: _Cursor([{"user_id": uid} for uid in query["user_id"]["$in"]])
+
+    token = start_request_scope()
+    try:
+        with patch("app.repositories.user_repository.get_database", return_value=db):
+            await asyncio.gather(user_repository.get_user("u1"), user_repository.get_user("u2"))
+            await user_repository.get_user("u1")
+            assert db.users.find.call_count == 1
+
+            invalidate("user", "u1")
+            await user_repository.get_user("u1")
+            assert db.users.find.call_count == 2
+    finally:
+        end_request_scope(token)
+
+    assert get_request_loader() is None
@@ -0,0 +1,45 @@
+from app.utils.search_index import SearchIndex
+
+NAMES = {
+    "p1": ("Premium Adidas T-Shirt - Black", "shirts"),
+    "p2": ("Classic Adidas Running Shoes - Green", "shoes"),
+    "p3": ("Modern Nike Tank Top - Navy", "shirts"),
+    "p4": ("Sony Headphones - Blue", "electronics"),
+    "p5": ("Adidas Dress Shirt - White", "shirts"),
+}
+
+
+def _index(**kwargs):
+    index = SearchIndex(**kwargs)
+    for product_id, (name, category) in NAMES.items():
+        index.add(product_id, name, category)
+    return index
+
+
+def test_requires_every_word_and_ranks_verbatim_titles_first():
+    index = _index()
+    assert [doc for doc, _ in index.search("adidas shirt")] == ["p5", "p1"]
+    assert index.best("adidas t-shirt") == "p1"
+    assert index.best("nike laptop") is None
+    assert index.best("(?=.*") is None
+
+
+def test_tolerates_typos_and_plurals():
+    index = _index()
+    assert index.best("sony hedphones") == "p4"
+    assert index.best("adidas shrit") in {"p1", "p5"}
+    assert index.best("headphone") == "p4"
+    assert index.best("electronics") == "p4"
+
+
+def test_common_terms_still_find_matches_and_updates_apply():
+    # Every term is "common" here, so candidates come from the bounded fallback paths
+    index = _index(common_ratio=0.0, common_floor=0)
+    assert index.best("tank top") == "p3"
+    assert index.best("adidsa shoes") == "p2"
+
+    index.add("p3", "Modern Nike Polo Shirt - Navy", "shirts")
+    index.remove("p4")
+    assert index.best("tank top") is None
+    assert index.best("sony headphones") is None
+    assert len(index) == 4
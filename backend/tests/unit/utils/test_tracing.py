@@ -0,0 +1,62 @@
+import asyncio
+import json
+import pytest
+
+from app.utils.tracing import current_trace, end_trace, export_trace, span, start_trace
+
+
+@pytest.mark.asyncio
+async def test_spans_from_child_tasks_join_the_request_trace():
+    token = start_trace("req-1")
+    try:
+        async def agent(name):
+            with span("agent", intent=name):
+                await asyncio.sleep(0)
+
+        with span("detect_intent"):
+            pass
+        await asyncio.gather(agent("cart"), agent("tracking"))
+        trace = current_trace()
+    finally:
+        end_trace(token)
+
+    assert [(s["name"], s.get("intent")) for s in trace.spans] == [
+        ("detect_intent", None), ("agent", "cart"), ("agent", "tracking")
+    ]
+    assert current_trace() is None
+    assert 'agent;dur=' in trace.server_timing() and 'desc="cart"' in trace.server_timing()
+
+
+def test_span_records_errors_and_is_a_noop_without_trace():
+    with span("outside") as attrs:
+        attrs["ok"] = True
+
+    token = start_trace("req-2")
+    try:
+        with pytest.raises(ValueError):
+            with span("generate_response", provider="openrouter"):
+                raise ValueError("boom")
+        trace = current_trace()
+    finally:
+        end_trace(token)
+
+    assert len(trace.spans) == 1
+    assert trace.spans[0]["error"] == "ValueError" and trace.spans[0]["provider"] == "openrouter"
+
+
+def test_export_appends_json_lines(tmp_path):
+    token = start_trace("req-3")
+    try:
+        with span("build_context"):
+            pass
+        trace = current_trace()
+    finally:
+        end_trace(token)
+
+    span_file = tmp_path / "spans.jsonl"
+    export_trace(trace, str(span_file))
+    export_trace(trace, str(span_file))
+
+    records = [json.loads(line) for line in span_file.read_text().splitlines()]
+    assert len(records) == 2
+    assert records[0]["request_id"] == "req-3" and records[0]["spans"][0]["name"] == "build_context"
@@ -0,0 +1,83 @@
+"""
+Train the intent classifier artifact used by app.orchestrator.classifier.
+
+Examples come from a JSONL file of {"text": ..., "intent": ...} lines and/or
+from logged chat sessions, where each user message is labelled with the agent
+that handled it. Usage:
+
+    python train_intent_classifier.py --data intents.jsonl
+    python train_intent_classifier.py --from-sessions --output models/intent_classifier.npz
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from app.config import get_settings
+from app.core.database import connect_db, close_db, get_database
+from app.orchestrator.classifier import DEFAULT_FEATURES, IntentClassifier
+
+
+def load_jsonl(path: str):
+    examples = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                examples.append((record["text"], record["intent"]))
+    return examples
+
+
+async def load_sessions(limit: int):
+    await connect_db()
+    db = get_database()
+    examples = []
+    cursor = db.sessions.find({}, {"all_messages": 1}).limit(limit)
+    async for session in cursor:
+        messages = session.get("all_messages", [])
+        for message, reply in zip(messages, messages[1:]):
+            if message.get("role") == "user" and reply.get("role") == "assistant" and reply.get("agent"):
+                examples.append((message.get("text", ""), reply["agent"]))
+    await close_db()
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", help="JSONL file with text/intent examples")
+    parser.add_argument("--from-sessions", action="store_true", help="Also use labelled turns from MongoDB sessions")
+    parser.add_argument("--session-limit", type=int, default=10000)
+    parser.add_argument("--output", default=get_settings().intent_model_path)
+    parser.add_argument("--features", type=int, default=DEFAULT_FEATURES)
+    parser.add_argument("--alpha", type=float, default=0.1)
+    parser.add_argument("--holdout", type=float, default=0.1, help="Share of examples held out for accuracy")
+    args = parser.parse_args()
+
+    examples = load_jsonl(args.data) if args.data else []
+    if args.from_sessions:
+        examples += asyncio.run(load_sessions(args.session_limit))
+    examples = [(text, intent) for text, intent in examples if text]
+    if not examples:
+        parser.error("no training examples; pass --data and/or --from-sessions")
+
+    random.Random(13).shuffle(examples)
+    split = int(len(examples) * (1 - args.holdout)) if args.holdout > 0 else len(examples)
+    train, test = examples[:split], examples[split:]
+
+    started = time.perf_counter()
+    model = IntentClassifier.train([t for t, _ in train], [i for _, i in train], args.features, args.alpha)
+    print(f"Trained on {len(train)} examples, {len(model.labels)} intents in {time.perf_counter() - started:.2f}s")
+
+    if test:
+        predictions = model.predict([t for t, _ in test])
+        correct = sum(1 for (_, intent), (predicted, _) in zip(test, predictions) if intent == predicted)
+        print(f"Holdout accuracy: {correct / len(test):.3f} on {len(test)} examples")
+
+    model.save(args.output)
+    print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()